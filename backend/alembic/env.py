@@ -12,22 +12,29 @@ from models import (
     audit_mixin,
     batch,
     batch_shed_assignment,
+    batch_week_fact,
     bovanswhitelayerperformance,
     business_partners,
     composition_usage_history,
     composition_usage_item,
     composition,
     daily_batch,
+    daily_batch_upload_job,
+    daily_feed_rollup,
+    effective_standard_curve,
     egg_price,
     egg_room_reports,
+    egg_stock_checkpoint,
     inventory_item_audit,
     inventory_item_in_composition,
     inventory_item_usage_history,
     inventory_items,
+    monthly_production_rollup,
     operational_expenses,
     payments,
     purchase_order_items,
     purchase_orders,
+    sales_fact,
     sales_order_items,
     sales_orders,
     sales_payments,
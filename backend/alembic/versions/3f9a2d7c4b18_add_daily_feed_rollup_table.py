@@ -0,0 +1,64 @@
+"""add daily_feed_rollup table
+
+Revision ID: 3f9a2d7c4b18
+Revises: 8b3f0c6d2e71
+Create Date: 2026-10-16 16:21:09.447310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a2d7c4b18'
+down_revision: Union[str, None] = '8b3f0c6d2e71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('composition_usage_item', sa.Column('unit_cost', sa.Numeric(precision=10, scale=3), nullable=True))
+    # Existing usages are costed at the items' current average cost, as the financial summary did so far
+    op.execute("""
+        UPDATE composition_usage_item cui
+        SET unit_cost = ii.average_cost
+        FROM inventory_items ii
+        WHERE ii.id = cui.inventory_item_id
+    """)
+
+    op.create_table('daily_feed_rollup',
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('feed_date', sa.Date(), nullable=False),
+    sa.Column('gross_feed_kg', sa.Numeric(), nullable=False),
+    sa.Column('net_feed_kg', sa.Numeric(), nullable=False),
+    sa.Column('feed_cost', sa.Numeric(), nullable=False),
+    sa.ForeignKeyConstraint(['batch_id'], ['batch.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('tenant_id', 'batch_id', 'feed_date')
+    )
+
+    # Backfill; rebuild_daily_feed_rollup.py recomputes the same totals later if needed
+    op.execute("""
+        INSERT INTO daily_feed_rollup (tenant_id, batch_id, feed_date, gross_feed_kg, net_feed_kg, feed_cost)
+        SELECT cuh.tenant_id,
+               cuh.batch_id,
+               date(cuh.used_at),
+               COALESCE(SUM(CASE WHEN cui.item_category = 'Feed' THEN cui.weight * cuh.times ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN cui.item_category = 'Feed'
+                                 THEN cui.weight * cuh.times * (1 - COALESCE(cui.wastage_percentage, 0) / 100)
+                                 ELSE 0 END), 0),
+               COALESCE(SUM(cui.weight * cuh.times * COALESCE(cui.unit_cost, 0)), 0)
+        FROM composition_usage_history cuh
+        JOIN composition_usage_item cui ON cui.usage_history_id = cuh.id
+        WHERE cuh.tenant_id IS NOT NULL
+        GROUP BY cuh.tenant_id, cuh.batch_id, date(cuh.used_at)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_feed_rollup')
+    op.drop_column('composition_usage_item', 'unit_cost')
@@ -0,0 +1,59 @@
+"""add sales_facts table
+
+Revision ID: 4e8c2a6f1d93
+Revises: b7e1d4a9c352
+Create Date: 2026-10-17 15:47:12.350274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8c2a6f1d93'
+down_revision: Union[str, None] = 'b7e1d4a9c352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_facts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('sale_date', sa.Date(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('inventory_item_id', sa.Integer(), nullable=True),
+    sa.Column('composition_id', sa.Integer(), nullable=True),
+    sa.Column('variant_id', sa.Integer(), nullable=True),
+    sa.Column('status', postgresql.ENUM('DRAFT', 'APPROVED', 'PARTIALLY_PAID', 'PAID', name='salesorderstatus', create_type=False), nullable=False),
+    sa.Column('quantity', sa.Numeric(), nullable=False),
+    sa.Column('line_total', sa.Numeric(), nullable=False),
+    sa.Column('order_lines', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sales_facts_tenant_id_sale_date', 'sales_facts', ['tenant_id', 'sale_date'], unique=False)
+
+    # Backfill; rebuild_sales_facts.py recomputes the same facts later if needed
+    op.execute("""
+        INSERT INTO sales_facts (
+            tenant_id, sale_date, customer_id, inventory_item_id, composition_id, variant_id, status,
+            quantity, line_total, order_lines
+        )
+        SELECT so.tenant_id, so.order_date, so.customer_id, soi.inventory_item_id, soi.composition_id,
+               soi.variant_id, so.status, sum(soi.quantity), sum(soi.line_total), count(*)
+        FROM sales_order_items soi
+        JOIN sales_orders so ON soi.sales_order_id = so.id
+        WHERE so.tenant_id IS NOT NULL
+        GROUP BY so.tenant_id, so.order_date, so.customer_id, soi.inventory_item_id, soi.composition_id,
+                 soi.variant_id, so.status
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sales_facts_tenant_id_sale_date', table_name='sales_facts')
+    op.drop_table('sales_facts')
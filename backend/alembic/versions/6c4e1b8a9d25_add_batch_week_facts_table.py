@@ -0,0 +1,88 @@
+"""add batch_week_facts table
+
+Revision ID: 6c4e1b8a9d25
+Revises: 3f9a2d7c4b18
+Create Date: 2026-10-17 09:42:18.660251
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c4e1b8a9d25'
+down_revision: Union[str, None] = '3f9a2d7c4b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('batch_week_facts',
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('age_week', sa.Integer(), nullable=False),
+    sa.Column('days', sa.Integer(), nullable=False),
+    sa.Column('first_date', sa.Date(), nullable=False),
+    sa.Column('last_date', sa.Date(), nullable=False),
+    sa.Column('opening_count', sa.Integer(), nullable=True),
+    sa.Column('closing_count', sa.Integer(), nullable=True),
+    sa.Column('highest_age', sa.Numeric(precision=4, scale=1), nullable=True),
+    sa.Column('mortality', sa.Integer(), nullable=False),
+    sa.Column('culls', sa.Integer(), nullable=False),
+    sa.Column('table_eggs', sa.Integer(), nullable=False),
+    sa.Column('jumbo', sa.Integer(), nullable=False),
+    sa.Column('cr', sa.Integer(), nullable=False),
+    sa.Column('birds_added', sa.Integer(), nullable=False),
+    sa.Column('hd_sum', sa.Float(), nullable=False),
+    sa.Column('bird_days', sa.Integer(), nullable=False),
+    sa.Column('bird_days_count', sa.Integer(), nullable=False),
+    sa.Column('feed_kg', sa.Numeric(), nullable=False),
+    sa.ForeignKeyConstraint(['batch_id'], ['batch.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('tenant_id', 'batch_id', 'age_week')
+    )
+
+    # Backfill; rebuild_batch_week_facts.py recomputes the same facts later if needed
+    op.execute("""
+        INSERT INTO batch_week_facts (
+            tenant_id, batch_id, age_week, opening_count, closing_count, days, first_date, last_date,
+            highest_age, mortality, culls, table_eggs, jumbo, cr, birds_added, hd_sum,
+            bird_days, bird_days_count, feed_kg
+        )
+        SELECT tenant_id, batch_id, age_week, first_opening_count, last_closing_count,
+               count(*), min(batch_date), max(batch_date), max(age),
+               sum(mortality), sum(culls), sum(table_eggs), sum(jumbo), sum(cr), sum(birds_added),
+               sum(hd), COALESCE(sum(opening_count), 0), count(opening_count), COALESCE(sum(net_feed_kg), 0)
+        FROM (
+            SELECT db.tenant_id, db.batch_id, CAST(floor(db.age) AS INTEGER) AS age_week,
+                   db.batch_date, db.age, db.opening_count,
+                   COALESCE(db.mortality, 0) AS mortality, COALESCE(db.culls, 0) AS culls,
+                   COALESCE(db.table_eggs, 0) AS table_eggs, COALESCE(db.jumbo, 0) AS jumbo,
+                   COALESCE(db.cr, 0) AS cr, COALESCE(db.birds_added, 0) AS birds_added,
+                   CASE WHEN c.closing_count > 0
+                        THEN CAST(COALESCE(db.table_eggs, 0) + COALESCE(db.jumbo, 0) + COALESCE(db.cr, 0) AS FLOAT) / c.closing_count
+                        ELSE 0.0 END AS hd,
+                   r.net_feed_kg,
+                   first_value(db.opening_count) OVER (
+                       PARTITION BY db.tenant_id, db.batch_id, CAST(floor(db.age) AS INTEGER) ORDER BY db.batch_date ASC
+                   ) AS first_opening_count,
+                   first_value(c.closing_count) OVER (
+                       PARTITION BY db.tenant_id, db.batch_id, CAST(floor(db.age) AS INTEGER) ORDER BY db.batch_date DESC
+                   ) AS last_closing_count
+            FROM daily_batch db
+            CROSS JOIN LATERAL (
+                SELECT COALESCE(db.opening_count, 0) + COALESCE(db.birds_added, 0)
+                       - (COALESCE(db.mortality, 0) + COALESCE(db.culls, 0)) AS closing_count
+            ) c
+            LEFT OUTER JOIN daily_feed_rollup r ON r.batch_id = db.batch_id AND r.feed_date = db.batch_date
+            WHERE mod(db.age * 10, 10) BETWEEN 1 AND 7
+        ) daily
+        GROUP BY tenant_id, batch_id, age_week, first_opening_count, last_closing_count
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('batch_week_facts')
@@ -0,0 +1,62 @@
+"""add monthly_production_rollup table
+
+Revision ID: 9d2a5f3e7b40
+Revises: 6c4e1b8a9d25
+Create Date: 2026-10-17 11:08:37.214906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2a5f3e7b40'
+down_revision: Union[str, None] = '6c4e1b8a9d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('monthly_production_rollup',
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('daily_rows', sa.Integer(), nullable=False),
+    sa.Column('total_eggs', sa.Integer(), nullable=False),
+    sa.Column('feed_grams', sa.Numeric(), nullable=False),
+    sa.Column('composition_cost', sa.Numeric(), nullable=False),
+    sa.Column('operational_expense', sa.Numeric(), nullable=False),
+    sa.PrimaryKeyConstraint('tenant_id', 'month')
+    )
+
+    # Backfill; rebuild_monthly_production_rollup.py recomputes the same totals later if needed
+    op.execute("""
+        INSERT INTO monthly_production_rollup (
+            tenant_id, month, daily_rows, total_eggs, feed_grams, composition_cost, operational_expense
+        )
+        SELECT tenant_id, month, sum(daily_rows), sum(total_eggs), sum(feed_grams),
+               sum(composition_cost), sum(operational_expense)
+        FROM (
+            SELECT db.tenant_id, CAST(date_trunc('month', db.batch_date) AS DATE) AS month, 1 AS daily_rows,
+                   COALESCE(db.table_eggs, 0) + COALESCE(db.jumbo, 0) + COALESCE(db.cr, 0) AS total_eggs,
+                   COALESCE(dfr.net_feed_kg, 0) * 1000 AS feed_grams, 0 AS composition_cost, 0 AS operational_expense
+            FROM daily_batch db
+            LEFT OUTER JOIN daily_feed_rollup dfr ON dfr.batch_id = db.batch_id AND dfr.feed_date = db.batch_date
+            WHERE db.tenant_id IS NOT NULL
+            UNION ALL
+            SELECT tenant_id, CAST(date_trunc('month', feed_date) AS DATE), 0, 0, 0, feed_cost, 0
+            FROM daily_feed_rollup
+            UNION ALL
+            SELECT tenant_id, CAST(date_trunc('month', date(expense_date)) AS DATE), 0, 0, 0, 0, amount
+            FROM operational_expenses
+            WHERE tenant_id IS NOT NULL
+        ) AS monthly_parts
+        GROUP BY tenant_id, month
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('monthly_production_rollup')
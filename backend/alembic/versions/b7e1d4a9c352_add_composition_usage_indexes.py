@@ -0,0 +1,29 @@
+"""add composition usage indexes
+
+Revision ID: b7e1d4a9c352
+Revises: 9d2a5f3e7b40
+Create Date: 2026-10-17 14:32:51.608213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1d4a9c352'
+down_revision: Union[str, None] = '9d2a5f3e7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_composition_usage_history_tenant_id_used_at', 'composition_usage_history', ['tenant_id', 'used_at'], unique=False)
+    op.create_index(op.f('ix_composition_usage_item_usage_history_id'), 'composition_usage_item', ['usage_history_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_composition_usage_item_usage_history_id'), table_name='composition_usage_item')
+    op.drop_index('ix_composition_usage_history_tenant_id_used_at', table_name='composition_usage_history')
@@ -0,0 +1,95 @@
+"""add egg_stock_checkpoints table
+
+Revision ID: c3f9e1a7b286
+Revises: 4e8c2a6f1d93
+Create Date: 2026-10-17 17:21:38.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9e1a7b286'
+down_revision: Union[str, None] = '4e8c2a6f1d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('egg_stock_checkpoints',
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('checkpoint_date', sa.Date(), nullable=False),
+    sa.Column('table_closing', sa.Integer(), nullable=False),
+    sa.Column('jumbo_closing', sa.Integer(), nullable=False),
+    sa.Column('grade_c_closing', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('tenant_id', 'checkpoint_date')
+    )
+
+    # Backfill every completed month since each tenant's first egg room report;
+    # rebuild_egg_stock_checkpoints.py recomputes the same checkpoints later if needed
+    op.execute("""
+        WITH firsts AS (
+            SELECT tenant_id, min(report_date) AS first_date
+            FROM egg_room_reports
+            WHERE tenant_id IS NOT NULL
+            GROUP BY tenant_id
+        ),
+        months AS (
+            SELECT f.tenant_id, (m + interval '1 month' - interval '1 day')::date AS checkpoint_date
+            FROM firsts f,
+                 generate_series(date_trunc('month', f.first_date),
+                                 date_trunc('month', current_date) - interval '1 month',
+                                 interval '1 month') AS m
+        ),
+        openings AS (
+            SELECT tenant_id,
+                   max(value) FILTER (WHERE name = 'table_opening')::integer AS table_opening,
+                   max(value) FILTER (WHERE name = 'jumbo_opening')::integer AS jumbo_opening,
+                   max(value) FILTER (WHERE name = 'grade_c_opening')::integer AS grade_c_opening
+            FROM app_config
+            WHERE name IN ('table_opening', 'jumbo_opening', 'grade_c_opening')
+            GROUP BY tenant_id
+        ),
+        movements AS (
+            SELECT d.tenant_id, d.batch_date AS day,
+                   coalesce(d.table_eggs, 0) AS table_eggs, coalesce(d.jumbo, 0) AS jumbo, coalesce(d.cr, 0) AS grade_c
+            FROM daily_batch d
+            JOIN firsts f ON f.tenant_id = d.tenant_id AND d.batch_date >= f.first_date
+            UNION ALL
+            SELECT tenant_id, report_date,
+                   coalesce(jumbo_out, 0) + coalesce(table_untrayed, 0) - coalesce(table_transfer, 0)
+                       - coalesce(table_damage, 0) - coalesce(table_out, 0),
+                   coalesce(table_out, 0) + coalesce(jumbo_untrayed, 0) - coalesce(jumbo_transfer, 0)
+                       - coalesce(jumbo_waste, 0) - coalesce(jumbo_out, 0),
+                   coalesce(table_damage, 0) + coalesce(grade_c_untrayed, 0) - coalesce(grade_c_transfer, 0)
+                       - coalesce(grade_c_labour, 0) - coalesce(grade_c_waste, 0)
+            FROM egg_room_reports
+            WHERE tenant_id IS NOT NULL
+        ),
+        monthly AS (
+            SELECT tenant_id, (date_trunc('month', day) + interval '1 month' - interval '1 day')::date AS checkpoint_date,
+                   sum(table_eggs) AS table_eggs, sum(jumbo) AS jumbo, sum(grade_c) AS grade_c
+            FROM movements
+            GROUP BY 1, 2
+        )
+        INSERT INTO egg_stock_checkpoints (tenant_id, checkpoint_date, table_closing, jumbo_closing, grade_c_closing)
+        SELECT m.tenant_id, m.checkpoint_date,
+               coalesce(o.table_opening, 0)
+                   + coalesce(sum(x.table_eggs) OVER (PARTITION BY m.tenant_id ORDER BY m.checkpoint_date), 0),
+               coalesce(o.jumbo_opening, 0)
+                   + coalesce(sum(x.jumbo) OVER (PARTITION BY m.tenant_id ORDER BY m.checkpoint_date), 0),
+               coalesce(o.grade_c_opening, 0)
+                   + coalesce(sum(x.grade_c) OVER (PARTITION BY m.tenant_id ORDER BY m.checkpoint_date), 0)
+        FROM months m
+        LEFT JOIN monthly x ON x.tenant_id = m.tenant_id AND x.checkpoint_date = m.checkpoint_date
+        LEFT JOIN openings o ON o.tenant_id = m.tenant_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('egg_stock_checkpoints')
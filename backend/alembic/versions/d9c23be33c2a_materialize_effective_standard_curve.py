@@ -0,0 +1,96 @@
+"""materialize effective_standard_curve
+
+Revision ID: d9c23be33c2a
+Revises: c3f9e1a7b286
+Create Date: 2026-10-17 19:42:11.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9c23be33c2a'
+down_revision: Union[str, None] = 'c3f9e1a7b286'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TENANT_SOURCE_SQL = """
+    tenant_source AS (
+        SELECT t.tenant_id,
+               CASE WHEN replace(replace(lower(btrim(c.value)), '-', ''), '_', '') = 'bv300'
+                    THEN 'bv300' ELSE 'bovans' END AS source
+        FROM (
+            SELECT tenant_id FROM bovanswhitelayerperformance
+            UNION SELECT tenant_id FROM bv300_rearing_performance
+            UNION SELECT tenant_id FROM bv300_layer_performance
+        ) t
+        LEFT JOIN app_config c
+            ON c.tenant_id = t.tenant_id AND c.name = 'performance_standard_source'
+        WHERE t.tenant_id IS NOT NULL
+    )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DROP VIEW IF EXISTS effective_standard_curve")
+    op.create_table('effective_standard_curve',
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('lookup_age', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('lay_percent', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('feed_intake_per_day_g', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('tenant_id', 'lookup_age')
+    )
+
+    # Backfill every week of life 1..100 with the standard models.daily_batch.resolve_standard_curve
+    # picks: Bovans week W + 1, or BV300 rearing (from week 2, up to 18) then layer (up to 80);
+    # rebuild_effective_standard_curve.py recomputes the same rows later if needed
+    op.execute(f"""
+        WITH {TENANT_SOURCE_SQL}
+        INSERT INTO effective_standard_curve (tenant_id, lookup_age, source, lay_percent, feed_intake_per_day_g)
+        SELECT s.tenant_id, g.lookup_age, s.source,
+               CASE WHEN s.source = 'bovans' THEN b.lay_percent ELSE l.lay_percent END,
+               COALESCE(b.feed_intake_per_day_g, r.feed_intake_per_day_g, l.feed_intake_per_day_g)
+        FROM tenant_source s
+        CROSS JOIN generate_series(1, 100) AS g(lookup_age)
+        LEFT JOIN bovanswhitelayerperformance b
+            ON s.source = 'bovans' AND b.tenant_id = s.tenant_id AND b.age_weeks = g.lookup_age
+        LEFT JOIN bv300_rearing_performance r
+            ON s.source = 'bv300' AND g.lookup_age <= 18
+            AND r.tenant_id = s.tenant_id AND r.age_weeks = GREATEST(g.lookup_age, 2)
+        LEFT JOIN bv300_layer_performance l
+            ON s.source = 'bv300' AND g.lookup_age > 18
+            AND l.tenant_id = s.tenant_id AND l.age_weeks = LEAST(g.lookup_age, 80)
+        WHERE b.tenant_id IS NOT NULL OR r.tenant_id IS NOT NULL OR l.tenant_id IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('effective_standard_curve')
+    op.execute(f"""
+        CREATE VIEW effective_standard_curve AS
+        WITH {TENANT_SOURCE_SQL}
+        SELECT s.tenant_id, b.age_weeks AS lookup_age, s.source,
+               b.lay_percent, b.feed_intake_per_day_g
+        FROM tenant_source s
+        JOIN bovanswhitelayerperformance b ON b.tenant_id = s.tenant_id
+        WHERE s.source = 'bovans'
+        UNION ALL
+        SELECT s.tenant_id, r.age_weeks, s.source,
+               NULL::numeric(5, 2), r.feed_intake_per_day_g
+        FROM tenant_source s
+        JOIN bv300_rearing_performance r ON r.tenant_id = s.tenant_id
+        WHERE s.source = 'bv300' AND r.age_weeks <= 18
+        UNION ALL
+        SELECT s.tenant_id, l.age_weeks, s.source,
+               l.lay_percent, l.feed_intake_per_day_g
+        FROM tenant_source s
+        JOIN bv300_layer_performance l ON l.tenant_id = s.tenant_id
+        WHERE s.source = 'bv300' AND l.age_weeks > 18
+    """)
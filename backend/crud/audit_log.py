@@ -1,3 +1,4 @@
+from typing import List
 from sqlalchemy.orm import Session
 from models.audit_log import AuditLog
 from schemas.audit_log import AuditLogCreate
@@ -8,3 +9,13 @@ def create_audit_log(db: Session, log_entry: AuditLogCreate):
     db.commit()
     db.refresh(db_log_entry)
     return db_log_entry
+
+def create_audit_logs(db: Session, log_entries: List[AuditLogCreate]):
+    """
+    Adds several audit log entries to the session in one go.
+    Unlike create_audit_log this does not commit, so bulk write paths can
+    record their audit trail inside the same transaction as the data change.
+    """
+    db_log_entries = [AuditLog(**log_entry.model_dump()) for log_entry in log_entries]
+    db.add_all(db_log_entries)
+    return db_log_entries
@@ -8,7 +8,6 @@ from utils import sqlalchemy_to_dict
 from models.batch import Batch
 from schemas.batch import BatchCreate
 from datetime import date
-import routers.reports as reports
 from models.daily_batch import DailyBatch
 from models.batch_shed_assignment import BatchShedAssignment
 
@@ -104,14 +103,6 @@ def delete_batch(db: Session, batch_id: int, tenant_id: str, changed_by: str):
         except Exception:
             # don't fail the delete if audit logging fails
             pass
-
-        # Re-generate today's daily report list if needed
-        try:
-            batches = db.query(Batch).filter(Batch.date == date.today(), Batch.tenant_id == tenant_id).all()
-            reports.write_daily_report_excel(batches)
-        except Exception:
-            # non-critical: ignore failures when regenerating reports
-            pass
         return True
     return False
 
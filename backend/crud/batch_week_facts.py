@@ -0,0 +1,182 @@
+"""
+Maintenance and reads of the batch_week_facts table.
+
+The facts are refreshed per stale day range of a batch: the weeks holding those days, before or
+after the change, are recomputed from the batch's DailyBatch rows (and daily_feed_rollup) in one
+INSERT ... SELECT. Edits that re-chain the later rows of a batch mark every day from the edit on.
+models.batch_week_fact hooks the refresh into session commits for ORM changes; bulk statements on
+daily_batch call mark_batch_week_facts_stale themselves.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Float, Integer, and_, case, cast, func, or_, select, true, tuple_, union
+from sqlalchemy.orm import Session
+
+from models.batch_week_fact import BatchWeekFact
+from models.daily_batch import DailyBatch
+from models.daily_feed_rollup import DailyFeedRollup
+
+logger = logging.getLogger(__name__)
+
+
+# (from_date, to_date) with open ends as None
+DateRange = Tuple[Optional[date], Optional[date]]
+_age_week = cast(func.floor(DailyBatch.age), Integer)
+_in_week_cycle = func.mod(DailyBatch.age * 10, 10).between(1, 7)
+
+
+def _week_facts_select(batch_filter):
+    """Aggregates the W.1-W.7 daily rows matching batch_filter into one row per (tenant, batch, week)."""
+    age_week = _age_week
+    in_week = dict(partition_by=(DailyBatch.tenant_id, DailyBatch.batch_id, age_week))
+
+    daily_sq = select(
+        DailyBatch.tenant_id,
+        DailyBatch.batch_id,
+        age_week.label("age_week"),
+        DailyBatch.batch_date,
+        DailyBatch.age,
+        DailyBatch.opening_count,
+        func.coalesce(DailyBatch.mortality, 0).label("mortality"),
+        func.coalesce(DailyBatch.culls, 0).label("culls"),
+        func.coalesce(DailyBatch.table_eggs, 0).label("table_eggs"),
+        func.coalesce(DailyBatch.jumbo, 0).label("jumbo"),
+        func.coalesce(DailyBatch.cr, 0).label("cr"),
+        func.coalesce(DailyBatch.birds_added, 0).label("birds_added"),
+        case(
+            (DailyBatch.closing_count > 0, cast(DailyBatch.total_eggs, Float) / DailyBatch.closing_count),
+            else_=0.0
+        ).label("hd"),
+        DailyFeedRollup.net_feed_kg,
+        func.first_value(DailyBatch.opening_count).over(order_by=DailyBatch.batch_date.asc(), **in_week).label("first_opening_count"),
+        func.first_value(DailyBatch.closing_count).over(order_by=DailyBatch.batch_date.desc(), **in_week).label("last_closing_count"),
+    ).outerjoin(
+        DailyFeedRollup,
+        and_(DailyFeedRollup.batch_id == DailyBatch.batch_id, DailyFeedRollup.feed_date == DailyBatch.batch_date)
+    ).where(
+        batch_filter,
+        _in_week_cycle
+    ).subquery("daily_sq")
+
+    keys = (daily_sq.c.tenant_id, daily_sq.c.batch_id, daily_sq.c.age_week,
+            daily_sq.c.first_opening_count, daily_sq.c.last_closing_count)
+    return select(
+        *keys,
+        func.count().label("days"),
+        func.min(daily_sq.c.batch_date).label("first_date"),
+        func.max(daily_sq.c.batch_date).label("last_date"),
+        func.max(daily_sq.c.age).label("highest_age"),
+        func.sum(daily_sq.c.mortality).label("mortality"),
+        func.sum(daily_sq.c.culls).label("culls"),
+        func.sum(daily_sq.c.table_eggs).label("table_eggs"),
+        func.sum(daily_sq.c.jumbo).label("jumbo"),
+        func.sum(daily_sq.c.cr).label("cr"),
+        func.sum(daily_sq.c.birds_added).label("birds_added"),
+        func.sum(daily_sq.c.hd).label("hd_sum"),
+        func.coalesce(func.sum(daily_sq.c.opening_count), 0).label("bird_days"),
+        func.count(daily_sq.c.opening_count).label("bird_days_count"),
+        func.coalesce(func.sum(daily_sq.c.net_feed_kg), 0).label("feed_kg"),
+    ).group_by(*keys)
+
+
+_FACT_COLUMNS = [
+    "tenant_id", "batch_id", "age_week", "opening_count", "closing_count", "days", "first_date", "last_date",
+    "highest_age", "mortality", "culls", "table_eggs", "jumbo", "cr", "birds_added", "hd_sum",
+    "bird_days", "bird_days_count", "feed_kg",
+]
+
+
+def _insert_week_facts(db: Session, batch_filter) -> int:
+    stmt = BatchWeekFact.__table__.insert().from_select(_FACT_COLUMNS, _week_facts_select(batch_filter))
+    return db.execute(stmt).rowcount
+
+
+def _merge_ranges(ranges: Set[DateRange]) -> List[DateRange]:
+    """Merges overlapping and adjacent date ranges, so a run of stale days becomes one condition."""
+    merged: List[list] = []
+    for start, end in sorted(ranges, key=lambda r: (r[0] or date.min, r[1] or date.max)):
+        if merged and (merged[-1][1] is None or start is None or start <= merged[-1][1] + timedelta(days=1)):
+            if merged[-1][1] is not None and (end is None or end > merged[-1][1]):
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+
+def _range_filter(start_column, end_column, start: Optional[date], end: Optional[date]):
+    """start_column..end_column overlaps start..end (open ends as None)."""
+    conditions = []
+    if end is not None:
+        conditions.append(start_column <= end)
+    if start is not None:
+        conditions.append(end_column >= start)
+    return and_(true(), *conditions)
+
+
+def refresh_batch_week_facts(db: Session, stale: Dict[int, Set[DateRange]]) -> int:
+    """
+    Recomputes the weeks of each batch that hold a day of its stale (from_date, to_date) ranges:
+    the weeks of the stored facts covering those days and the weeks of the days' current rows.
+    A (None, None) range refreshes every week of the batch.
+    Returns the number of fact rows written. Does not commit.
+    """
+    whole_batches = sorted(batch_id for batch_id, ranges in stale.items() if (None, None) in ranges)
+    written = 0
+    if whole_batches:
+        db.query(BatchWeekFact).filter(BatchWeekFact.batch_id.in_(whole_batches)).delete(synchronize_session=False)
+        written += _insert_week_facts(db, DailyBatch.batch_id.in_(whole_batches))
+
+    ranges = [
+        (batch_id, start, end)
+        for batch_id, batch_ranges in sorted(stale.items()) if (None, None) not in batch_ranges
+        for start, end in _merge_ranges(batch_ranges)
+    ]
+    if not ranges:
+        return written
+    stale_weeks_sq = union(
+        select(BatchWeekFact.batch_id, BatchWeekFact.age_week).where(or_(*(
+            and_(BatchWeekFact.batch_id == batch_id, _range_filter(BatchWeekFact.first_date, BatchWeekFact.last_date, start, end))
+            for batch_id, start, end in ranges
+        ))),
+        select(DailyBatch.batch_id, _age_week).where(_in_week_cycle, or_(*(
+            and_(DailyBatch.batch_id == batch_id, _range_filter(DailyBatch.batch_date, DailyBatch.batch_date, start, end))
+            for batch_id, start, end in ranges
+        ))),
+    ).subquery("stale_weeks")
+    stale_weeks = db.execute(select(stale_weeks_sq)).all()
+    if not stale_weeks:
+        return written
+    stale_weeks = [tuple(row) for row in stale_weeks]
+    db.query(BatchWeekFact).filter(
+        tuple_(BatchWeekFact.batch_id, BatchWeekFact.age_week).in_(stale_weeks)
+    ).delete(synchronize_session=False)
+    written += _insert_week_facts(db, tuple_(DailyBatch.batch_id, _age_week).in_(stale_weeks))
+    return written
+
+
+def rebuild_batch_week_facts(db: Session, tenant_id: Optional[str] = None) -> int:
+    """
+    Recomputes the facts of one tenant, or all tenants, from daily_batch.
+    Returns the number of fact rows written. Does not commit.
+    """
+    delete_query = db.query(BatchWeekFact)
+    batch_filter = DailyBatch.tenant_id.isnot(None)
+    if tenant_id is not None:
+        delete_query = delete_query.filter(BatchWeekFact.tenant_id == tenant_id)
+        batch_filter = DailyBatch.tenant_id == tenant_id
+    deleted = delete_query.delete(synchronize_session=False)
+
+    written = _insert_week_facts(db, batch_filter)
+    logger.info(f"Rebuilt batch week facts for tenant '{tenant_id or 'all'}': {deleted} rows removed, {written} rows written.")
+    return written
+
+
+def get_batch_week_facts(db: Session, batch_id: int, tenant_id: str, from_week: int, to_week: int) -> List[BatchWeekFact]:
+    """Facts of a batch for age weeks from_week..to_week, ordered by week."""
+    return db.query(BatchWeekFact).filter(
+        BatchWeekFact.batch_id == batch_id,
+        BatchWeekFact.tenant_id == tenant_id,
+        BatchWeekFact.age_week.between(from_week, to_week)
+    ).order_by(BatchWeekFact.age_week).all()
@@ -10,6 +10,7 @@ from typing import Optional
 from models.inventory_item_audit import InventoryItemAudit
 from models.batch import Batch
 from models.composition_usage_item import CompositionUsageItem
+from crud.daily_feed_rollup import add_usage_to_rollup, remove_usage_from_rollup
 import logging
 
 logger = logging.getLogger(__name__)
@@ -92,7 +93,8 @@ def use_composition(db: Session, composition_id: int, batch_id: int, times: Deci
                 item_name=item.name,
                 item_category=item.category,
                 weight=iic.weight,
-                wastage_percentage=applied_wastage
+                wastage_percentage=applied_wastage,
+                unit_cost=item.average_cost
             )
             usage.items.append(usage_item)
 
@@ -146,6 +148,7 @@ def use_composition(db: Session, composition_id: int, batch_id: int, times: Deci
             db.add(audit)
     
     usage.feed_variance_weight = standard_feed_weight * (times - Decimal('1.0'))
+    add_usage_to_rollup(db, usage.id)
     db.commit()
     db.refresh(usage)
 
@@ -179,11 +182,13 @@ def create_composition_usage_history(db: Session, composition_id: int, times: De
                 inventory_item_id=iic.inventory_item_id,
                 item_name=item.name,
                 item_category=item.category,
-                weight=iic.weight
+                weight=iic.weight,
+                unit_cost=item.average_cost
             )
             db.add(usage_item)
 
     usage.feed_variance_weight = standard_feed_weight * (times - Decimal('1.0'))
+    add_usage_to_rollup(db, usage.id)
     db.commit()
     db.refresh(usage)
     return usage
@@ -269,6 +274,7 @@ def revert_composition_usage(db: Session, usage_id: int, tenant_id: str, changed
             )
             db.add(audit)
 
+    remove_usage_from_rollup(db, usage_to_revert.id)
     db.delete(usage_to_revert)
     db.commit()
     return True, "Composition usage reverted successfully."
@@ -286,28 +292,25 @@ def get_composition_usage_by_date(db: Session, usage_date: date, tenant_id: str,
     if batch_id:
         query = query.filter(CompositionUsageHistory.batch_id == batch_id)
 
-    usage_history = query.all()
-
-    total_feed = Decimal('0')
-    feed_breakdown = {}
-
-    for usage in usage_history:
-        feed_quantity = Decimal('0')
-        for usage_item in usage.items:
-            if usage_item.item_category == 'Feed':
-                feed_quantity += Decimal(str(usage_item.weight)) * Decimal(str(usage.times))
-        
-        total_feed += feed_quantity
-        composition_name = usage.composition_name
-        if composition_name in feed_breakdown:
-            feed_breakdown[composition_name] += feed_quantity
-        else:
-            feed_breakdown[composition_name] = feed_quantity
+    # Feed weight of every composition used that day, summed per composition in the database
+    feed_weight = func.sum(CompositionUsageItem.weight * CompositionUsageHistory.times).filter(
+        CompositionUsageItem.item_category == 'Feed'
+    )
+    breakdown = query.outerjoin(
+        CompositionUsageItem, CompositionUsageHistory.id == CompositionUsageItem.usage_history_id
+    ).with_entities(
+        CompositionUsageHistory.composition_name,
+        func.coalesce(feed_weight, 0).label("amount")
+    ).group_by(
+        CompositionUsageHistory.composition_name
+    ).order_by(
+        CompositionUsageHistory.composition_name
+    ).all()
 
-    feed_breakdown_list = [{"feed_type": f, "amount": a} for f, a in feed_breakdown.items()]
+    feed_breakdown_list = [{"feed_type": name, "amount": amount} for name, amount in breakdown]
 
     return {
-        "total_feed": total_feed,
+        "total_feed": sum((amount for _, amount in breakdown), Decimal('0')),
         "feed_breakdown": feed_breakdown_list
     }
 
@@ -319,26 +322,16 @@ def get_composition_usage_by_date_range(db: Session, start_date: date, end_date:
     start_datetime = datetime.combine(start_date, datetime.min.time())
     end_datetime = datetime.combine(end_date, datetime.max.time())
 
-    # Subquery to get the total weight of each composition usage
-    subquery = db.query(
-        CompositionUsageHistory.id.label("usage_id"),
-        (func.sum(CompositionUsageItem.weight) * CompositionUsageHistory.times).label("total_weight")
+    # Every usage weighs times x its items' weights; sum them per composition in one grouped query
+    results = db.query(
+        CompositionUsageHistory.composition_name,
+        func.sum(CompositionUsageItem.weight * CompositionUsageHistory.times).label('total_usage')
     ).join(
         CompositionUsageItem, CompositionUsageHistory.id == CompositionUsageItem.usage_history_id
     ).filter(
         CompositionUsageHistory.tenant_id == tenant_id,
         CompositionUsageHistory.used_at >= start_datetime,
         CompositionUsageHistory.used_at <= end_datetime
-    ).group_by(
-        CompositionUsageHistory.id
-    ).subquery()
-
-    # Main query to sum up the total weights by composition name
-    results = db.query(
-        CompositionUsageHistory.composition_name,
-        func.sum(subquery.c.total_weight).label('total_usage')
-    ).join(
-        subquery, CompositionUsageHistory.id == subquery.c.usage_id
     ).group_by(
         CompositionUsageHistory.composition_name
     ).all()
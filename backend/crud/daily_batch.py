@@ -1,10 +1,27 @@
-from sqlalchemy import func
+import logging
+from collections import defaultdict
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from models.daily_batch import DailyBatch
+from models.daily_batch import DailyBatch, get_standard_feed_in_grams, get_standard_hen_day_percentage
+from models.batch_shed_assignment import BatchShedAssignment
+from models.batch_week_fact import mark_batch_week_facts_stale
+from models.daily_feed_rollup import DailyFeedRollup
+from models.monthly_production_rollup import mark_monthly_rollup_stale
+from models.egg_stock_checkpoint import mark_egg_stock_stale
+from schemas.audit_log import AuditLogCreate
 from schemas.daily_batch import DailyBatchCreate
-from datetime import date
-from typing import Optional
+from crud.audit_log import create_audit_logs
+from crud.monthly_production_rollup import get_monthly_production_totals
+from utils import sqlalchemy_to_dict
+from utils.age_utils import calculate_age_progression, age_progression_expression
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
 from models.daily_batch import DailyBatch as DailyBatchORM
+import pytz
+
+logger = logging.getLogger(__name__)
 
 def get_batch(db: Session, batch_id: int, date: date, tenant_id: str):
     return db.query(DailyBatch).filter(DailyBatch.batch_id == batch_id, func.date(DailyBatch.batch_date) == date, DailyBatch.tenant_id == tenant_id).first()
@@ -48,90 +65,337 @@ def create_daily_batch(db: Session, daily_batch_data: DailyBatchCreate, tenant_i
     db.refresh(db_daily_batch)
     return db_daily_batch
 
-def get_monthly_egg_production(db: Session, start_date: date, end_date: date, tenant_id: str):
+
+# Columns written for every row of a bulk daily_batch upsert.
+UPSERT_ROW_COLUMNS = (
+    "batch_id", "tenant_id", "shed_id", "batch_no", "upload_date", "batch_date",
+    "mortality", "culls", "birds_added", "table_eggs", "jumbo", "cr",
+)
+
+# Columns rewritten when an uploaded row collides with an existing daily_batch row.
+UPSERT_UPDATE_COLUMNS = (
+    "shed_id", "batch_no", "upload_date", "age", "opening_count", "mortality",
+    "culls", "birds_added", "table_eggs", "jumbo", "cr", "updated_by",
+)
+
+# Rows per upsert statement when ingesting an upload, so long sheets stay within the bind parameter limit
+UPLOAD_UPSERT_CHUNK_ROWS = 1000
+
+
+def get_shed_assignments(db: Session, batch_ids: List[int]) -> Dict[int, List[BatchShedAssignment]]:
     """
-    Calculates the total egg production for each month within a given date range.
+    Loads every shed assignment for the given batches in one query,
+    grouped by batch_id and ordered by start_date.
     """
-    results = db.query(
-        func.to_char(DailyBatch.batch_date, 'YYYY-MM').label('month'),
-        func.sum(DailyBatch.total_eggs).label('total_eggs')
-    ).filter(
-        DailyBatch.batch_date >= start_date,
-        DailyBatch.batch_date <= end_date,
+    assignments = defaultdict(list)
+    if not batch_ids:
+        return assignments
+    rows = db.query(BatchShedAssignment).filter(
+        BatchShedAssignment.batch_id.in_(batch_ids)
+    ).order_by(BatchShedAssignment.batch_id, BatchShedAssignment.start_date).all()
+    for assignment in rows:
+        assignments[assignment.batch_id].append(assignment)
+    return assignments
+
+
+def resolve_shed_id(assignments: List[BatchShedAssignment], on_date: date) -> Optional[int]:
+    """Returns the shed a batch was housed in on a given date from preloaded assignments."""
+    for assignment in assignments:
+        if assignment.start_date <= on_date and (assignment.end_date is None or assignment.end_date >= on_date):
+            return assignment.shed_id
+    return None
+
+
+def daily_batch_audit_values(values: dict) -> dict:
+    """JSON-friendly snapshot of a daily_batch row dict, matching sqlalchemy_to_dict output."""
+    result = {}
+    for key, value in values.items():
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        result[key] = value
+    return result
+
+
+def upsert_daily_batches(db: Session, rows: List[dict], changed_by: Optional[str] = None):
+    """
+    Writes many daily_batch rows with a single INSERT ... ON CONFLICT DO UPDATE.
+    Each row dict must carry the primary key (batch_id, tenant_id, batch_date).
+    Does not commit; the caller owns the transaction.
+    """
+    if not rows:
+        return
+    now = datetime.now(pytz.timezone('Asia/Kolkata'))
+    values = [{**row, "created_by": changed_by, "updated_by": changed_by} for row in rows]
+    stmt = pg_insert(DailyBatch).values(values)
+    update_columns = {col: getattr(stmt.excluded, col) for col in UPSERT_UPDATE_COLUMNS}
+    update_columns["updated_at"] = now
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyBatch.batch_id, DailyBatch.tenant_id, DailyBatch.batch_date],
+        set_=update_columns,
+    )
+    db.execute(stmt)
+    for row in rows:
+        mark_batch_week_facts_stale(db, [row["batch_id"]], row["batch_date"], row["batch_date"])
+        mark_monthly_rollup_stale(db, row["tenant_id"], row["batch_date"])
+        mark_egg_stock_stale(db, row["tenant_id"], row["batch_date"])
+
+
+def get_latest_rows_before(db: Session, batch_ids: List[int], before_date: date, tenant_id: str) -> Dict[int, DailyBatch]:
+    """Latest daily_batch row strictly before before_date for each batch, in one DISTINCT ON query."""
+    if not batch_ids:
+        return {}
+    rows = db.query(DailyBatch).filter(
+        DailyBatch.batch_id.in_(batch_ids),
+        DailyBatch.batch_date < before_date,
         DailyBatch.tenant_id == tenant_id
-    ).group_by(
-        func.to_char(DailyBatch.batch_date, 'YYYY-MM')
-    ).order_by(
-        func.to_char(DailyBatch.batch_date, 'YYYY-MM')
-    ).all()
+    ).distinct(DailyBatch.batch_id).order_by(DailyBatch.batch_id, DailyBatch.batch_date.desc()).all()
+    return {row.batch_id: row for row in rows}
 
-    # The result from the query is a list of Row objects.
-    # We convert it to a list of dictionaries.
-    return [{"month": month, "total_eggs": total_eggs} for month, total_eggs in results]
 
+def insert_missing_daily_batches(db: Session, rows: List[dict]) -> List[int]:
+    """
+    Inserts generated daily_batch rows with a single INSERT ... ON CONFLICT DO NOTHING,
+    so rows created meanwhile by a concurrent request are left alone.
+    Returns the batch_ids that were actually inserted. Does not commit.
+    """
+    if not rows:
+        return []
+    stmt = pg_insert(DailyBatch).values(rows).on_conflict_do_nothing(
+        index_elements=[DailyBatch.batch_id, DailyBatch.tenant_id, DailyBatch.batch_date]
+    ).returning(DailyBatch.batch_id, DailyBatch.tenant_id, DailyBatch.batch_date)
+    # Only the rows actually inserted make the derived tables stale
+    inserted = db.execute(stmt).all()
+    for row in inserted:
+        mark_batch_week_facts_stale(db, [row.batch_id], row.batch_date, row.batch_date)
+        mark_monthly_rollup_stale(db, row.tenant_id, row.batch_date)
+        mark_egg_stock_stale(db, row.tenant_id, row.batch_date)
+    return [row.batch_id for row in inserted]
 
-def get_monthly_egg_production_cost(db: Session, start_date: date, end_date: date, tenant_id: str):
+
+def preload_feed_in_grams(db: Session, daily_batches: List[DailyBatch]) -> List[DailyBatch]:
     """
-    Calculates the cost per egg for each month within a given date range.
-    This includes both feed costs and operational expenses.
+    Loads DailyBatch.feed_in_grams for a whole result set from daily_feed_rollup with one query
+    and attaches the values to the rows, so feed_in_grams / feed_in_kg no longer query per row.
+    Returns the rows for convenience.
     """
-    from models import CompositionUsageHistory, OperationalExpense, CompositionUsageItem, InventoryItem
-    from decimal import Decimal
+    if not daily_batches:
+        return daily_batches
+
+    batch_ids = {row.batch_id for row in daily_batches}
+    first_date = min(row.batch_date for row in daily_batches)
+    last_date = max(row.batch_date for row in daily_batches)
 
-    # Get monthly egg production
-    monthly_eggs_query = db.query(
-        func.to_char(DailyBatch.batch_date, 'YYYY-MM').label('month'),
-        func.sum(DailyBatch.total_eggs).label('total_eggs')
+    feed_rows = db.query(
+        DailyFeedRollup.batch_id,
+        DailyFeedRollup.feed_date,
+        DailyFeedRollup.net_feed_kg
     ).filter(
-        DailyBatch.batch_date >= start_date,
-        DailyBatch.batch_date <= end_date,
+        DailyFeedRollup.batch_id.in_(batch_ids),
+        DailyFeedRollup.feed_date.between(first_date, last_date)
+    ).all()
+
+    feed_kg_by_day = {(row.batch_id, row.feed_date): row.net_feed_kg for row in feed_rows}
+    for row in daily_batches:
+        feed_kg = feed_kg_by_day.get((row.batch_id, row.batch_date)) or Decimal(0)
+        row._preloaded_feed_in_grams = float(feed_kg * 1000)
+    return daily_batches
+
+
+def preload_standards(db: Session, daily_batches: List[DailyBatch]) -> List[DailyBatch]:
+    """
+    Resolves standard_hen_day_percentage and standard_feed_in_grams through db and attaches them
+    to the rows, so rows that are not in a session (such as unsaved virtual rows) have them too.
+    The standards come from the per-tenant cache, so this queries at most once per tenant.
+    Returns the rows for convenience.
+    """
+    for row in daily_batches:
+        row._preloaded_standard_hen_day_percentage = get_standard_hen_day_percentage(db, row.tenant_id, row.age)
+        row._preloaded_standard_feed_in_grams = get_standard_feed_in_grams(db, row.tenant_id, row.age)
+    return daily_batches
+
+
+def propagate_subsequent_rows(db: Session, batch_id: int, tenant_id: str, from_date: date) -> int:
+    """
+    Re-chains opening_count and age for every row of a batch after from_date,
+    starting from the row stored on from_date, with a single UPDATE:
+    opening_count is the anchor's closing_count plus the running sum of
+    birds_added - mortality - culls over the rows in between, and age progresses
+    from the anchor's age by the day offset. Pending changes are flushed first;
+    does not commit. Returns the number of rows whose values changed.
+    """
+    db.flush()
+    anchor = db.query(DailyBatch.age, DailyBatch.closing_count).filter(
+        DailyBatch.batch_id == batch_id,
+        DailyBatch.batch_date == from_date,
         DailyBatch.tenant_id == tenant_id
-    ).group_by(
-        func.to_char(DailyBatch.batch_date, 'YYYY-MM')
-    ).subquery()
+    ).first()
+    if not anchor:
+        return 0
 
-    # Get monthly composition usage costs - simplified approach
-    monthly_costs_query = db.query(
-        func.to_char(CompositionUsageHistory.used_at, 'YYYY-MM').label('month'),
-        func.sum(CompositionUsageItem.weight * InventoryItem.average_cost * CompositionUsageHistory.times).label('composition_cost')
-    ).join(
-        CompositionUsageItem, CompositionUsageHistory.id == CompositionUsageItem.usage_history_id
-    ).join(
-        InventoryItem, CompositionUsageItem.inventory_item_id == InventoryItem.id
-    ).filter(
-        CompositionUsageHistory.used_at.between(start_date, end_date),
-        CompositionUsageHistory.tenant_id == tenant_id
-    ).group_by(
-        func.to_char(CompositionUsageHistory.used_at, 'YYYY-MM')
+    net_change = (
+        func.coalesce(DailyBatch.birds_added, 0)
+        - func.coalesce(DailyBatch.mortality, 0)
+        - func.coalesce(DailyBatch.culls, 0)
+    )
+    running = select(
+        DailyBatch.batch_date,
+        func.sum(net_change).over(order_by=DailyBatch.batch_date, rows=(None, -1)).label("net_before")
+    ).where(
+        DailyBatch.batch_id == batch_id,
+        DailyBatch.batch_date > from_date,
+        DailyBatch.tenant_id == tenant_id
     ).subquery()
 
-    # Get monthly operational expenses
-    monthly_expenses_query = db.query(
-        func.to_char(OperationalExpense.expense_date, 'YYYY-MM').label('month'),
-        func.sum(OperationalExpense.amount).label('operational_expense')
-    ).filter(
-        func.date(OperationalExpense.expense_date).between(start_date, end_date),
-        OperationalExpense.tenant_id == tenant_id
-    ).group_by(
-        func.to_char(OperationalExpense.expense_date, 'YYYY-MM')
-    ).subquery()
+    new_opening = anchor.closing_count + func.coalesce(running.c.net_before, 0)
+    new_age = age_progression_expression(
+        anchor.age if anchor.age is not None else Decimal('0'), DailyBatch.batch_date - from_date
+    )
+    stmt = update(DailyBatch).where(
+        DailyBatch.batch_id == batch_id,
+        DailyBatch.tenant_id == tenant_id,
+        DailyBatch.batch_date == running.c.batch_date,
+        or_(
+            DailyBatch.opening_count.is_distinct_from(new_opening),
+            DailyBatch.age.is_distinct_from(new_age)
+        )
+    ).values(
+        opening_count=new_opening,
+        age=new_age
+    ).execution_options(synchronize_session="fetch")
+    changed = db.execute(stmt).rowcount
+    if changed:
+        mark_batch_week_facts_stale(db, [batch_id], from_date)
+    return changed
 
-    # Join all the data
-    results = db.query(
-        monthly_eggs_query.c.month,
-        monthly_eggs_query.c.total_eggs,
-        func.coalesce(monthly_costs_query.c.composition_cost, 0).label('composition_cost'),
-        func.coalesce(monthly_expenses_query.c.operational_expense, 0).label('operational_expense')
-    ).outerjoin(
-        monthly_costs_query, monthly_eggs_query.c.month == monthly_costs_query.c.month
-    ).outerjoin(
-        monthly_expenses_query, monthly_eggs_query.c.month == monthly_expenses_query.c.month
-    ).all()
+
+def ingest_uploaded_rows(db: Session, batch_obj, uploaded_rows: Dict[date, dict], tenant_id: str, changed_by: str,
+                         shed_assignments: List[BatchShedAssignment], refresh_metadata: bool = False,
+                         on_rows_written: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Writes the uploaded days of one batch and re-chains the rest of the batch after them.
+
+    uploaded_rows maps batch_date to the sheet values (mortality, culls, eggs, optionally
+    birds_added and age). When no age is supplied it progresses from the previous row.
+    With refresh_metadata, existing rows also get shed_id, batch_no and upload_date rewritten.
+    The rows are upserted UPLOAD_UPSERT_CHUNK_ROWS at a time, and on_rows_written(count) is called
+    with the number of uploaded rows in each chunk once it is written. Issues a fixed number of
+    queries per chunk regardless of how many days are uploaded and does not commit.
+    Returns the number of uploaded rows written.
+    """
+    if not uploaded_rows:
+        return 0
+
+    batch_id = batch_obj.id
+    first_date = min(uploaded_rows)
+    last_date = max(uploaded_rows)
+    today = date.today()
+
+    prev_daily = db.query(DailyBatch).filter(
+        DailyBatch.batch_id == batch_id,
+        DailyBatch.batch_date < first_date,
+        DailyBatch.tenant_id == tenant_id
+    ).order_by(DailyBatch.batch_date.desc()).first()
+    existing_rows = {
+        r.batch_date: r for r in db.query(DailyBatch).filter(
+            DailyBatch.batch_id == batch_id,
+            DailyBatch.batch_date >= first_date,
+            DailyBatch.batch_date <= last_date,
+            DailyBatch.tenant_id == tenant_id
+        ).all()
+    }
+
+    if prev_daily:
+        prev_closing = prev_daily.closing_count
+        prev_age = prev_daily.age if prev_daily.age is not None else Decimal('0')
+        prev_date = prev_daily.batch_date
+    else:
+        # No earlier row: the chain starts from the batch itself
+        prev_closing = batch_obj.opening_count
+        prev_age = batch_obj.age if batch_obj.age is not None else Decimal('0')
+        prev_date = batch_obj.date
+
+    # Walk the window once in date order. Uploaded days take the sheet values; existing
+    # days the sheet skipped keep theirs and only get their opening_count and age re-chained.
+    rows_to_upsert = []
+    audit_entries = []
+    for batch_date in sorted(set(uploaded_rows) | set(existing_rows)):
+        existing = existing_rows.get(batch_date)
+        uploaded = uploaded_rows.get(batch_date)
+
+        if existing:
+            row_values = {col: getattr(existing, col) for col in UPSERT_ROW_COLUMNS}
+        else:
+            row_values = {
+                "batch_id": batch_id, "tenant_id": tenant_id, "batch_no": batch_obj.batch_no,
+                "shed_id": None, "upload_date": today, "batch_date": batch_date, "birds_added": 0,
+            }
+        if uploaded and (refresh_metadata or not existing):
+            row_values["shed_id"] = resolve_shed_id(shed_assignments, batch_date)
+            row_values["batch_no"] = batch_obj.batch_no
+            row_values["upload_date"] = today
+            if row_values["shed_id"] is None:
+                logger.warning(f"Could not find shed assignment for batch {batch_id} on date {batch_date} during Excel upload. Shed ID will be null.")
+
+        row_values["opening_count"] = prev_closing
+        row_values["age"] = calculate_age_progression(prev_age, (batch_date - prev_date).days)
+        if uploaded:
+            row_values.update(uploaded)
+            # Run the uploaded values through the schema validators before they are written
+            DailyBatchCreate(**row_values)
+
+        rows_to_upsert.append(row_values)
+        prev_closing = row_values["opening_count"] + (row_values["birds_added"] or 0) - ((row_values["mortality"] or 0) + (row_values["culls"] or 0))
+        prev_age = row_values["age"]
+        prev_date = batch_date
+
+        if uploaded:
+            old_values = sqlalchemy_to_dict(existing) if existing else {}
+            audit_entries.append(AuditLogCreate(
+                table_name='daily_batch',
+                record_id=f"{batch_id}_{batch_date}",
+                changed_by=changed_by,
+                action='UPDATE' if existing else 'CREATE',
+                old_values=old_values,
+                new_values={**old_values, **daily_batch_audit_values(row_values)}
+            ))
+
+    for start in range(0, len(rows_to_upsert), UPLOAD_UPSERT_CHUNK_ROWS):
+        chunk = rows_to_upsert[start:start + UPLOAD_UPSERT_CHUNK_ROWS]
+        upsert_daily_batches(db, chunk, changed_by=changed_by)
+        if on_rows_written:
+            on_rows_written(sum(1 for row in chunk if row["batch_date"] in uploaded_rows))
+    propagate_subsequent_rows(db, batch_id, tenant_id, last_date)
+    create_audit_logs(db, audit_entries)
+    return len(uploaded_rows)
+
+def get_monthly_egg_production(db: Session, start_date: date, end_date: date, tenant_id: str):
+    """
+    Calculates the total egg production for each month within a given date range.
+    """
+    results = get_monthly_production_totals(db, start_date, end_date, tenant_id)
+
+    return [
+        {"month": row.month.strftime('%Y-%m'), "total_eggs": row.total_eggs}
+        for row in results if row.daily_rows
+    ]
+
+
+def get_monthly_egg_production_cost(db: Session, start_date: date, end_date: date, tenant_id: str):
+    """
+    Calculates the cost per egg for each month within a given date range.
+    This includes both feed costs and operational expenses.
+    """
+    results = get_monthly_production_totals(db, start_date, end_date, tenant_id)
 
     # Calculate cost per egg for each month
     monthly_costs = []
-    for month, total_eggs, composition_cost, operational_expense in results:
-        total_cost = Decimal(str(composition_cost or 0)) + Decimal(str(operational_expense or 0))
+    for row in results:
+        if not row.daily_rows:
+            continue
+        total_eggs = row.total_eggs
+        total_cost = Decimal(str(row.composition_cost or 0)) + Decimal(str(row.operational_expense or 0))
         cost_per_egg = total_cost / total_eggs if total_eggs > 0 else Decimal(0)
 
         # Format to 2 decimal places
@@ -139,7 +403,7 @@ def get_monthly_egg_production_cost(db: Session, start_date: date, end_date: dat
         cost_per_egg_formatted = f"{cost_per_egg:.2f}"
 
         monthly_costs.append({
-            "month": month,
+            "month": row.month.strftime('%Y-%m'),
             "total_eggs": total_eggs or 0,
             "total_cost": total_cost_formatted,
             "cost_per_egg": cost_per_egg_formatted
@@ -153,51 +417,21 @@ def get_feed_consumption_per_egg(db: Session, start_date: date, end_date: date,
     Calculates the feed consumption (in grams) required to produce one egg
     for each month within a given date range.
     """
-    # Get monthly egg production
-    monthly_eggs_query = db.query(
-        func.to_char(DailyBatch.batch_date, 'YYYY-MM').label('month'),
-        func.sum(DailyBatch.total_eggs).label('total_eggs')
-    ).filter(
-        DailyBatch.batch_date >= start_date,
-        DailyBatch.batch_date <= end_date,
-        DailyBatch.tenant_id == tenant_id
-    ).group_by(
-        func.to_char(DailyBatch.batch_date, 'YYYY-MM')
-    ).subquery()
-    
-    # Get monthly feed consumption
-    monthly_feed_query = db.query(
-        func.to_char(DailyBatch.batch_date, 'YYYY-MM').label('month'),
-        func.sum(DailyBatch.feed_in_grams).label('total_feed_grams')
-    ).filter(
-        DailyBatch.batch_date >= start_date,
-        DailyBatch.batch_date <= end_date,
-        DailyBatch.tenant_id == tenant_id
-    ).group_by(
-        func.to_char(DailyBatch.batch_date, 'YYYY-MM')
-    ).subquery()
-    
-    # Join the data
-    results = db.query(
-        monthly_eggs_query.c.month,
-        monthly_eggs_query.c.total_eggs,
-        func.coalesce(monthly_feed_query.c.total_feed_grams, 0).label('total_feed_grams')
-    ).select_from(monthly_eggs_query).outerjoin(
-        monthly_feed_query,
-        monthly_eggs_query.c.month == monthly_feed_query.c.month
-    ).all()
+    results = get_monthly_production_totals(db, start_date, end_date, tenant_id)
     
     # Calculate feed consumption per egg for each month
     monthly_feed_consumption = []
-    for month, total_eggs, total_feed_grams in results:
+    for row in results:
+        if not row.daily_rows:
+            continue
         # Extract and sanitize values once
-        t_eggs = total_eggs or 0
-        t_feed_grams = float(total_feed_grams or 0)
+        t_eggs = row.total_eggs or 0
+        t_feed_grams = float(row.feed_grams or 0)
         
         feed_per_egg_grams = t_feed_grams / t_eggs if t_eggs > 0 else 0.0
         
         monthly_feed_consumption.append({
-            "month": month,
+            "month": row.month.strftime('%Y-%m'),
             "total_eggs": t_eggs,
             "total_feed_grams": round(t_feed_grams, 3),
             "total_feed_kg": round(t_feed_grams / 1000, 3),
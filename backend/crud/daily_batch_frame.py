@@ -0,0 +1,175 @@
+"""
+Columnar reads of daily_batch for the reports.
+
+load_daily_batch_frame selects only the raw columns the reports need, joined to the batch, the
+tenant's resolved standard curve and the daily feed rollup, in one query, and returns them as a
+pandas DataFrame. The DailyBatch hybrid values (closing_count, total_eggs, hd, batch_type, feed
+and standard feed) are computed as vectorized columns, so reports over long date ranges never
+build DailyBatch objects or run per-row standard and feed lookups.
+"""
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, and_, cast, select
+from sqlalchemy.orm import Session
+
+from models.batch import Batch
+from models.daily_batch import DailyBatch
+from models.daily_feed_rollup import DailyFeedRollup
+from models.effective_standard_curve import EffectiveStandardCurve, standard_curve_onclause
+
+# Per-row columns of the weekly layer report and single batch snapshot, in response order
+DETAIL_COLUMNS = [
+    "batch_id", "batch_no", "batch_date", "shed_id", "age", "opening_count", "mortality", "culls",
+    "closing_count", "table_eggs", "jumbo", "cr", "total_eggs", "batch_type", "hd",
+    "standard_hen_day_percentage", "actual_feed_consumed", "standard_feed_consumption", "is_active", "birds_added",
+]
+
+_FRAME_DTYPES = {
+    "batch_id": "Int64",
+    "shed_id": "Int64",
+    "age": "float64",
+    "opening_count": "Int64",
+    "mortality": "Int64",
+    "culls": "Int64",
+    "table_eggs": "Int64",
+    "jumbo": "Int64",
+    "cr": "Int64",
+    "birds_added": "Int64",
+    "is_active": "boolean",
+    "standard_hen_day_percentage": "float64",
+    "standard_feed_in_grams": "float64",
+    "feed_in_grams": "float64",
+}
+
+
+def load_daily_batch_frame(
+    db: Session,
+    tenant_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    batch_id: Optional[int] = None,
+    min_age: Optional[float] = None,
+    max_age: Optional[float] = None,
+    order_by: Optional[list] = None,
+) -> pd.DataFrame:
+    """
+    Daily rows of a tenant as a DataFrame, one row per batch and day, ordered by batch and date
+    unless order_by is given. Integer columns use pandas' nullable dtypes, so missing values
+    stay missing instead of turning the columns into floats.
+    """
+    stmt = (
+        select(
+            DailyBatch.batch_id,
+            DailyBatch.batch_no,
+            DailyBatch.batch_date,
+            DailyBatch.shed_id,
+            cast(DailyBatch.age, Float).label("age"),
+            DailyBatch.opening_count,
+            DailyBatch.mortality,
+            DailyBatch.culls,
+            DailyBatch.table_eggs,
+            DailyBatch.jumbo,
+            DailyBatch.cr,
+            DailyBatch.birds_added,
+            Batch.is_active,
+            cast(EffectiveStandardCurve.lay_percent, Float).label("standard_hen_day_percentage"),
+            EffectiveStandardCurve.feed_intake_per_day_g.label("standard_feed_in_grams"),
+            cast(DailyFeedRollup.net_feed_kg * 1000, Float).label("feed_in_grams"),
+        )
+        .join(Batch, DailyBatch.batch_id == Batch.id)
+        .outerjoin(EffectiveStandardCurve, standard_curve_onclause(DailyBatch))
+        .outerjoin(
+            DailyFeedRollup,
+            and_(DailyFeedRollup.batch_id == DailyBatch.batch_id, DailyFeedRollup.feed_date == DailyBatch.batch_date)
+        )
+        .where(DailyBatch.tenant_id == tenant_id)
+        .order_by(*(order_by or [DailyBatch.batch_id, DailyBatch.batch_date]))
+    )
+    if start_date is not None:
+        stmt = stmt.where(DailyBatch.batch_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(DailyBatch.batch_date <= end_date)
+    if batch_id is not None:
+        stmt = stmt.where(DailyBatch.batch_id == batch_id)
+    if min_age is not None:
+        stmt = stmt.where(DailyBatch.age >= min_age)
+    if max_age is not None:
+        stmt = stmt.where(DailyBatch.age <= max_age)
+
+    result = db.execute(stmt)
+    frame = pd.DataFrame.from_records(result.all(), columns=list(result.keys()))
+    return _add_derived_columns(frame.astype(_FRAME_DTYPES))
+
+
+def _add_derived_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized forms of the DailyBatch hybrid properties."""
+    def filled(column):
+        return frame[column].fillna(0)
+
+    frame["closing_count"] = filled("opening_count") + filled("birds_added") - (filled("mortality") + filled("culls"))
+    frame["total_eggs"] = filled("table_eggs") + filled("jumbo") + filled("cr")
+
+    closing_count = frame["closing_count"].to_numpy(dtype=float)
+    total_eggs = frame["total_eggs"].to_numpy(dtype=float)
+    positive = closing_count > 0
+    frame["hd"] = np.divide(total_eggs, closing_count, out=np.zeros(len(frame)), where=positive)
+
+    age = frame["age"].to_numpy(dtype=float, na_value=np.nan)
+    frame["batch_type"] = np.select([age < 8, age <= 17, age > 17], ["Chick", "Grower", "Layer"], default=None)
+
+    frame["actual_feed_consumed"] = frame["feed_in_grams"].fillna(0) / 1000
+    standard_feed_in_kg = frame["standard_feed_in_grams"] / 1000
+    frame["standard_feed_in_kg"] = standard_feed_in_kg
+    frame["standard_feed_consumption"] = standard_feed_in_kg * frame["opening_count"]
+    return frame
+
+
+def daily_frame_records(frame: pd.DataFrame) -> List[dict]:
+    """Detail rows of the reports, with dates as dd-mm-YYYY and missing values as None."""
+    details = frame[DETAIL_COLUMNS].copy()
+    details["batch_date"] = pd.to_datetime(details["batch_date"]).dt.strftime("%d-%m-%Y")
+    return details.astype(object).where(details.notna(), None).to_dict("records")
+
+
+def summarize_daily_frame(frame: pd.DataFrame) -> Optional[dict]:
+    """
+    Totals of a frame ordered by batch and date: openings of each batch's first day and closings
+    of its last day, sums of the daily counts and feed, and HD averages over layer days (age above 17).
+    """
+    if frame.empty:
+        return None
+
+    first_days = frame.drop_duplicates("batch_id", keep="first")
+    last_days = frame.drop_duplicates("batch_id", keep="last")
+
+    def total(column):
+        return int(frame[column].sum())
+
+    layer_days = frame[(frame["age"] > 17).fillna(False)]
+    avg_hd = float(layer_days["hd"].mean()) if not layer_days.empty else 0
+    avg_standard_hd = layer_days["standard_hen_day_percentage"].mean()
+    avg_standard_hd = float(avg_standard_hd) if not layer_days.empty and pd.notna(avg_standard_hd) else 0
+
+    highest_age = frame["age"].max()
+    highest_age = float(highest_age) if pd.notna(highest_age) and highest_age > 0 else 0.0
+
+    table_eggs, jumbo, cr = total("table_eggs"), total("jumbo"), total("cr")
+    return {
+        "opening_count": int(first_days["opening_count"].sum()),
+        "mortality": total("mortality"),
+        "culls": total("culls"),
+        "closing_count": int(last_days["closing_count"].sum()),
+        "table_eggs": table_eggs,
+        "jumbo": jumbo,
+        "cr": cr,
+        "total_eggs": table_eggs + jumbo + cr,
+        "hd": round(avg_hd, 4),
+        "standard_hen_day_percentage": round(avg_standard_hd, 4),
+        "highest_age": round(highest_age, 1),
+        "birds_added": total("birds_added"),
+        "actual_feed_consumed": float(frame["actual_feed_consumed"].sum()),
+        "standard_feed_consumption": float(frame["standard_feed_consumption"].sum()),
+    }
@@ -0,0 +1,125 @@
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytz
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.daily_batch_upload_job import DailyBatchUploadJob
+
+logger = logging.getLogger(__name__)
+
+# Uploaded workbooks wait here until the background worker has processed them. Resolved once at
+# import, so a relative UPLOAD_JOBS_DIR cannot move with the working directory; defaults to backend/uploads.
+UPLOAD_JOBS_DIR = os.path.abspath(os.getenv(
+    "UPLOAD_JOBS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
+))
+# Job statuses after which the workbook is no longer needed
+TERMINAL_STATUSES = ("completed", "failed")
+# Queued or running jobs whose row has not been updated for this long are taken for dead. Progress
+# flushes touch updated_at at least every few hundred rows, so a live job stays well within it.
+UPLOAD_JOB_STALE_AFTER = timedelta(minutes=int(os.getenv("UPLOAD_JOB_STALE_MINUTES", "30")))
+# Keeps the errors column bounded for sheets with thousands of bad rows
+MAX_JOB_ERRORS = 200
+
+
+def create_upload_job(db: Session, file_obj, filename: Optional[str], kind: str, tenant_id: str, created_by: str, batch_id: Optional[int] = None) -> DailyBatchUploadJob:
+    """Copies the uploaded file to disk and records a queued job for it."""
+    os.makedirs(UPLOAD_JOBS_DIR, exist_ok=True)
+    file_path = os.path.join(UPLOAD_JOBS_DIR, f"{kind}_{tenant_id}_{uuid.uuid4().hex}.xlsx")
+    with open(file_path, "wb") as dest:
+        shutil.copyfileobj(file_obj, dest)
+
+    job = DailyBatchUploadJob(
+        tenant_id=tenant_id,
+        kind=kind,
+        batch_id=batch_id,
+        filename=filename,
+        file_path=file_path,
+        status="queued",
+        rows_parsed=0,
+        rows_written=0,
+        rows_skipped=0,
+        errors=[],
+        created_by=created_by,
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        os.remove(file_path)
+        raise
+    db.refresh(job)
+    return job
+
+
+def get_upload_job(db: Session, job_id: int, tenant_id: str) -> Optional[DailyBatchUploadJob]:
+    return db.query(DailyBatchUploadJob).filter(
+        DailyBatchUploadJob.id == job_id,
+        DailyBatchUploadJob.tenant_id == tenant_id
+    ).first()
+
+
+def update_upload_job(db: Session, job: DailyBatchUploadJob, **values) -> DailyBatchUploadJob:
+    """
+    Writes progress/status fields and commits straight away so pollers see them. updated_at is
+    touched on every call, so it doubles as the job's heartbeat for fail_interrupted_upload_jobs.
+    The workbook is removed once the job reaches a terminal status.
+    """
+    for key, value in values.items():
+        setattr(job, key, value)
+    job.updated_at = datetime.now(pytz.timezone('Asia/Kolkata'))
+    if "errors" in values:
+        job.errors = list(values["errors"])[:MAX_JOB_ERRORS]
+    if values.get("status") == "running" and job.started_at is None:
+        job.started_at = datetime.now(pytz.timezone('Asia/Kolkata'))
+    if values.get("status") in TERMINAL_STATUSES:
+        job.finished_at = datetime.now(pytz.timezone('Asia/Kolkata'))
+    db.commit()
+    if job.status in TERMINAL_STATUSES:
+        discard_upload_file(job)
+    return job
+
+
+def fail_interrupted_upload_jobs(db: Session, stale_after: timedelta = UPLOAD_JOB_STALE_AFTER) -> int:
+    """
+    Marks the jobs still queued or running without an update for stale_after as failed and removes
+    their workbooks. Meant for application startup: the background task of such a job died with the
+    process that ran it, so it would never finish. Jobs of other live workers or replicas keep
+    updating their rows and are left alone; rows another process is sweeping are skipped.
+    Returns the number of jobs marked failed.
+    """
+    message = "Upload was interrupted by a server restart. Please upload the file again."
+    now = datetime.now(pytz.timezone('Asia/Kolkata'))
+    cutoff = now - stale_after
+    jobs = db.query(DailyBatchUploadJob).filter(
+        DailyBatchUploadJob.status.in_(("queued", "running")),
+        func.coalesce(DailyBatchUploadJob.updated_at, DailyBatchUploadJob.created_at) < cutoff
+    ).with_for_update(skip_locked=True).all()
+    for job in jobs:
+        logger.warning(f"Upload job {job.id} for tenant '{job.tenant_id}' was left {job.status} since {job.updated_at or job.created_at}; marking it failed.")
+        job.status = "failed"
+        job.message = message
+        job.errors = [*(job.errors or []), message][:MAX_JOB_ERRORS]
+        job.finished_at = now
+        job.updated_at = now
+    # One commit, so the row locks are held until every swept job is failed
+    db.commit()
+    for job in jobs:
+        discard_upload_file(job)
+    return len(jobs)
+
+
+def discard_upload_file(job: DailyBatchUploadJob) -> None:
+    """Removes the persisted workbook once the job has finished with it."""
+    if job.file_path and os.path.exists(job.file_path):
+        try:
+            os.remove(job.file_path)
+        except OSError as e:
+            logger.warning(f"Could not remove upload file {job.file_path} for job {job.id}: {e}")
@@ -0,0 +1,100 @@
+"""
+Maintenance of the daily_feed_rollup table.
+
+Every composition usage adds its feed weights and cost to the (tenant_id, batch_id, date(used_at))
+row, and a revert subtracts the same amounts before the usage is deleted. Both run inside the
+caller's transaction, so the rollup commits (or rolls back) together with the usage itself.
+rebuild_daily_feed_rollup recomputes it from composition_usage_history for backfills.
+"""
+import logging
+from typing import Optional
+
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models.composition_usage_history import CompositionUsageHistory
+from models.composition_usage_item import CompositionUsageItem
+from models.daily_feed_rollup import DailyFeedRollup
+
+logger = logging.getLogger(__name__)
+
+_ROLLUP_COLUMNS = ["tenant_id", "batch_id", "feed_date", "gross_feed_kg", "net_feed_kg", "feed_cost"]
+
+
+def _usage_rollup_select(sign: int = 1):
+    """
+    Per (tenant_id, batch_id, usage date) sums over composition usages, multiplied by sign.
+    Callers add the WHERE clause selecting the usages.
+    """
+    usage_date = func.date(CompositionUsageHistory.used_at)
+    base_kg = CompositionUsageItem.weight * CompositionUsageHistory.times
+    is_feed = CompositionUsageItem.item_category == 'Feed'
+    net_multiplier = 1 - func.coalesce(CompositionUsageItem.wastage_percentage, 0) / 100
+    return select(
+        CompositionUsageHistory.tenant_id,
+        CompositionUsageHistory.batch_id,
+        usage_date.label("feed_date"),
+        (sign * func.coalesce(func.sum(case((is_feed, base_kg), else_=0)), 0)).label("gross_feed_kg"),
+        (sign * func.coalesce(func.sum(case((is_feed, base_kg * net_multiplier), else_=0)), 0)).label("net_feed_kg"),
+        (sign * func.coalesce(func.sum(base_kg * func.coalesce(CompositionUsageItem.unit_cost, 0)), 0)).label("feed_cost"),
+    ).join(
+        CompositionUsageItem, CompositionUsageItem.usage_history_id == CompositionUsageHistory.id
+    ).where(
+        CompositionUsageHistory.tenant_id.isnot(None)
+    ).group_by(
+        CompositionUsageHistory.tenant_id, CompositionUsageHistory.batch_id, usage_date
+    )
+
+
+def _upsert_usage_totals(db: Session, usage_query):
+    stmt = pg_insert(DailyFeedRollup).from_select(_ROLLUP_COLUMNS, usage_query)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyFeedRollup.tenant_id, DailyFeedRollup.batch_id, DailyFeedRollup.feed_date],
+        set_={
+            "gross_feed_kg": DailyFeedRollup.gross_feed_kg + stmt.excluded.gross_feed_kg,
+            "net_feed_kg": DailyFeedRollup.net_feed_kg + stmt.excluded.net_feed_kg,
+            "feed_cost": DailyFeedRollup.feed_cost + stmt.excluded.feed_cost,
+        }
+    )
+    db.execute(stmt)
+
+
+def add_usage_to_rollup(db: Session, usage_id: int):
+    """Adds a composition usage (and its items) to the rollup. Flushes, does not commit."""
+    db.flush()
+    _upsert_usage_totals(db, _usage_rollup_select().where(CompositionUsageHistory.id == usage_id))
+
+
+def remove_usage_from_rollup(db: Session, usage_id: int):
+    """Subtracts a composition usage from the rollup; call before deleting it. Flushes, does not commit."""
+    db.flush()
+    _upsert_usage_totals(db, _usage_rollup_select(sign=-1).where(CompositionUsageHistory.id == usage_id))
+
+    # Drop days that no longer have any usage left
+    usage_keys = select(
+        CompositionUsageHistory.tenant_id, CompositionUsageHistory.batch_id, func.date(CompositionUsageHistory.used_at)
+    ).where(CompositionUsageHistory.id == usage_id)
+    db.query(DailyFeedRollup).filter(
+        tuple_(DailyFeedRollup.tenant_id, DailyFeedRollup.batch_id, DailyFeedRollup.feed_date).in_(usage_keys),
+        DailyFeedRollup.gross_feed_kg == 0,
+        DailyFeedRollup.net_feed_kg == 0,
+        DailyFeedRollup.feed_cost == 0
+    ).delete(synchronize_session=False)
+
+
+def rebuild_daily_feed_rollup(db: Session, tenant_id: Optional[str] = None) -> int:
+    """
+    Recomputes the rollup from composition_usage_history for one tenant, or all tenants.
+    Returns the number of rollup rows written. Does not commit.
+    """
+    delete_query = db.query(DailyFeedRollup)
+    usage_query = _usage_rollup_select()
+    if tenant_id is not None:
+        delete_query = delete_query.filter(DailyFeedRollup.tenant_id == tenant_id)
+        usage_query = usage_query.where(CompositionUsageHistory.tenant_id == tenant_id)
+    deleted = delete_query.delete(synchronize_session=False)
+
+    result = db.execute(pg_insert(DailyFeedRollup).from_select(_ROLLUP_COLUMNS, usage_query))
+    logger.info(f"Rebuilt daily feed rollup for tenant '{tenant_id or 'all'}': {deleted} rows removed, {result.rowcount} rows written.")
+    return result.rowcount
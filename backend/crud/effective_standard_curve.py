@@ -0,0 +1,63 @@
+"""
+Refresh of effective_standard_curve, the tenants' performance standards resolved for their
+performance_standard_source (see models.effective_standard_curve).
+
+models.effective_standard_curve hooks the refresh into session commits for ORM changes to the
+standard tables or the performance_standard_source config; standards loaded directly into the
+database are picked up by rebuild_effective_standard_curve.py.
+"""
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models.bovanswhitelayerperformance import BovansWhiteLayerPerformance
+from models.bv300_layer_performance import BV300LayerPerformance
+from models.bv300_rearing_performance import BV300RearingPerformance
+from models.daily_batch import resolve_standard_curve
+from models.effective_standard_curve import EffectiveStandardCurve
+from utils.standards_cache import load_tenant_standards
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_effective_standard_curve(db: Session, tenant_ids: Iterable[str]) -> int:
+    """
+    Replaces the curves of tenant_ids with their current standards; tenants without any standard
+    rows end up without a curve. Returns the number of rows written. Does not commit.
+    """
+    written = 0
+    for tenant_id in tenant_ids:
+        db.query(EffectiveStandardCurve).filter(
+            EffectiveStandardCurve.tenant_id == tenant_id
+        ).delete(synchronize_session=False)
+
+        # Read from the database rather than the cache, which still holds the pre-commit standards
+        standards = load_tenant_standards(db, tenant_id)
+        rows = resolve_standard_curve(standards["source_value"], standards["curves"])
+        if rows:
+            db.execute(pg_insert(EffectiveStandardCurve).values([{"tenant_id": tenant_id, **row} for row in rows]))
+        written += len(rows)
+    return written
+
+
+def rebuild_effective_standard_curve(db: Session, tenant_id: Optional[str] = None) -> int:
+    """
+    Recomputes the curve of one tenant, or of all tenants with standard rows.
+    Returns the number of rows written. Does not commit.
+    """
+    if tenant_id is not None:
+        tenant_ids = [tenant_id]
+    else:
+        db.query(EffectiveStandardCurve).delete(synchronize_session=False)
+        tenants = union(*(
+            db.query(model.tenant_id).filter(model.tenant_id.isnot(None)).statement
+            for model in (BovansWhiteLayerPerformance, BV300RearingPerformance, BV300LayerPerformance)
+        )).subquery()
+        tenant_ids = [tenant for (tenant,) in db.query(tenants).all()]
+
+    written = refresh_effective_standard_curve(db, tenant_ids)
+    logger.info(f"Rebuilt effective standard curve for tenant '{tenant_id or 'all'}': {written} rows written.")
+    return written
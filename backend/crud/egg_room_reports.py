@@ -1,4 +1,5 @@
-from datetime import datetime
+import logging
+from datetime import date, datetime, timedelta
 import pytz
 from sqlalchemy.orm import Session
 from crud.audit_log import create_audit_log
@@ -6,10 +7,17 @@ from schemas.audit_log import AuditLogCreate
 from utils import sqlalchemy_to_dict
 from models.egg_room_reports import EggRoomReport
 from schemas.egg_room_reports import EggRoomReportCreate, EggRoomReportUpdate
-from typing import List
+from typing import Callable, List, Optional, Tuple
 from models.daily_batch import DailyBatch
-from sqlalchemy import func
+from sqlalchemy import Date, Integer, and_, cast, column, func, inspect, literal, null, select, text, union_all, update, values
 from crud import app_config as crud_app_config # Import app_config crud
+from crud.egg_stock_ledger import get_ledger_balance
+from models.egg_stock_checkpoint import mark_egg_stock_stale
+
+logger = logging.getLogger(__name__)
+
+# Reports streamed, and written with one UPDATE and commit, per chunk of the opening balance recalculation
+RECALCULATE_CHUNK_SIZE = 1000
 
 
 def get_report_by_date(db: Session, report_date: str, tenant_id: str):
@@ -29,58 +37,151 @@ def get_reports_by_date_range(db: Session, start_date: str, end_date: str, tenan
     )
 
 
-def create_report(db: Session, report: EggRoomReportCreate, tenant_id: str, user_id: str) -> EggRoomReport:
-    from models.app_config import AppConfig
-    from datetime import datetime, date
-    
-    # Get system start date
-    start_date_config = db.query(AppConfig).filter(
-        AppConfig.name == 'system_start_date', 
-        AppConfig.tenant_id == tenant_id
+def expected_report_values(db: Session, report_date: date, tenant_id: str) -> dict:
+    """
+    Received amounts and opening balances the report of report_date should have: the sums of the
+    day's daily_batch rows, and the egg stock ledger's balance at the end of the previous day, so
+    eggs received on days without a report are carried over as get_daily_reports and the egg room
+    propagation do. Before the tenant's first report that is the app_config openings.
+    """
+    daily_batch_sums = db.query(
+        func.sum(DailyBatch.table_eggs).label("table_received"),
+        func.sum(DailyBatch.jumbo).label("jumbo_received"),
+        func.sum(DailyBatch.cr).label("grade_c_shed_received")
+    ).filter(
+        DailyBatch.batch_date == report_date,
+        DailyBatch.tenant_id == tenant_id
     ).first()
-    
-    system_start_date = date(2000, 1, 1)  # Default fallback
-    if start_date_config:
-        try:
-            system_start_date = datetime.strptime(start_date_config.value, "%Y-%m-%d").date()
-        except ValueError:
-            pass  # Use default if invalid format
-    
-    # Calculate opening balances from previous day's closing
-    # Only consider reports on/after system start date
-    prev_report = db.query(EggRoomReport).filter(
-        EggRoomReport.report_date < report.report_date,
-        EggRoomReport.report_date >= system_start_date,
-        EggRoomReport.tenant_id == tenant_id
-    ).order_by(EggRoomReport.report_date.desc()).first()
-
-    # If previous report exists (on/after system start date), use its closing values as opening
-    if prev_report:
-        opening_values = {
-            'table_opening': prev_report.table_closing,
-            'jumbo_opening': prev_report.jumbo_closing,
-            'grade_c_opening': prev_report.grade_c_closing
-        }
-    # If no valid previous report AND this is the system start date, use app_config
-    elif report.report_date == system_start_date:
-        table_opening_config = crud_app_config.get_config(db, tenant_id, name="table_opening")
-        jumbo_opening_config = crud_app_config.get_config(db, tenant_id, name="jumbo_opening")
-        grade_c_opening_config = crud_app_config.get_config(db, tenant_id, name="grade_c_opening")
-
-        opening_values = {
-            'table_opening': int(table_opening_config.value) if table_opening_config else 0,
-            'jumbo_opening': int(jumbo_opening_config.value) if jumbo_opening_config else 0,
-            'grade_c_opening': int(grade_c_opening_config.value) if grade_c_opening_config else 0
-        }
-    # This is a fallback case. It triggers if a report is created for a date after the
-    # system_start_date, but without a preceding report (i.e., a gap in the daily reports).
-    # In this unexpected scenario, we default the opening balances to 0 to prevent errors.
+    table_opening, jumbo_opening, grade_c_opening = get_ledger_balance(db, tenant_id, report_date - timedelta(days=1))
+    return {
+        "table_received": daily_batch_sums.table_received or 0,
+        "jumbo_received": daily_batch_sums.jumbo_received or 0,
+        "grade_c_shed_received": daily_batch_sums.grade_c_shed_received or 0,
+        "table_opening": table_opening,
+        "jumbo_opening": jumbo_opening,
+        "grade_c_opening": grade_c_opening,
+    }
+
+
+def _transient_copy(report: EggRoomReport) -> EggRoomReport:
+    """A copy of a stored report that is not attached to the session, so reads can adjust it without writing."""
+    return EggRoomReport(**{attr.key: getattr(report, attr.key) for attr in inspect(EggRoomReport).column_attrs})
+
+
+def compute_report(db: Session, report_date: date, tenant_id: str) -> Tuple[EggRoomReport, bool]:
+    """
+    The report of report_date with its received amounts and opening balances brought up to date,
+    without writing anything: returns a transient EggRoomReport (an empty one if none is stored)
+    and whether the stored row is missing or stale.
+    """
+    report = get_report_by_date(db, report_date, tenant_id)
+    expected = expected_report_values(db, report_date, tenant_id)
+    if report is None:
+        computed = EggRoomReport(
+            report_date=report_date,
+            tenant_id=tenant_id,
+            created_at=datetime.now(pytz.timezone('Asia/Kolkata'))
+        )
+        stale = True
     else:
-        opening_values = {
-            'table_opening': 0,
-            'jumbo_opening': 0,
-            'grade_c_opening': 0
-        }
+        computed = _transient_copy(report)
+        stale = any(getattr(report, name) != value for name, value in expected.items())
+    for name, value in expected.items():
+        setattr(computed, name, value)
+    return computed, stale
+
+
+def get_daily_reports(db: Session, start_date: date, end_date: date, tenant_id: str) -> List[EggRoomReport]:
+    """
+    One report per day of start_date..end_date, computed in one statement without writing: stored
+    reports get the day's daily_batch received amounts, and days without a report are virtual
+    (stored is False). Opening balances are running balances from the egg stock ledger's balance
+    the day before start_date, adding each day's received eggs and report movements.
+    Returns transient EggRoomReport objects.
+    """
+    base = get_ledger_balance(db, tenant_id, start_date - timedelta(days=1))
+
+    days = select(
+        cast(func.generate_series(start_date, end_date, text("interval '1 day'")), Date).label("day")
+    ).subquery("days")
+    received = select(
+        DailyBatch.batch_date,
+        func.sum(DailyBatch.table_eggs).label("table_received"),
+        func.sum(DailyBatch.jumbo).label("jumbo_received"),
+        func.sum(DailyBatch.cr).label("grade_c_shed_received")
+    ).where(
+        DailyBatch.batch_date.between(start_date, end_date),
+        DailyBatch.tenant_id == tenant_id
+    ).group_by(DailyBatch.batch_date).subquery("received")
+
+    received_columns = [
+        func.coalesce(received.c.table_received, 0),
+        func.coalesce(received.c.jumbo_received, 0),
+        func.coalesce(received.c.grade_c_shed_received, 0),
+    ]
+    # Received eggs plus the report's movements; the closing expressions are 0 for days without a report
+    day_changes = [
+        received_columns[0] + EggRoomReport.table_closing - func.coalesce(EggRoomReport.table_opening, 0) - func.coalesce(EggRoomReport.table_received, 0),
+        received_columns[1] + EggRoomReport.jumbo_closing - func.coalesce(EggRoomReport.jumbo_opening, 0) - func.coalesce(EggRoomReport.jumbo_received, 0),
+        received_columns[2] + EggRoomReport.grade_c_closing - func.coalesce(EggRoomReport.grade_c_opening, 0) - func.coalesce(EggRoomReport.grade_c_shed_received, 0),
+    ]
+    openings = [
+        (balance + func.coalesce(func.sum(change).over(order_by=days.c.day, rows=(None, -1)), 0)).label(name)
+        for balance, change, name in zip(base, day_changes, ("table_opening", "jumbo_opening", "grade_c_opening"))
+    ]
+    rows = db.execute(
+        select(
+            days.c.day,
+            EggRoomReport,
+            received_columns[0].label("table_received"),
+            received_columns[1].label("jumbo_received"),
+            received_columns[2].label("grade_c_shed_received"),
+            *openings
+        ).select_from(days).outerjoin(
+            EggRoomReport, and_(EggRoomReport.report_date == days.c.day, EggRoomReport.tenant_id == tenant_id)
+        ).outerjoin(
+            received, received.c.batch_date == days.c.day
+        ).order_by(days.c.day)
+    ).all()
+
+    reports = []
+    for row in rows:
+        stored = row.EggRoomReport
+        report = _transient_copy(stored) if stored else EggRoomReport(report_date=row.day, tenant_id=tenant_id)
+        for name in ("table_received", "jumbo_received", "grade_c_shed_received", "table_opening", "jumbo_opening", "grade_c_opening"):
+            setattr(report, name, getattr(row, name))
+        report.stored = stored is not None
+        reports.append(report)
+    return reports
+
+
+def repair_report(db: Session, report_date: date, tenant_id: str, user_id: str) -> EggRoomReport:
+    """
+    Creates the report of report_date if it is missing and stores its up-to-date received amounts
+    and opening balances. Commits only if something changed.
+    """
+    report = get_report_by_date(db, report_date, tenant_id)
+    if report is None:
+        return create_report(db, EggRoomReportCreate(report_date=report_date), tenant_id, user_id)
+
+    expected = expected_report_values(db, report_date, tenant_id)
+    changed = {name: value for name, value in expected.items() if getattr(report, name) != value}
+    if changed:
+        for name, value in changed.items():
+            setattr(report, name, value)
+        db.commit()
+        db.refresh(report)
+    return report
+
+
+def create_report(db: Session, report: EggRoomReportCreate, tenant_id: str, user_id: str) -> EggRoomReport:
+    # Opening balances from the egg stock ledger as of the previous day, as expected_report_values has them
+    table_opening, jumbo_opening, grade_c_opening = get_ledger_balance(db, tenant_id, report.report_date - timedelta(days=1))
+    opening_values = {
+        'table_opening': table_opening,
+        'jumbo_opening': jumbo_opening,
+        'grade_c_opening': grade_c_opening
+    }
 
     # Calculate sums from daily_batch
     daily_batch_sums = db.query(
@@ -206,20 +307,32 @@ def update_report(db: Session, report_date: str, report: EggRoomReportUpdate, te
         EggRoomReport.report_date > db_report.report_date
     ).order_by(EggRoomReport.report_date.asc()).all()
 
-    prev_report = db_report
+    # Eggs received on days without a report are carried over to the next report, as in the egg stock ledger
+    gap_received = db.query(
+        DailyBatch.batch_date,
+        func.coalesce(func.sum(DailyBatch.table_eggs), 0),
+        func.coalesce(func.sum(DailyBatch.jumbo), 0),
+        func.coalesce(func.sum(DailyBatch.cr), 0)
+    ).filter(
+        DailyBatch.batch_date > db_report.report_date,
+        DailyBatch.tenant_id == tenant_id
+    ).group_by(DailyBatch.batch_date).order_by(DailyBatch.batch_date).all()
+    report_dates = {sub_report.report_date for sub_report in subsequent_reports}
+    gap_received = [row for row in gap_received if row[0] not in report_dates]
+
+    carried = (db_report.table_closing, db_report.jumbo_closing, db_report.grade_c_closing)
+    gap_index = 0
     for sub_report in subsequent_reports:
-        if (sub_report.table_opening != prev_report.table_closing or
-            sub_report.jumbo_opening != prev_report.jumbo_closing or
-            sub_report.grade_c_opening != prev_report.grade_c_closing):
-            
-            sub_report.table_opening = prev_report.table_closing
-            sub_report.jumbo_opening = prev_report.jumbo_closing
-            sub_report.grade_c_opening = prev_report.grade_c_closing
-            
+        while gap_index < len(gap_received) and gap_received[gap_index][0] < sub_report.report_date:
+            carried = tuple(balance + received for balance, received in zip(carried, gap_received[gap_index][1:]))
+            gap_index += 1
+        if (sub_report.table_opening, sub_report.jumbo_opening, sub_report.grade_c_opening) != carried:
+            sub_report.table_opening, sub_report.jumbo_opening, sub_report.grade_c_opening = carried
+
             sub_report.updated_at = datetime.now(pytz.timezone('Asia/Kolkata'))
             sub_report.updated_by = user_id
-        
-        prev_report = sub_report
+
+        carried = (sub_report.table_closing, sub_report.jumbo_closing, sub_report.grade_c_closing)
 
     db.commit()
     db.refresh(db_report)
@@ -256,20 +369,58 @@ def delete_report(db: Session, report_date: str, tenant_id: str, user_id: str):
 
     return {"message": "Report deleted"}
 
-def recalculate_inventory_from_start(db: Session, tenant_id: str, user_id: str):
+def _update_openings(db: Session, tenant_id: str, user_id: str, rows: List[Tuple[date, int, int, int]]):
+    """Sets the opening balances of (report_date, table, jumbo, grade C) rows in one UPDATE ... FROM (VALUES ...)."""
+    openings = values(
+        column("report_date", Date),
+        column("table_opening", Integer),
+        column("jumbo_opening", Integer),
+        column("grade_c_opening", Integer),
+        name="openings"
+    ).data(rows)
+    db.execute(
+        update(EggRoomReport)
+        .where(EggRoomReport.tenant_id == tenant_id, EggRoomReport.report_date == openings.c.report_date)
+        .values(
+            table_opening=openings.c.table_opening,
+            jumbo_opening=openings.c.jumbo_opening,
+            grade_c_opening=openings.c.grade_c_opening,
+            updated_by=user_id,
+            updated_at=datetime.now(pytz.timezone('Asia/Kolkata'))
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recalculate_inventory_from_start(
+    db: Session,
+    tenant_id: str,
+    user_id: str,
+    resume_after: Optional[date] = None,
+    chunk_size: int = RECALCULATE_CHUNK_SIZE,
+    progress: Optional[Callable[[date, int], None]] = None
+) -> Optional[int]:
     """
-    Recalculates opening balances for all reports starting from system_start_date
-    based on the values in app_config.
+    Recalculates opening balances for all reports starting from system_start_date from the egg
+    stock ledger: the app_config openings at the ledger start plus the eggs received from
+    daily_batch, on days without a report too, and each report's movements.
+
+    The reports and receipts are streamed in date order through a server-side cursor and only the
+    reports whose openings change are written, chunk_size rows per UPDATE and commit, so long
+    histories are neither loaded at once nor locked for the whole run. progress(report_date, updated) is called
+    after each chunk. An interrupted run can continue with resume_after set to the last date it
+    reported, since every report up to it is already committed.
+    Returns the number of reports updated, or None if system_start_date is not configured.
     """
     # 1. Get system start date
     start_date_config = crud_app_config.get_config(db, tenant_id, name='system_start_date')
     if not start_date_config:
-        return 
+        return None
     
     try:
         system_start_date = datetime.strptime(start_date_config.value, "%Y-%m-%d").date()
     except ValueError:
-        return
+        return None
 
     # 2. Get initial opening balances from config
     table_conf = crud_app_config.get_config(db, tenant_id, name='table_opening')
@@ -310,32 +461,69 @@ def recalculate_inventory_from_start(db: Session, tenant_id: str, user_id: str):
             updated_by=user_id
         )
         db.add(new_report)
+        # The new report moves the ledger start back to system_start_date, so the eggs received from
+        # then on count towards every later balance: drop all of the tenant's checkpoints, the commit
+        # rebuilds them from the new first report
+        mark_egg_stock_stale(db, tenant_id, date.min)
         db.commit()
 
-    # 3. Fetch all reports from system_start_date onwards
-    reports = db.query(EggRoomReport).filter(
+    # 3. Stream the reports and the daily_batch receipts in date order and carry the ledger balance forward,
+    # one chunk at a time. The carry starts from the egg stock ledger, so it matches expected_report_values.
+    stream_from = system_start_date
+    if resume_after is not None and resume_after >= system_start_date:
+        # Reports up to resume_after were committed by an earlier run
+        stream_from = resume_after + timedelta(days=1)
+    carried = get_ledger_balance(db, tenant_id, stream_from - timedelta(days=1))
+
+    # Each report's movements (closing minus opening and received), and the eggs received per day from
+    # daily_batch, including days without a report; a day's report sorts before its receipts (kind 0)
+    report_changes = select(
+        EggRoomReport.report_date.label("day"),
+        literal(0).label("kind"),
+        EggRoomReport.table_opening,
+        EggRoomReport.jumbo_opening,
+        EggRoomReport.grade_c_opening,
+        (EggRoomReport.table_closing - func.coalesce(EggRoomReport.table_opening, 0) - func.coalesce(EggRoomReport.table_received, 0)).label("table_change"),
+        (EggRoomReport.jumbo_closing - func.coalesce(EggRoomReport.jumbo_opening, 0) - func.coalesce(EggRoomReport.jumbo_received, 0)).label("jumbo_change"),
+        (EggRoomReport.grade_c_closing - func.coalesce(EggRoomReport.grade_c_opening, 0) - func.coalesce(EggRoomReport.grade_c_shed_received, 0)).label("grade_c_change"),
+    ).where(
         EggRoomReport.tenant_id == tenant_id,
-        EggRoomReport.report_date >= system_start_date
-    ).order_by(EggRoomReport.report_date.asc()).all()
-
-    # 4. Iterate and update
-    prev_report = None
-    
-    for report in reports:
-        if report.report_date == system_start_date:
-            # This is the first report, set opening from config
-            report.table_opening = initial_table
-            report.jumbo_opening = initial_jumbo
-            report.grade_c_opening = initial_grade_c
-        elif prev_report:
-            # Subsequent reports, set opening from prev closing
-            # Note: accessing prev_report.table_closing computes it based on the *current* state of prev_report in the session
-            report.table_opening = prev_report.table_closing
-            report.jumbo_opening = prev_report.jumbo_closing
-            report.grade_c_opening = prev_report.grade_c_closing
-        
-        report.updated_by = user_id
-        report.updated_at = datetime.now(pytz.timezone('Asia/Kolkata'))
-        prev_report = report
-
-    db.commit()
+        EggRoomReport.report_date >= stream_from
+    )
+    received_changes = select(
+        DailyBatch.batch_date,
+        literal(1),
+        null(),
+        null(),
+        null(),
+        func.coalesce(func.sum(DailyBatch.table_eggs), 0),
+        func.coalesce(func.sum(DailyBatch.jumbo), 0),
+        func.coalesce(func.sum(DailyBatch.cr), 0),
+    ).where(
+        DailyBatch.tenant_id == tenant_id,
+        DailyBatch.batch_date >= stream_from
+    ).group_by(DailyBatch.batch_date)
+    parts = union_all(report_changes, received_changes).subquery("egg_room_changes")
+    changes = select(parts).order_by(parts.c.day, parts.c.kind)
+
+    updated = 0
+    # A connection of its own for the server-side cursor, which would not survive the commits of the chunks
+    with db.get_bind().connect() as stream_connection:
+        result = stream_connection.execution_options(stream_results=True, yield_per=chunk_size).execute(changes)
+        for chunk in result.partitions():
+            rows = []
+            for row in chunk:
+                if row.kind == 0 and (row.table_opening, row.jumbo_opening, row.grade_c_opening) != carried:
+                    rows.append((row.day, *carried))
+                carried = (carried[0] + row.table_change, carried[1] + row.jumbo_change, carried[2] + row.grade_c_change)
+            if rows:
+                _update_openings(db, tenant_id, user_id, rows)
+                db.commit()
+                updated += len(rows)
+            logger.info(
+                f"Recalculated egg room openings for tenant '{tenant_id}' through {chunk[-1].day}: "
+                f"{updated} reports updated so far."
+            )
+            if progress is not None:
+                progress(chunk[-1].day, updated)
+    return updated
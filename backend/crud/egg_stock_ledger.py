@@ -0,0 +1,215 @@
+"""
+Egg stock as of any day, from the egg stock ledger and its monthly checkpoints.
+
+The ledger starts at a tenant's first egg room report with the table/jumbo/grade C opening
+balances from app_config. Each day from then on adds the eggs received from daily_batch and
+the movements recorded in the day's egg room report, if there is one. The stock as of a day is
+the balance through the last report on or before it, which is the closing balance that report
+has once its opening balances are propagated.
+
+egg_stock_checkpoints stores the balance at the end of every completed month, so a lookup only
+sums the days after the latest checkpoint. models.egg_stock_checkpoint hooks the refresh into
+session commits for ORM changes; bulk statements on daily_batch call mark_egg_stock_stale themselves.
+A change only drops the checkpoints from its day on; they are recomputed in the same commit.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, func, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models.app_config import AppConfig
+from models.daily_batch import DailyBatch
+from models.egg_room_reports import EggRoomReport
+from models.egg_stock_checkpoint import EggStockCheckpoint, OPENING_CONFIG_NAMES
+from models.monthly_production_rollup import month_end, month_start
+
+logger = logging.getLogger(__name__)
+
+# (table, jumbo, grade C) egg counts
+Balances = Tuple[int, int, int]
+
+
+def _ledger_totals(db: Session, tenant_id: str, start_date: date, end_date: date, by_month: bool = False):
+    """
+    Net egg movement of the days start_date..end_date: eggs received from daily_batch plus the
+    egg room reports' transfers, damage, outs and untrayed eggs. With by_month, one row per month.
+    """
+    parts = union_all(
+        select(
+            DailyBatch.batch_date.label("day"),
+            func.coalesce(DailyBatch.table_eggs, 0).label("table"),
+            func.coalesce(DailyBatch.jumbo, 0).label("jumbo"),
+            func.coalesce(DailyBatch.cr, 0).label("grade_c"),
+        ).where(
+            DailyBatch.tenant_id == tenant_id,
+            DailyBatch.batch_date.between(start_date, end_date)
+        ),
+        select(
+            EggRoomReport.report_date,
+            EggRoomReport.table_closing - func.coalesce(EggRoomReport.table_opening, 0) - func.coalesce(EggRoomReport.table_received, 0),
+            EggRoomReport.jumbo_closing - func.coalesce(EggRoomReport.jumbo_opening, 0) - func.coalesce(EggRoomReport.jumbo_received, 0),
+            EggRoomReport.grade_c_closing - func.coalesce(EggRoomReport.grade_c_opening, 0) - func.coalesce(EggRoomReport.grade_c_shed_received, 0),
+        ).where(
+            EggRoomReport.tenant_id == tenant_id,
+            EggRoomReport.report_date.between(start_date, end_date)
+        ),
+    ).subquery("egg_ledger_parts")
+
+    totals = [
+        func.coalesce(func.sum(parts.c.table), 0).label("table"),
+        func.coalesce(func.sum(parts.c.jumbo), 0).label("jumbo"),
+        func.coalesce(func.sum(parts.c.grade_c), 0).label("grade_c"),
+    ]
+    if by_month:
+        month = cast(func.date_trunc('month', parts.c.day), Date)
+        return {row.month: (row.table, row.jumbo, row.grade_c) for row in db.execute(
+            select(month.label("month"), *totals).group_by(month)
+        )}
+    row = db.execute(select(*totals)).one()
+    return row.table, row.jumbo, row.grade_c
+
+
+def _opening_balances(db: Session, tenant_id: str) -> Balances:
+    values = dict(db.query(AppConfig.name, AppConfig.value).filter(
+        AppConfig.tenant_id == tenant_id,
+        AppConfig.name.in_(OPENING_CONFIG_NAMES)
+    ).all())
+    return tuple(int(values[name]) if name in values else 0 for name in OPENING_CONFIG_NAMES)
+
+
+def _add(balances: Balances, totals: Balances) -> Balances:
+    return tuple(balance + total for balance, total in zip(balances, totals))
+
+
+def _first_report_date(db: Session, tenant_id: str) -> Optional[date]:
+    return db.query(func.min(EggRoomReport.report_date)).filter(EggRoomReport.tenant_id == tenant_id).scalar()
+
+
+def _latest_checkpoint(db: Session, tenant_id: str, on_or_before: Optional[date] = None) -> Optional[EggStockCheckpoint]:
+    query = db.query(EggStockCheckpoint).filter(EggStockCheckpoint.tenant_id == tenant_id)
+    if on_or_before is not None:
+        query = query.filter(EggStockCheckpoint.checkpoint_date <= on_or_before)
+    return query.order_by(EggStockCheckpoint.checkpoint_date.desc()).first()
+
+
+def _extend_checkpoints(db: Session, tenant_id: str) -> int:
+    """Adds the missing checkpoints after the tenant's latest one, through the last completed month."""
+    first_date = _first_report_date(db, tenant_id)
+    if first_date is None:
+        return 0
+    through = month_start(date.today()) - timedelta(days=1)
+    latest = _latest_checkpoint(db, tenant_id)
+    if latest:
+        start_date = latest.checkpoint_date + timedelta(days=1)
+        balances = (latest.table_closing, latest.jumbo_closing, latest.grade_c_closing)
+    else:
+        start_date = first_date
+        balances = _opening_balances(db, tenant_id)
+    if start_date > through:
+        return 0
+
+    monthly_totals = _ledger_totals(db, tenant_id, start_date, through, by_month=True)
+    rows: List[dict] = []
+    month = month_start(start_date)
+    while month <= through:
+        balances = _add(balances, monthly_totals.get(month, (0, 0, 0)))
+        rows.append({
+            "tenant_id": tenant_id,
+            "checkpoint_date": month_end(month),
+            "table_closing": balances[0],
+            "jumbo_closing": balances[1],
+            "grade_c_closing": balances[2],
+        })
+        month = month_end(month) + timedelta(days=1)
+
+    stmt = pg_insert(EggStockCheckpoint).values(rows)
+    # A concurrent commit may have written the same checkpoints already; both computed them from committed data
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EggStockCheckpoint.tenant_id, EggStockCheckpoint.checkpoint_date],
+        set_={name: getattr(stmt.excluded, name) for name in ("table_closing", "jumbo_closing", "grade_c_closing")},
+    )
+    db.execute(stmt)
+    return len(rows)
+
+
+def refresh_egg_stock_checkpoints(db: Session, stale_from: Dict[str, date]) -> int:
+    """
+    Drops the checkpoints of each tenant from its stale day on and recomputes them.
+    Returns the number of checkpoints written. Does not commit.
+    """
+    written = 0
+    for tenant_id, from_date in sorted(stale_from.items()):
+        db.query(EggStockCheckpoint).filter(
+            EggStockCheckpoint.tenant_id == tenant_id,
+            EggStockCheckpoint.checkpoint_date >= from_date
+        ).delete(synchronize_session=False)
+        written += _extend_checkpoints(db, tenant_id)
+    return written
+
+
+def rebuild_egg_stock_checkpoints(db: Session, tenant_id: Optional[str] = None) -> int:
+    """
+    Recomputes the checkpoints of one tenant, or all tenants with egg room reports.
+    Returns the number of checkpoints written. Does not commit.
+    """
+    delete_query = db.query(EggStockCheckpoint)
+    tenants_query = db.query(EggRoomReport.tenant_id).filter(EggRoomReport.tenant_id.isnot(None)).distinct()
+    if tenant_id is not None:
+        delete_query = delete_query.filter(EggStockCheckpoint.tenant_id == tenant_id)
+        tenants_query = tenants_query.filter(EggRoomReport.tenant_id == tenant_id)
+    deleted = delete_query.delete(synchronize_session=False)
+
+    written = sum(_extend_checkpoints(db, tenant) for (tenant,) in tenants_query.all())
+    logger.info(f"Rebuilt egg stock checkpoints for tenant '{tenant_id or 'all'}': {deleted} rows removed, {written} rows written.")
+    return written
+
+
+def _balance_through(db: Session, tenant_id: str, first_date: date, through: date) -> Balances:
+    checkpoint = _latest_checkpoint(db, tenant_id, on_or_before=through)
+    if checkpoint:
+        start_date = checkpoint.checkpoint_date + timedelta(days=1)
+        balances = (checkpoint.table_closing, checkpoint.jumbo_closing, checkpoint.grade_c_closing)
+    else:
+        start_date = first_date
+        balances = _opening_balances(db, tenant_id)
+    if start_date <= through:
+        balances = _add(balances, _ledger_totals(db, tenant_id, start_date, through))
+    return balances
+
+
+def get_ledger_balance(db: Session, tenant_id: str, through: date) -> Balances:
+    """
+    (table, jumbo, grade C) ledger balance at the end of the day through, counting eggs received
+    on days without a report as well; the opening balances if the ledger has not started by then.
+    """
+    first_date = _first_report_date(db, tenant_id)
+    if first_date is None or first_date > through:
+        return _opening_balances(db, tenant_id)
+    return _balance_through(db, tenant_id, first_date, through)
+
+
+def get_egg_stock(db: Session, tenant_id: str, as_of: Optional[date] = None) -> Optional[dict]:
+    """
+    Table, jumbo and grade C egg stock as of the last egg room report on or before as_of (any date
+    when as_of is None), or None if there is no such report. Only the days after the latest
+    checkpoint are summed.
+    """
+    bounds = db.query(func.min(EggRoomReport.report_date), func.max(EggRoomReport.report_date)).filter(
+        EggRoomReport.tenant_id == tenant_id
+    )
+    if as_of is not None:
+        bounds = bounds.filter(EggRoomReport.report_date <= as_of)
+    first_date, report_date = bounds.one()
+    if report_date is None:
+        return None
+
+    balances = _balance_through(db, tenant_id, first_date, report_date)
+    return {
+        "report_date": report_date,
+        "table_closing": balances[0],
+        "jumbo_closing": balances[1],
+        "grade_c_closing": balances[2],
+    }
@@ -7,7 +7,7 @@ from models.inventory_item_usage_history import InventoryItemUsageHistory
 from models import (
     EggRoomReport,
     SalesOrderItem,
-    CompositionUsageHistory,
+    DailyFeedRollup,
     OperationalExpense,
     SalesOrder,
     SalesPayment,
@@ -54,17 +54,11 @@ def get_financial_summary(db: Session, start_date: date, end_date: date, tenant_
                 (eggs_sold_result.total_grade_c or 0)
 
     # Cost per Egg
-    cogs = Decimal(0)
-    composition_usages = db.query(CompositionUsageHistory).filter(
-        CompositionUsageHistory.used_at.between(start_date, end_date),
-        CompositionUsageHistory.tenant_id == tenant_id
-    ).all()
-
-    for usage in composition_usages:
-        usage_cost = Decimal(0)
-        for item in usage.items:
-            usage_cost += Decimal(item.weight) * item.inventory_item.average_cost
-        cogs += usage_cost * usage.times
+    # Composition usage costs, summed per day in the daily feed rollup
+    cogs = db.query(func.sum(DailyFeedRollup.feed_cost)).filter(
+        DailyFeedRollup.feed_date.between(start_date, end_date),
+        DailyFeedRollup.tenant_id == tenant_id
+    ).scalar() or Decimal(0)
     
     # Add direct inventory item usage costs
     direct_inventory_usages = db.query(InventoryItemUsageHistory).filter(
@@ -0,0 +1,162 @@
+"""
+Maintenance and reads of the monthly_production_rollup table.
+
+A month is recomputed from its DailyBatch rows, daily_feed_rollup and operational expenses in one
+INSERT ... SELECT. models.monthly_production_rollup hooks the refresh into session commits for ORM
+changes; bulk statements on daily_batch call mark_monthly_rollup_stale themselves. Months ending on
+or before the tenant's financial last_closed_date are closed: they keep the totals they had when
+the period was closed.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, and_, cast, func, literal, or_, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from models.daily_batch import DailyBatch
+from models.daily_feed_rollup import DailyFeedRollup
+from models.financial_settings import FinancialSettings
+from models.monthly_production_rollup import MonthlyProductionRollup, month_end, month_start
+from models.operational_expenses import OperationalExpense
+
+logger = logging.getLogger(__name__)
+
+_ROLLUP_COLUMNS = ["tenant_id", "month", "daily_rows", "total_eggs", "feed_grams", "composition_cost", "operational_expense"]
+
+# (tenant_id, first day, last day) of the days to aggregate
+Period = Tuple[str, date, date]
+
+
+def _in_periods(tenant_column, date_column, periods: List[Period]):
+    return or_(*[and_(tenant_column == tenant_id, date_column.between(start, end)) for tenant_id, start, end in periods])
+
+
+def _monthly_totals_select(periods: List[Period]):
+    """Per (tenant_id, month) totals over the days of the given periods."""
+    def month_of(day):
+        return cast(func.date_trunc('month', day), Date)
+
+    zero = literal(0)
+    expense_date = func.date(OperationalExpense.expense_date)
+    parts = union_all(
+        select(
+            DailyBatch.tenant_id.label("tenant_id"),
+            month_of(DailyBatch.batch_date).label("month"),
+            literal(1).label("daily_rows"),
+            DailyBatch.total_eggs.label("total_eggs"),
+            (func.coalesce(DailyFeedRollup.net_feed_kg, 0) * 1000).label("feed_grams"),
+            zero.label("composition_cost"),
+            zero.label("operational_expense"),
+        ).outerjoin(
+            DailyFeedRollup,
+            and_(DailyFeedRollup.batch_id == DailyBatch.batch_id, DailyFeedRollup.feed_date == DailyBatch.batch_date)
+        ).where(_in_periods(DailyBatch.tenant_id, DailyBatch.batch_date, periods)),
+        select(
+            DailyFeedRollup.tenant_id, month_of(DailyFeedRollup.feed_date), zero, zero, zero, DailyFeedRollup.feed_cost, zero
+        ).where(_in_periods(DailyFeedRollup.tenant_id, DailyFeedRollup.feed_date, periods)),
+        select(
+            OperationalExpense.tenant_id, month_of(expense_date), zero, zero, zero, zero, OperationalExpense.amount
+        ).where(_in_periods(OperationalExpense.tenant_id, expense_date, periods)),
+    ).subquery("monthly_parts")
+
+    return select(
+        parts.c.tenant_id,
+        parts.c.month,
+        func.sum(parts.c.daily_rows).label("daily_rows"),
+        func.sum(parts.c.total_eggs).label("total_eggs"),
+        func.sum(parts.c.feed_grams).label("feed_grams"),
+        func.sum(parts.c.composition_cost).label("composition_cost"),
+        func.sum(parts.c.operational_expense).label("operational_expense"),
+    ).group_by(parts.c.tenant_id, parts.c.month)
+
+
+def _last_closed_dates(db: Session, tenant_ids: Iterable[str]) -> Dict[str, date]:
+    return dict(db.query(FinancialSettings.tenant_id, FinancialSettings.last_closed_date).filter(
+        FinancialSettings.tenant_id.in_(list(tenant_ids)),
+        FinancialSettings.last_closed_date.isnot(None)
+    ).all())
+
+
+def _write_months(db: Session, months: List[Tuple[str, date]]) -> int:
+    db.query(MonthlyProductionRollup).filter(
+        tuple_(MonthlyProductionRollup.tenant_id, MonthlyProductionRollup.month).in_(months)
+    ).delete(synchronize_session=False)
+    periods = [(tenant_id, month, month_end(month)) for tenant_id, month in months]
+    stmt = MonthlyProductionRollup.__table__.insert().from_select(_ROLLUP_COLUMNS, _monthly_totals_select(periods))
+    return db.execute(stmt).rowcount
+
+
+def refresh_monthly_production_rollup(db: Session, months: Iterable[Tuple[str, date]]) -> int:
+    """
+    Recomputes the given (tenant_id, month) rollup rows, skipping closed months.
+    Returns the number of rows written. Does not commit.
+    """
+    months = sorted({(tenant_id, month_start(month)) for tenant_id, month in months})
+    if not months:
+        return 0
+    closed_through = _last_closed_dates(db, {tenant_id for tenant_id, _ in months})
+    open_months = [
+        (tenant_id, month) for tenant_id, month in months
+        if tenant_id not in closed_through or month_end(month) > closed_through[tenant_id]
+    ]
+    if len(open_months) < len(months):
+        logger.info(f"Skipped refreshing {len(months) - len(open_months)} closed month(s) of the monthly production rollup.")
+    if not open_months:
+        return 0
+    return _write_months(db, open_months)
+
+
+def rebuild_monthly_production_rollup(db: Session, tenant_id: Optional[str] = None, include_closed: bool = False) -> int:
+    """
+    Recomputes every month of one tenant, or all tenants, that has daily rows, feed or expenses.
+    Closed months are kept unless include_closed is set. Returns the number of rows written. Does not commit.
+    """
+    sources = [
+        (DailyBatch.tenant_id, DailyBatch.batch_date),
+        (DailyFeedRollup.tenant_id, DailyFeedRollup.feed_date),
+        (OperationalExpense.tenant_id, func.date(OperationalExpense.expense_date)),
+    ]
+    months = set()
+    for tenant_column, date_column in sources:
+        query = db.query(tenant_column, cast(func.date_trunc('month', date_column), Date)).filter(tenant_column.isnot(None))
+        if tenant_id is not None:
+            query = query.filter(tenant_column == tenant_id)
+        months.update(query.distinct().all())
+
+    if include_closed:
+        delete_query = db.query(MonthlyProductionRollup)
+        if tenant_id is not None:
+            delete_query = delete_query.filter(MonthlyProductionRollup.tenant_id == tenant_id)
+        delete_query.delete(synchronize_session=False)
+        written = _write_months(db, sorted(months)) if months else 0
+    else:
+        written = refresh_monthly_production_rollup(db, months)
+    logger.info(f"Rebuilt monthly production rollup for tenant '{tenant_id or 'all'}': {written} rows written.")
+    return written
+
+
+def get_monthly_production_totals(db: Session, start_date: date, end_date: date, tenant_id: str):
+    """
+    Monthly totals of a tenant for the days start_date..end_date, ordered by month.
+
+    Whole months are read from the rollup; the partial months at either end of the range
+    are aggregated from the daily tables for just the requested days.
+    """
+    first_full = month_start(start_date) if start_date.day == 1 else month_start(month_end(start_date) + timedelta(days=1))
+    last_full = month_start(end_date) if end_date == month_end(end_date) else month_start(month_start(end_date) - timedelta(days=1))
+
+    rows = []
+    if first_full <= last_full:
+        rows += db.query(MonthlyProductionRollup).filter(
+            MonthlyProductionRollup.tenant_id == tenant_id,
+            MonthlyProductionRollup.month.between(first_full, last_full)
+        ).all()
+        partial = [(start_date, first_full - timedelta(days=1)), (month_end(last_full) + timedelta(days=1), end_date)]
+    else:
+        partial = [(start_date, end_date)]
+
+    periods = [(tenant_id, start, end) for start, end in partial if start <= end]
+    if periods:
+        rows += db.execute(_monthly_totals_select(periods)).all()
+    return sorted(rows, key=lambda row: row.month)
@@ -0,0 +1,162 @@
+"""
+Maintenance and reads of the sales_facts table.
+
+Facts are refreshed per (tenant, day): a day's rows are recomputed from its sales orders and their
+lines in one INSERT ... SELECT. models.sales_fact hooks the refresh into session commits for ORM
+changes of sales orders and sales order items.
+"""
+import logging
+from datetime import date
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Date, cast, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from models.business_partners import BusinessPartner
+from models.composition import Composition
+from models.inventory_item_variant import InventoryItemVariant
+from models.inventory_items import InventoryItem
+from models.sales_fact import SalesFact
+from models.sales_order_items import SalesOrderItem
+from models.sales_orders import SalesOrder, SalesOrderStatus
+
+logger = logging.getLogger(__name__)
+
+# Order statuses the sales reports count as sold
+SOLD_STATUSES = [SalesOrderStatus.APPROVED, SalesOrderStatus.PAID]
+
+SALES_BREAKDOWN_DIMENSIONS = ["customer", "item", "variant", "month"]
+
+_FACT_COLUMNS = [
+    "tenant_id", "sale_date", "customer_id", "inventory_item_id", "composition_id", "variant_id", "status",
+    "quantity", "line_total", "order_lines",
+]
+
+
+def _sales_facts_select(order_filter):
+    """Aggregates the lines of the sales orders matching order_filter into one row per fact grain."""
+    keys = (
+        SalesOrder.tenant_id, SalesOrder.order_date, SalesOrder.customer_id, SalesOrderItem.inventory_item_id,
+        SalesOrderItem.composition_id, SalesOrderItem.variant_id, SalesOrder.status,
+    )
+    return select(
+        *keys,
+        func.sum(SalesOrderItem.quantity).label("quantity"),
+        func.sum(SalesOrderItem.line_total).label("line_total"),
+        func.count().label("order_lines"),
+    ).join(
+        SalesOrder, SalesOrderItem.sales_order_id == SalesOrder.id
+    ).where(order_filter).group_by(*keys)
+
+
+def _insert_sales_facts(db: Session, order_filter) -> int:
+    stmt = SalesFact.__table__.insert().from_select(_FACT_COLUMNS, _sales_facts_select(order_filter))
+    return db.execute(stmt).rowcount
+
+
+def sales_order_days(db: Session, order_ids: Iterable[int]) -> Set[Tuple[str, date]]:
+    """(tenant_id, order_date) of the given sales orders that still exist."""
+    order_ids = [order_id for order_id in set(order_ids) if order_id is not None]
+    if not order_ids:
+        return set()
+    return set(db.query(SalesOrder.tenant_id, SalesOrder.order_date).filter(
+        SalesOrder.id.in_(order_ids),
+        SalesOrder.tenant_id.isnot(None)
+    ).distinct().all())
+
+
+def refresh_sales_facts(db: Session, days: Iterable[Tuple[str, date]]) -> int:
+    """Recomputes the facts of the given (tenant_id, day) pairs. Returns the number of rows written. Does not commit."""
+    days = sorted(set(days))
+    if not days:
+        return 0
+    db.query(SalesFact).filter(
+        tuple_(SalesFact.tenant_id, SalesFact.sale_date).in_(days)
+    ).delete(synchronize_session=False)
+    return _insert_sales_facts(db, tuple_(SalesOrder.tenant_id, SalesOrder.order_date).in_(days))
+
+
+def rebuild_sales_facts(db: Session, tenant_id: Optional[str] = None) -> int:
+    """
+    Recomputes the facts of one tenant, or all tenants, from sales_orders and sales_order_items.
+    Returns the number of rows written. Does not commit.
+    """
+    delete_query = db.query(SalesFact)
+    order_filter = SalesOrder.tenant_id.isnot(None)
+    if tenant_id is not None:
+        delete_query = delete_query.filter(SalesFact.tenant_id == tenant_id)
+        order_filter = SalesOrder.tenant_id == tenant_id
+    deleted = delete_query.delete(synchronize_session=False)
+
+    written = _insert_sales_facts(db, order_filter)
+    logger.info(f"Rebuilt sales facts for tenant '{tenant_id or 'all'}': {deleted} rows removed, {written} rows written.")
+    return written
+
+
+def _sold_facts(query, tenant_id: str, start_date: Optional[date], end_date: Optional[date]):
+    query = query.filter(SalesFact.tenant_id == tenant_id, SalesFact.status.in_(SOLD_STATUSES))
+    if start_date:
+        query = query.filter(SalesFact.sale_date >= start_date)
+    if end_date:
+        query = query.filter(SalesFact.sale_date <= end_date)
+    return query
+
+
+def get_top_selling_items(db: Session, tenant_id: str, start_date: Optional[date] = None, end_date: Optional[date] = None, limit: int = 10):
+    """Inventory items with the largest quantity sold, in descending order."""
+    total_quantity = func.sum(SalesFact.quantity)
+    query = db.query(
+        InventoryItem.id.label("item_id"),
+        InventoryItem.name,
+        total_quantity.label("total_quantity_sold")
+    ).join(SalesFact, InventoryItem.id == SalesFact.inventory_item_id)
+
+    return _sold_facts(query, tenant_id, start_date, end_date).group_by(
+        InventoryItem.id, InventoryItem.name
+    ).order_by(total_quantity.desc()).limit(limit).all()
+
+
+def get_sales_breakdown(db: Session, tenant_id: str, group_by: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[dict]:
+    """
+    Quantity, amount and order lines sold, grouped by any of customer, item (or composition),
+    variant and month. Raises ValueError for an unknown dimension.
+    """
+    unknown = [dimension for dimension in group_by if dimension not in SALES_BREAKDOWN_DIMENSIONS]
+    if unknown or not group_by:
+        raise ValueError(f"group_by must be one or more of {', '.join(SALES_BREAKDOWN_DIMENSIONS)}.")
+
+    columns, keys, order_by = [], [], []
+    query = db.query(SalesFact)
+    if "customer" in group_by:
+        customer_name = BusinessPartner.name.label("customer_name")
+        columns += [SalesFact.customer_id, customer_name]
+        keys += [SalesFact.customer_id, BusinessPartner.name]
+        query = query.outerjoin(BusinessPartner, BusinessPartner.id == SalesFact.customer_id)
+    if "item" in group_by:
+        item_name = func.coalesce(InventoryItem.name, Composition.name)
+        columns += [SalesFact.inventory_item_id.label("item_id"), SalesFact.composition_id, item_name.label("item_name")]
+        keys += [SalesFact.inventory_item_id, SalesFact.composition_id, item_name]
+        query = query.outerjoin(InventoryItem, InventoryItem.id == SalesFact.inventory_item_id).outerjoin(
+            Composition, Composition.id == SalesFact.composition_id
+        )
+    if "variant" in group_by:
+        columns += [SalesFact.variant_id, InventoryItemVariant.name.label("variant_name")]
+        keys += [SalesFact.variant_id, InventoryItemVariant.name]
+        query = query.outerjoin(InventoryItemVariant, InventoryItemVariant.id == SalesFact.variant_id)
+    if "month" in group_by:
+        month = cast(func.date_trunc('month', SalesFact.sale_date), Date)
+        columns.append(month.label("month"))
+        keys.append(month)
+        order_by.append(month)
+
+    total_quantity = func.sum(SalesFact.quantity)
+    query = query.with_entities(
+        *columns,
+        total_quantity.label("total_quantity_sold"),
+        func.sum(SalesFact.line_total).label("total_amount"),
+        func.sum(SalesFact.order_lines).label("order_lines"),
+    )
+    rows = _sold_facts(query, tenant_id, start_date, end_date).group_by(*keys).order_by(
+        *order_by, total_quantity.desc()
+    ).all()
+    return [row._asdict() for row in rows]
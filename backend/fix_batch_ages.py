@@ -7,20 +7,21 @@ Usage examples:
   python fix_batch_ages.py --batch-id 16 --tenant-id tenant_1
 
 This script walks DailyBatch rows in ascending date order and recomputes `age`
-using `calculate_age_progression`, propagating from the batch's base age and
-ensuring subsequent rows increment from the previously computed age. It also
+using `calculate_age_progression_array`, propagating from the batch's base age (or
+the last row before --from-date) in a single vectorized call. It also
 recomputes `opening_count` from previous row's `closing_count`.
 """
 
 import argparse
 from datetime import datetime, date
+from decimal import Decimal
 from typing import Optional
 import logging
 
 from database import SessionLocal
 from models.batch import Batch as BatchModel
 from models.daily_batch import DailyBatch as DailyBatchModel
-from utils.age_utils import calculate_age_progression
+from utils.age_utils import calculate_age_progression, calculate_age_progression_array
 
 logger = logging.getLogger("fix_batch_ages")
 logging.basicConfig(level=logging.INFO)
@@ -49,11 +50,10 @@ def fix_batch_ages(batch_id: int, tenant_id: Optional[str] = None, from_date: Op
             logger.error("Batch %s not found (tenant: %s)", batch_id, tenant_id)
             return
 
-        initial_age = 0.0
         try:
-            initial_age = float(batch.age)
+            initial_age = Decimal(str(batch.age))
         except Exception:
-            initial_age = 0.0
+            initial_age = Decimal('0.0')
 
         batch_start_date = batch.date if isinstance(batch.date, date) else batch.date.date()
 
@@ -66,45 +66,42 @@ def fix_batch_ages(batch_id: int, tenant_id: Optional[str] = None, from_date: Op
             logger.info("No DailyBatch rows found for batch %s", batch_id)
             return
 
-        changed = 0
-        prev_age = None
-        prev_date = None
-        prev_closing = None
-
-        for idx, row in enumerate(rows):
-            row_date = row.batch_date if isinstance(row.batch_date, date) else row.batch_date.date()
-
-            # If from_date is specified, skip rows before it (user asked to fix from 26-06-2025 onwards)
-            if from_date and row_date < from_date:
-                # Still need to set prev values so subsequent rows compute correctly
-                prev_date = row_date
-                try:
-                    prev_age = float(row.age)
-                except Exception:
-                    # fallback compute from batch start
-                    prev_age = calculate_age_progression(initial_age, (row_date - batch_start_date).days)
-                prev_closing = row.closing_count
-                continue
-
-            if prev_date is None:
-                # First effective row: compute relative to batch start
-                days_diff = (row_date - batch_start_date).days
-                new_age = calculate_age_progression(initial_age, days_diff)
-                opening_count = batch.opening_count
+        # Rows before from_date are kept as they are; the last of them anchors the rest
+        # (user asked to fix from 26-06-2025 onwards).
+        row_dates = [row.batch_date if isinstance(row.batch_date, date) else row.batch_date.date() for row in rows]
+        first_fixed = 0
+        if from_date:
+            while first_fixed < len(rows) and row_dates[first_fixed] < from_date:
+                first_fixed += 1
+
+        if first_fixed == 0:
+            # First effective row: compute relative to batch start
+            anchor_age, anchor_date = initial_age, batch_start_date
+            prev_closing = batch.opening_count
+        else:
+            anchor_row = rows[first_fixed - 1]
+            anchor_date = row_dates[first_fixed - 1]
+            if anchor_row.age is not None:
+                anchor_age = Decimal(str(anchor_row.age))
             else:
-                days_diff = (row_date - prev_date).days
-                new_age = calculate_age_progression(prev_age, days_diff)
-                opening_count = prev_closing
+                # fallback compute from batch start
+                anchor_age = calculate_age_progression(initial_age, (anchor_date - batch_start_date).days)
+            prev_closing = anchor_row.closing_count
 
-            age_str = str(round(new_age, 1))
+        # Every age follows from the anchor's age, so all of them come out of one vectorized call
+        new_ages = calculate_age_progression_array(
+            anchor_age, [(row_date - anchor_date).days for row_date in row_dates[first_fixed:]]
+        )
 
+        changed = 0
+        for row, new_age in zip(rows[first_fixed:], new_ages):
             updated = False
-            if row.age != age_str:
-                row.age = age_str
+            if row.age != new_age:
+                row.age = new_age
                 updated = True
 
-            if row.opening_count != opening_count:
-                row.opening_count = opening_count
+            if row.opening_count != prev_closing:
+                row.opening_count = prev_closing
                 updated = True
 
             if updated:
@@ -112,8 +109,6 @@ def fix_batch_ages(batch_id: int, tenant_id: Optional[str] = None, from_date: Op
                 db.add(row)
 
             # advance prev values
-            prev_age = new_age
-            prev_date = row_date
             prev_closing = row.closing_count
 
         if dry_run:
@@ -16,10 +16,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.openapi.utils import get_openapi
-from database import Base, engine
+from database import Base, SessionLocal, engine
 from fastapi import FastAPI, Depends
 # Import your new dependency
 from utils.dependencies import require_active_subscription_for_writes
+from utils.json_response import FastJSONResponse
+from crud.daily_batch_upload_job import fail_interrupted_upload_jobs
 
 # Import all routers to register their endpoints
 import routers.reports as reports
@@ -94,6 +96,8 @@ Base.metadata.create_all(bind=engine)
 # Initialize FastAPI application
 app = FastAPI(
     title="Poultry Management API",
+    # Render responses with orjson (Decimal, date and enum values encoded in one pass)
+    default_response_class=FastJSONResponse,
     # This applies the check to all routes automatically
     dependencies=[Depends(require_active_subscription_for_writes)] 
 )
@@ -116,7 +120,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"]  # Expose this header
+    expose_headers=["Content-Disposition", "ETag"]  # Expose these headers
 )
 
 def custom_openapi():
@@ -151,6 +155,26 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 
+@app.on_event("startup")
+def fail_stale_upload_jobs():
+    """
+    Fails the daily-batch upload jobs a previous process left queued or running: their
+    background tasks died with it, so pollers would otherwise wait on them forever. Only jobs
+    without progress for UPLOAD_JOB_STALE_MINUTES are failed, so the jobs other workers or
+    replicas are still running survive a rolling deploy.
+    """
+    db = SessionLocal()
+    try:
+        failed = fail_interrupted_upload_jobs(db)
+        if failed:
+            logger.info(f"Marked {failed} interrupted upload jobs as failed.")
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"Could not fail interrupted upload jobs: {e}")
+    finally:
+        db.close()
+
+
 # Register all routers with the FastAPI application
 # Each router handles a specific functional area of the poultry management system
 app.include_router(reports.router)
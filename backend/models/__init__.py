@@ -1,35 +1,42 @@
-from models.batch import Batch
-from models.daily_batch import DailyBatch
-from models.composition import Composition
-from models.composition_usage_history import CompositionUsageHistory
-from models.composition_usage_item import CompositionUsageItem
-from models.egg_room_reports import EggRoomReport
-from models.bovanswhitelayerperformance import BovansWhiteLayerPerformance
-from models.app_config import AppConfig
-from models.purchase_orders import PurchaseOrder
-from models.inventory_items import InventoryItem
-from models.purchase_order_items import PurchaseOrderItem
-from models.payments import Payment
-from models.sales_order_items import SalesOrderItem
-from models.sales_orders import SalesOrder
-from models.sales_payments import SalesPayment
-from models.business_partners import BusinessPartner
-from models.inventory_item_audit import InventoryItemAudit
-from models.inventory_item_in_composition import InventoryItemInComposition
-from models.inventory_item_usage_history import InventoryItemUsageHistory
-from models.operational_expenses import OperationalExpense
-from models.audit_log import AuditLog
-from models.shed import Shed
-from models.batch_shed_assignment import BatchShedAssignment
-from models.inventory_item_variant import InventoryItemVariant
-from models.chart_of_accounts import ChartOfAccounts
-from models.journal_entry import JournalEntry
-from models.journal_item import JournalItem
-from models.financial_settings import FinancialSettings
-from models.bv300_layer_performance import BV300LayerPerformance
-from models.bv300_rearing_performance import BV300RearingPerformance
-from models.subscription import Subscription
-from models.egg_price import EggPrice
-from models.tenant_feature import TenantFeature
-
-__all__ = ['AppConfig', 'Batch', 'BovansWhiteLayerPerformance', 'CompositionUsageHistory', 'CompositionUsageItem', 'Composition', 'DailyBatch', 'EggRoomReport', 'Payment', 'PurchaseOrder', 'PurchaseOrderItem', 'InventoryItem', 'SalesOrderItem', 'SalesOrder', 'SalesPayment', 'BusinessPartner', 'InventoryItemAudit', 'InventoryItemInComposition', 'InventoryItemUsageHistory', 'OperationalExpense', 'AuditLog', 'Shed', 'BatchShedAssignment', 'InventoryItemVariant', 'ChartOfAccounts', 'JournalEntry', 'JournalItem', 'FinancialSettings', 'BV300LayerPerformance', 'BV300RearingPerformance', 'Subscription', 'EggPrice', 'TenantFeature']
+from models.batch import Batch
+from models.batch_week_fact import BatchWeekFact
+from models.daily_batch import DailyBatch
+from models.daily_batch_upload_job import DailyBatchUploadJob
+from models.daily_feed_rollup import DailyFeedRollup
+from models.composition import Composition
+from models.composition_usage_history import CompositionUsageHistory
+from models.composition_usage_item import CompositionUsageItem
+from models.egg_room_reports import EggRoomReport
+from models.egg_stock_checkpoint import EggStockCheckpoint
+from models.bovanswhitelayerperformance import BovansWhiteLayerPerformance
+from models.effective_standard_curve import EffectiveStandardCurve
+from models.app_config import AppConfig
+from models.purchase_orders import PurchaseOrder
+from models.inventory_items import InventoryItem
+from models.purchase_order_items import PurchaseOrderItem
+from models.payments import Payment
+from models.sales_order_items import SalesOrderItem
+from models.sales_orders import SalesOrder
+from models.sales_fact import SalesFact
+from models.sales_payments import SalesPayment
+from models.business_partners import BusinessPartner
+from models.inventory_item_audit import InventoryItemAudit
+from models.inventory_item_in_composition import InventoryItemInComposition
+from models.inventory_item_usage_history import InventoryItemUsageHistory
+from models.operational_expenses import OperationalExpense
+from models.monthly_production_rollup import MonthlyProductionRollup
+from models.audit_log import AuditLog
+from models.shed import Shed
+from models.batch_shed_assignment import BatchShedAssignment
+from models.inventory_item_variant import InventoryItemVariant
+from models.chart_of_accounts import ChartOfAccounts
+from models.journal_entry import JournalEntry
+from models.journal_item import JournalItem
+from models.financial_settings import FinancialSettings
+from models.bv300_layer_performance import BV300LayerPerformance
+from models.bv300_rearing_performance import BV300RearingPerformance
+from models.subscription import Subscription
+from models.egg_price import EggPrice
+from models.tenant_feature import TenantFeature
+
+__all__ = ['AppConfig', 'Batch', 'BatchWeekFact', 'BovansWhiteLayerPerformance', 'EffectiveStandardCurve', 'CompositionUsageHistory', 'CompositionUsageItem', 'Composition', 'DailyBatch', 'DailyBatchUploadJob', 'DailyFeedRollup', 'EggRoomReport', 'EggStockCheckpoint', 'Payment', 'PurchaseOrder', 'PurchaseOrderItem', 'InventoryItem', 'SalesOrderItem', 'SalesOrder', 'SalesFact', 'SalesPayment', 'BusinessPartner', 'InventoryItemAudit', 'InventoryItemInComposition', 'InventoryItemUsageHistory', 'OperationalExpense', 'MonthlyProductionRollup', 'AuditLog', 'Shed', 'BatchShedAssignment', 'InventoryItemVariant', 'ChartOfAccounts', 'JournalEntry', 'JournalItem', 'FinancialSettings', 'BV300LayerPerformance', 'BV300RearingPerformance', 'Subscription', 'EggPrice', 'TenantFeature']
@@ -0,0 +1,83 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, Numeric
+from sqlalchemy.orm import Session, attributes
+from database import Base
+from models.derived_tables import register_derived_table
+
+# session.info key holding batch_id -> (from_date, to_date) ranges whose weeks must be refreshed before commit
+STALE_BATCHES_KEY = "batch_week_facts_stale"
+
+
+class BatchWeekFact(Base):
+    """
+    Weekly totals of a batch's DailyBatch rows, one row per week of age.
+
+    age_week W holds the days aged W.1 to W.7 (the same bucket as the weekly layer report's
+    week W + 1). The rows are derived data: crud.batch_week_facts refreshes the weeks holding
+    the days whose daily rows or composition usages change in a committed transaction.
+    """
+    __tablename__ = "batch_week_facts"
+
+    tenant_id = Column(String, primary_key=True)
+    batch_id = Column(Integer, ForeignKey("batch.id", ondelete="CASCADE"), primary_key=True)
+    age_week = Column(Integer, primary_key=True)
+    days = Column(Integer, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    opening_count = Column(Integer)  # Opening count of the first day
+    closing_count = Column(Integer)  # Closing count of the last day
+    highest_age = Column(Numeric(4, 1))
+    mortality = Column(Integer, nullable=False, default=0)
+    culls = Column(Integer, nullable=False, default=0)
+    table_eggs = Column(Integer, nullable=False, default=0)
+    jumbo = Column(Integer, nullable=False, default=0)
+    cr = Column(Integer, nullable=False, default=0)
+    birds_added = Column(Integer, nullable=False, default=0)
+    hd_sum = Column(Float, nullable=False, default=0)  # Sum of the daily HD ratios
+    bird_days = Column(Integer, nullable=False, default=0)  # Sum of daily opening counts
+    bird_days_count = Column(Integer, nullable=False, default=0)  # Days with an opening count
+    feed_kg = Column(Numeric, nullable=False, default=0)  # Net feed from daily_feed_rollup
+
+
+def mark_batch_week_facts_stale(session: Session, batch_ids, from_date: date = None, to_date: date = None):
+    """
+    Schedules the weeks of batch_ids that hold days from from_date to to_date (inclusive, open-ended
+    when None, so without dates every week) for a refresh when the session commits.
+    """
+    stale = session.info.setdefault(STALE_BATCHES_KEY, {})
+    for batch_id in batch_ids:
+        if batch_id is not None:
+            stale.setdefault(batch_id, set()).add((from_date, to_date))
+
+
+def _collect_batch_week_changes(session, objects):
+    for obj in objects:
+        table = getattr(obj, "__tablename__", None)
+        if table == "batch":
+            mark_batch_week_facts_stale(session, [obj.id])
+        elif table == "daily_batch":
+            # Old values too, so moving a row to another day refreshes both days
+            for value in attributes.get_history(obj, "batch_date").sum():
+                mark_batch_week_facts_stale(session, [obj.batch_id], value, value)
+        elif table == "composition_usage_history":
+            used_at_values = attributes.get_history(obj, "used_at").sum()
+            if not used_at_values:
+                mark_batch_week_facts_stale(session, [obj.batch_id])
+            for value in used_at_values:
+                if isinstance(value, datetime):
+                    # daily_feed_rollup buckets timestamps in the database's time zone; cover both neighbouring days
+                    mark_batch_week_facts_stale(session, [obj.batch_id], value.date() - timedelta(days=1), value.date() + timedelta(days=1))
+                else:
+                    mark_batch_week_facts_stale(session, [obj.batch_id], value, value)
+
+
+def _refresh_stale_batch_weeks(session):
+    stale = session.info.pop(STALE_BATCHES_KEY, None)
+    if stale:
+        # Imported here because crud.batch_week_facts imports this module
+        from crud.batch_week_facts import refresh_batch_week_facts
+        refresh_batch_week_facts(session, stale)
+
+
+register_derived_table("batch_week_facts", (STALE_BATCHES_KEY,), _collect_batch_week_changes, _refresh_stale_batch_weeks)
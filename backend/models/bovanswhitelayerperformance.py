@@ -1,5 +1,5 @@
 from database import Base
-from sqlalchemy import DECIMAL, Column, Integer, String
+from sqlalchemy import DECIMAL, Column, Index, Integer, String
 from models.audit_mixin import TimestampMixin
 
 class BovansWhiteLayerPerformance(Base, TimestampMixin):
@@ -14,5 +14,7 @@ class BovansWhiteLayerPerformance(Base, TimestampMixin):
     body_weight_g = Column(Integer, nullable=False)
     tenant_id = Column(String, index=True)
 
+    __table_args__ = (Index('ix_bovanswhitelayerperformance_tenant_id_age_weeks', 'tenant_id', 'age_weeks'),)
+
     def __repr__(self):
         return f"<BovansPerformance(age_weeks={self.age_weeks}, livability={self.livability_percent})>"
\ No newline at end of file
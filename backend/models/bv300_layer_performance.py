@@ -1,5 +1,5 @@
 from database import Base
-from sqlalchemy import DECIMAL, Column, Integer, String
+from sqlalchemy import DECIMAL, Column, Index, Integer, String
 from models.audit_mixin import TimestampMixin
 
 class BV300LayerPerformance(Base, TimestampMixin):
@@ -16,5 +16,7 @@ class BV300LayerPerformance(Base, TimestampMixin):
     body_weight_g = Column(Integer, nullable=False)
     tenant_id = Column(String, index=True)
 
+    __table_args__ = (Index('ix_bv300_layer_performance_tenant_id_age_weeks', 'tenant_id', 'age_weeks'),)
+
     def __repr__(self):
         return f"<BV300LayerPerformance(age_weeks={self.age_weeks}, lay_percent={self.lay_percent})>"
\ No newline at end of file
@@ -1,5 +1,5 @@
 from database import Base
-from sqlalchemy import DECIMAL, Column, Integer, String
+from sqlalchemy import DECIMAL, Column, Index, Integer, String
 from models.audit_mixin import TimestampMixin
 
 class BV300RearingPerformance(Base, TimestampMixin):
@@ -14,5 +14,7 @@ class BV300RearingPerformance(Base, TimestampMixin):
     feed_type = Column(String(50), nullable=True)
     tenant_id = Column(String, index=True)
 
+    __table_args__ = (Index('ix_bv300_rearing_performance_tenant_id_age_weeks', 'tenant_id', 'age_weeks'),)
+
     def __repr__(self):
         return f"<BV300RearingPerformance(age_weeks={self.age_weeks}, livability={self.livability_percent})>"
\ No newline at end of file
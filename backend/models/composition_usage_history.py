@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, Numeric
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, Numeric, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -6,6 +6,8 @@ import pytz
 
 class CompositionUsageHistory(Base):
     __tablename__ = "composition_usage_history"
+    # Usage reports filter a tenant's usages by used_at range
+    __table_args__ = (Index('ix_composition_usage_history_tenant_id_used_at', 'tenant_id', 'used_at'),)
     id = Column(Integer, primary_key=True, index=True)
     composition_id = Column(Integer, ForeignKey("composition.id"), nullable=False)
     composition_name = Column(String, nullable=False)  # Snapshot of composition name
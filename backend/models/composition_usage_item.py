@@ -6,12 +6,13 @@ from models.inventory_items import InventoryItem
 class CompositionUsageItem(Base):
     __tablename__ = "composition_usage_item"
     id = Column(Integer, primary_key=True, index=True)
-    usage_history_id = Column(Integer, ForeignKey("composition_usage_history.id"), nullable=False)
+    usage_history_id = Column(Integer, ForeignKey("composition_usage_history.id"), nullable=False, index=True)
     inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False)
     weight = Column(Numeric(10, 3), nullable=False)
     item_name = Column(String) # Snapshot for historical accuracy
     item_category = Column(String) # Snapshot for historical accuracy
     wastage_percentage = Column(Numeric(5, 2), nullable=True) # e.g., 2.50%
+    unit_cost = Column(Numeric(10, 3), nullable=True) # Snapshot of the item's average_cost at usage time
 
     usage_history = relationship("CompositionUsageHistory", back_populates="items")
     inventory_item = relationship("InventoryItem")
@@ -1,31 +1,30 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, case, cast, Date, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, case, Date, Numeric, select
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
 from sqlalchemy.ext.hybrid import hybrid_property
-from models.bovanswhitelayerperformance import BovansWhiteLayerPerformance
-from models.bv300_layer_performance import BV300LayerPerformance
-from models.bv300_rearing_performance import BV300RearingPerformance
-from models.app_config import AppConfig
+from models.effective_standard_curve import MAX_LOOKUP_AGE, EffectiveStandardCurve, standard_curve_onclause
 from sqlalchemy.orm import object_session
-from models.composition_usage_history import CompositionUsageHistory
+from models.daily_feed_rollup import DailyFeedRollup
 from models.inventory_items import InventoryItem
 from decimal import Decimal
+from typing import List
 from models.audit_mixin import TimestampMixin
+from utils.standards_cache import get_standard_source_value, get_standard_row
 import pytz
 
 
 def _get_standard_source(session, tenant_id):
     if not tenant_id or not session:
         return "bovans"
-    config = session.query(AppConfig).filter(
-        AppConfig.tenant_id == tenant_id,
-        AppConfig.name == "performance_standard_source"
-    ).first()
-    if not config or not config.value:
+    return _normalize_standard_source(get_standard_source_value(session, tenant_id))
+
+
+def _normalize_standard_source(source_value):
+    if not source_value:
         return "bovans"
 
-    normalized = config.value.strip().lower().replace('-', '').replace('_', '')
+    normalized = source_value.strip().lower().replace('-', '').replace('_', '')
     if normalized == "bv300":
         return "bv300"
 
@@ -67,21 +66,89 @@ def _get_standard_performance(session, tenant_id, age_weeks):
     if age_weeks is None:
         return None
 
+    curve, age_weeks = _get_standard_curve_key(source, age_weeks)
+    return get_standard_row(session, tenant_id, curve, age_weeks)
+
+
+def _get_standard_curve_key(source, age_weeks):
+    """(curve, age_weeks) of the standard row for a lookup age, in utils.standards_cache terms."""
     if source == "bv300":
         if age_weeks < 19:
-            model = BV300RearingPerformance
+            curve = "bv300_rearing"
             age_weeks = min(max(age_weeks, 1), 18)
         else:
-            model = BV300LayerPerformance
+            curve = "bv300_layer"
             age_weeks = min(max(age_weeks, 19), 80)
     else:
-        model = BovansWhiteLayerPerformance
+        curve = "bovans"
         age_weeks = min(max(age_weeks, 1), 100)
 
-    return session.query(model).filter(
-        model.age_weeks == age_weeks,
-        model.tenant_id == tenant_id
-    ).first()
+    return curve, age_weeks
+
+
+def get_standard_hen_day_percentage(session, tenant_id, age):
+    """Standard lay percentage for a batch of the tenant at age (weeks.days), or None."""
+    try:
+        age_in_weeks = int(age)
+    except (ValueError, TypeError):
+        return None
+
+    source = _get_standard_source(session, tenant_id)
+    # bv300 rearing has no lay_percent — only layer phase does
+    if source == "bv300" and age_in_weeks < 18:
+        return None
+
+    lookup_age = _get_standard_lookup_age(age_in_weeks, source)
+    standard_performance = _get_standard_performance(session, tenant_id, lookup_age)
+
+    if not standard_performance:
+        return None
+
+    if hasattr(standard_performance, "lay_percent"):
+        return standard_performance.lay_percent
+
+    return None
+
+
+def get_standard_feed_in_grams(session, tenant_id, age):
+    """Standard daily feed intake per bird in grams for a batch of the tenant at age, or None."""
+    try:
+        age_in_weeks = int(age)
+    except (ValueError, TypeError):
+        return None
+
+    source = _get_standard_source(session, tenant_id)
+    lookup_age = _get_standard_lookup_age(age_in_weeks, source)
+    standard_performance = _get_standard_performance(session, tenant_id, lookup_age)
+
+    if not standard_performance or not hasattr(standard_performance, "feed_intake_per_day_g"):
+        return None
+
+    return standard_performance.feed_intake_per_day_g
+
+
+def resolve_standard_curve(source_value, curves) -> List[dict]:
+    """
+    The standards the hybrids below pick for each week of life 1..MAX_LOOKUP_AGE (age W.x is
+    week W + 1), given the performance_standard_source value and the curves keyed by age_weeks
+    (see utils.standards_cache). These are a tenant's effective_standard_curve rows.
+    """
+    source = _normalize_standard_source(source_value)
+    rows = []
+    for lookup_age in range(1, MAX_LOOKUP_AGE + 1):
+        age_in_weeks = lookup_age - 1
+        curve, age_weeks = _get_standard_curve_key(source, _get_standard_lookup_age(age_in_weeks, source))
+        standard = curves[curve].get(age_weeks)
+        if standard is None:
+            continue
+        rows.append({
+            "lookup_age": lookup_age,
+            "source": source,
+            # bv300 rearing has no lay_percent — only layer phase does
+            "lay_percent": None if source == "bv300" and age_in_weeks < 18 else getattr(standard, "lay_percent", None),
+            "feed_intake_per_day_g": getattr(standard, "feed_intake_per_day_g", None),
+        })
+    return rows
 
 
 class DailyBatch(Base, TimestampMixin):
@@ -138,166 +205,39 @@ class DailyBatch(Base, TimestampMixin):
     
     @hybrid_property
     def standard_hen_day_percentage(self):
+        # Set for rows outside a session by crud.daily_batch.preload_standards
+        if '_preloaded_standard_hen_day_percentage' in self.__dict__:
+            return self.__dict__['_preloaded_standard_hen_day_percentage']
+
         session = object_session(self)
         if not session:
             return None
-
-        try:
-            age_in_weeks = int(self.age)
-        except (ValueError, TypeError):
-            return None
-
-        source = _get_standard_source(session, self.tenant_id)
-        # bv300 rearing has no lay_percent — only layer phase does
-        if source == "bv300" and age_in_weeks < 18:
-            return None
-
-        lookup_age = _get_standard_lookup_age(age_in_weeks, source)
-        standard_performance = _get_standard_performance(session, self.tenant_id, lookup_age)
-
-        if not standard_performance:
-            return None
-
-        if hasattr(standard_performance, "lay_percent"):
-            return standard_performance.lay_percent
-
-        return None
+        return get_standard_hen_day_percentage(session, self.tenant_id, self.age)
 
     @standard_hen_day_percentage.expression
     def standard_hen_day_percentage(cls):
-        from sqlalchemy import select, Integer, case, cast, func
-
-        source_expr = select(func.coalesce(AppConfig.value, 'bovans')).where(
-            AppConfig.tenant_id == cls.tenant_id,
-            AppConfig.name == 'performance_standard_source'
-        ).scalar_subquery()
-        normalized_source = func.replace(func.replace(func.lower(source_expr), '_', ''), '-', '')
-        standard_source = case(
-            (normalized_source == 'bv300', 'bv300'),
-            (normalized_source == 'bovans', 'bovans'),
-            else_='bovans'
-        )
-
-        age_in_weeks_expr = cast(cls.age, Integer)
-        bovans_lookup_age = case(
-            (age_in_weeks_expr < 1, 1),
-            (age_in_weeks_expr >= 100, 100),
-            else_=age_in_weeks_expr + 1
-        )
-        bv300_lookup_age = case(
-            (age_in_weeks_expr < 1, 1),
-            (age_in_weeks_expr < 18, (age_in_weeks_expr + 1)),
-            else_=(age_in_weeks_expr + 1)
-        )
-        bv300_lookup_age = case(
-            (age_in_weeks_expr < 18, case((age_in_weeks_expr < 1, 1), else_=age_in_weeks_expr + 1)),
-            else_=case((age_in_weeks_expr < 19, 19), else_=case((age_in_weeks_expr > 80, 80), else_=age_in_weeks_expr + 1))
-        )
-
-        lookup_age_expr = case(
-            (standard_source == 'bv300', bv300_lookup_age),
-            else_=bovans_lookup_age
-        )
-
-        bv300_rearing_lay = select(BV300RearingPerformance.lay_percent).where(
-            BV300RearingPerformance.age_weeks == lookup_age_expr,
-            BV300RearingPerformance.tenant_id == cls.tenant_id
-        ).limit(1).scalar_subquery()
-
-        bv300_layer_lay = select(BV300LayerPerformance.lay_percent).where(
-            BV300LayerPerformance.age_weeks == lookup_age_expr,
-            BV300LayerPerformance.tenant_id == cls.tenant_id
-        ).limit(1).scalar_subquery()
-
-        bovans_lay = select(BovansWhiteLayerPerformance.lay_percent).where(
-            BovansWhiteLayerPerformance.age_weeks == lookup_age_expr,
-            BovansWhiteLayerPerformance.tenant_id == cls.tenant_id
-        ).limit(1).scalar_subquery()
-
-        bv300_lay = case((lookup_age_expr <= 18, bv300_rearing_lay), else_=bv300_layer_lay)
-
-        return case(
-            (standard_source == 'bv300', bv300_lay),
-            else_=bovans_lay
-        )
+        # Primary key lookup in the tenant's resolved curve; aggregate queries can instead
+        # outerjoin EffectiveStandardCurve on standard_curve_onclause(DailyBatch).
+        return select(EffectiveStandardCurve.lay_percent).where(
+            standard_curve_onclause(cls)
+        ).correlate(cls).scalar_subquery()
     
     @hybrid_property
     def standard_feed_in_grams(self):
+        # Set for rows outside a session by crud.daily_batch.preload_standards
+        if '_preloaded_standard_feed_in_grams' in self.__dict__:
+            return self.__dict__['_preloaded_standard_feed_in_grams']
+
         session = object_session(self)
         if not session:
             return None
-
-        try:
-            age_in_weeks = int(self.age)
-        except (ValueError, TypeError):
-            return None
-
-        source = _get_standard_source(session, self.tenant_id)
-        lookup_age = _get_standard_lookup_age(age_in_weeks, source)
-        standard_performance = _get_standard_performance(session, self.tenant_id, lookup_age)
-
-        if not standard_performance or not hasattr(standard_performance, "feed_intake_per_day_g"):
-            return None
-
-        return standard_performance.feed_intake_per_day_g
+        return get_standard_feed_in_grams(session, self.tenant_id, self.age)
 
     @standard_feed_in_grams.expression
     def standard_feed_in_grams(cls):
-        from sqlalchemy import select, case, cast, Integer, func
-
-        source_expr = select(func.coalesce(AppConfig.value, 'bovans')).where(
-            AppConfig.tenant_id == cls.tenant_id,
-            AppConfig.name == 'performance_standard_source'
-        ).scalar_subquery()
-        normalized_source = func.replace(func.replace(func.lower(source_expr), '_', ''), '-', '')
-        standard_source = case(
-            (normalized_source == 'bv300', 'bv300'),
-            (normalized_source == 'bovans', 'bovans'),
-            else_='bovans'
-        )
-
-        age_in_weeks_expr = cast(cls.age, Integer)
-        bovans_lookup_age = case(
-            (age_in_weeks_expr < 1, 1),
-            (age_in_weeks_expr >= 100, 100),
-            else_=age_in_weeks_expr + 1
-        )
-        bv300_lookup_age = case(
-            (age_in_weeks_expr < 1, 1),
-            (age_in_weeks_expr < 18, age_in_weeks_expr + 1),
-            else_=age_in_weeks_expr + 1
-        )
-        bv300_lookup_age = case(
-            (age_in_weeks_expr < 18, case((age_in_weeks_expr < 1, 1), else_=age_in_weeks_expr + 1)),
-            else_=case((age_in_weeks_expr < 19, 19), else_=case((age_in_weeks_expr > 80, 80), else_=age_in_weeks_expr + 1))
-        )
-
-        lookup_age_expr = case(
-            (standard_source == 'bv300', bv300_lookup_age),
-            else_=bovans_lookup_age
-        )
-
-        bv300_rearing_feed = select(BV300RearingPerformance.feed_intake_per_day_g).where(
-            BV300RearingPerformance.age_weeks == lookup_age_expr,
-            BV300RearingPerformance.tenant_id == cls.tenant_id
-        ).limit(1).scalar_subquery()
-
-        bv300_layer_feed = select(BV300LayerPerformance.feed_intake_per_day_g).where(
-            BV300LayerPerformance.age_weeks == lookup_age_expr,
-            BV300LayerPerformance.tenant_id == cls.tenant_id
-        ).limit(1).scalar_subquery()
-
-        bovans_feed = select(BovansWhiteLayerPerformance.feed_intake_per_day_g).where(
-            BovansWhiteLayerPerformance.age_weeks == lookup_age_expr,
-            BovansWhiteLayerPerformance.tenant_id == cls.tenant_id
-        ).limit(1).scalar_subquery()
-
-        bv300_feed = case((lookup_age_expr <= 18, bv300_rearing_feed), else_=bv300_layer_feed)
-
-        return case(
-            (standard_source == 'bv300', bv300_feed),
-            else_=bovans_feed
-        )
+        return select(EffectiveStandardCurve.feed_intake_per_day_g).where(
+            standard_curve_onclause(cls)
+        ).correlate(cls).scalar_subquery()
 
     @hybrid_property
     def standard_feed_in_kg(self):
@@ -331,47 +271,29 @@ class DailyBatch(Base, TimestampMixin):
         
     @hybrid_property
     def feed_in_grams(self):
+        # Set for whole result sets by crud.daily_batch.preload_feed_in_grams
+        preloaded = self.__dict__.get('_preloaded_feed_in_grams')
+        if preloaded is not None:
+            return preloaded
+
         session = object_session(self)
         if not session:
             return 0
 
-        total_feed_kg = Decimal(0)
-        
-        usages = session.query(CompositionUsageHistory).filter(
-            CompositionUsageHistory.batch_id == self.batch_id,
-            func.date(CompositionUsageHistory.used_at) == self.batch_date
-        ).all()
-
-        for usage in usages:
-            for item_in_comp in usage.items:
-                if item_in_comp.item_category == 'Feed':
-                    # Calculate net feed after wastage is lost
-                    base_feed = Decimal(str(item_in_comp.weight)) * Decimal(usage.times)
-                    wastage_multiplier = Decimal('1') - (Decimal(str(item_in_comp.wastage_percentage or 0)) / Decimal('100'))
-                    total_feed_kg += base_feed * wastage_multiplier
+        # Net feed after wastage, maintained per batch and day by crud.daily_feed_rollup
+        total_feed_kg = session.query(DailyFeedRollup.net_feed_kg).filter(
+            DailyFeedRollup.batch_id == self.batch_id,
+            DailyFeedRollup.feed_date == self.batch_date
+        ).scalar() or Decimal(0)
 
         return float(total_feed_kg * 1000)
 
     @feed_in_grams.expression
     def feed_in_grams(cls):
-        from models.composition_usage_item import CompositionUsageItem
-        from sqlalchemy import select
-
         return func.coalesce(
-            select(
-                func.sum(
-                    case(
-                        (CompositionUsageItem.item_category == 'Feed',
-                         CompositionUsageItem.weight * CompositionUsageHistory.times * 1000 * (1 - func.coalesce(CompositionUsageItem.wastage_percentage, 0) / 100)),
-                        else_=0
-                    )
-                )
-            ).select_from(CompositionUsageHistory).join(
-                CompositionUsageItem,
-                CompositionUsageHistory.id == CompositionUsageItem.usage_history_id
-            ).where(
-                CompositionUsageHistory.batch_id == cls.batch_id,
-                func.date(CompositionUsageHistory.used_at) == cls.batch_date
+            select(DailyFeedRollup.net_feed_kg * 1000).where(
+                DailyFeedRollup.batch_id == cls.batch_id,
+                DailyFeedRollup.feed_date == cls.batch_date
             ).correlate(cls).scalar_subquery(),
             0
         )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from database import Base
+from models.audit_mixin import TimestampMixin
+
+
+class DailyBatchUploadJob(Base, TimestampMixin):
+    """
+    A daily-batch Excel upload handed to the background worker.
+
+    The uploaded file is persisted at file_path until the worker has processed it;
+    the counters are updated while the sheet is parsed so clients can poll progress.
+    """
+    __tablename__ = "daily_batch_upload_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(String, index=True, nullable=False)
+    kind = Column(String, nullable=False)  # 'weekly_report' or 'daily_report'
+    batch_id = Column(Integer, ForeignKey("batch.id"), nullable=True)  # Only set for weekly reports
+    filename = Column(String, nullable=True)
+    file_path = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+    rows_parsed = Column(Integer, nullable=False, default=0)
+    rows_written = Column(Integer, nullable=False, default=0)
+    rows_skipped = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=False, default=list)
+    message = Column(String, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Numeric
+from database import Base
+
+
+class DailyFeedRollup(Base):
+    """
+    Feed consumed per batch and day, maintained by crud.daily_feed_rollup from
+    composition usages so reports don't re-aggregate composition_usage_item.
+
+    feed_date is date(used_at) of the usages. gross_feed_kg and net_feed_kg (after wastage)
+    count 'Feed' items only; feed_cost is the cost of every item in the compositions used,
+    at the unit cost recorded on each usage item.
+    """
+    __tablename__ = "daily_feed_rollup"
+
+    tenant_id = Column(String, primary_key=True)
+    batch_id = Column(Integer, ForeignKey("batch.id", ondelete="CASCADE"), primary_key=True)
+    feed_date = Column(Date, primary_key=True)
+    gross_feed_kg = Column(Numeric, nullable=False, default=0)
+    net_feed_kg = Column(Numeric, nullable=False, default=0)
+    feed_cost = Column(Numeric, nullable=False, default=0)
@@ -0,0 +1,63 @@
+"""
+Refresh of the derived tables (batch_week_facts, monthly_production_rollup, sales_facts,
+egg_stock_checkpoints, effective_standard_curve, ...) in the same transaction as the changes
+they are derived from.
+
+Each derived table registers a collector and a refresher with register_derived_table. After every
+flush the collectors record what went stale in session.info; before a commit the session is flushed
+once and every refresher recomputes what its collector recorded. Bulk statements bypass the flush,
+so they call the tables' mark_*_stale helpers themselves. A rollback discards the recorded keys.
+"""
+from typing import Callable, List, NamedTuple, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class DerivedTable(NamedTuple):
+    name: str
+    # session.info keys the collector writes and the refresher pops
+    stale_keys: Tuple[str, ...]
+    # collect(session, objects): called with the new, dirty and deleted objects of each flush
+    collect: Callable[[Session, list], None]
+    # refresh(session): called before commit; pops its stale_keys and recomputes them
+    refresh: Callable[[Session], None]
+
+
+_derived_tables: List[DerivedTable] = []
+
+
+def register_derived_table(name: str, stale_keys: Tuple[str, ...], collect: Callable[[Session, list], None], refresh: Callable[[Session], None]):
+    """Registers a derived table's collector and refresher; refreshers run in registration order."""
+    _derived_tables.append(DerivedTable(name, stale_keys, collect, refresh))
+
+
+def _has_stale_tables(session: Session) -> bool:
+    return any(key in session.info for table in _derived_tables for key in table.stale_keys)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_derived_table_changes(session, flush_context):
+    objects = list(session.new) + list(session.dirty) + list(session.deleted)
+    if not objects:
+        return
+    for table in _derived_tables:
+        table.collect(session, objects)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_derived_tables(session):
+    # Flush once so changes still pending in the session are collected as well
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    if not _has_stale_tables(session):
+        return
+    for table in _derived_tables:
+        table.refresh(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_derived_tables(session):
+    for table in _derived_tables:
+        for key in table.stale_keys:
+            session.info.pop(key, None)
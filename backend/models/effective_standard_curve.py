@@ -0,0 +1,72 @@
+from sqlalchemy import Column, Integer, String, DECIMAL, and_, cast, func
+from database import Base
+from models.derived_tables import register_derived_table
+
+# session.info key holding the tenant_ids whose curve must be rebuilt before commit
+STALE_TENANTS_KEY = "effective_standard_curve_stale"
+# app_config entry choosing between the Bovans and BV300 standards
+STANDARD_SOURCE_CONFIG_NAME = "performance_standard_source"
+_STANDARD_TABLES = {"bovanswhitelayerperformance", "bv300_rearing_performance", "bv300_layer_performance"}
+# Weeks of life the curve holds; older ages use the last one
+MAX_LOOKUP_AGE = 100
+
+
+class EffectiveStandardCurve(Base):
+    """
+    Each tenant's standard curve, already resolved for the tenant's performance_standard_source,
+    one row per week of life 1..MAX_LOOKUP_AGE (lookup_age; age W.x is week W + 1). A row holds the
+    standard the DailyBatch hybrids pick for that week: Bovans, or BV300 rearing followed by BV300
+    layer, with their clamping applied. The rows are derived data: crud.effective_standard_curve
+    rebuilds a tenant's curve when its standards or performance_standard_source change in a
+    committed transaction.
+    """
+    __tablename__ = "effective_standard_curve"
+
+    tenant_id = Column(String, primary_key=True)
+    lookup_age = Column(Integer, primary_key=True)
+    source = Column(String, nullable=False)
+    lay_percent = Column(DECIMAL(5, 2))
+    feed_intake_per_day_g = Column(Integer)
+
+
+def standard_lookup_age_expression(age_expr):
+    """lookup_age of a weeks.days age column: its week of life, within 1..MAX_LOOKUP_AGE."""
+    return func.least(func.greatest(cast(func.trunc(age_expr), Integer) + 1, 1), MAX_LOOKUP_AGE)
+
+
+def standard_curve_onclause(daily_batch_cls):
+    """
+    Join condition from DailyBatch to EffectiveStandardCurve, an equality on the primary key, e.g.
+    query(DailyBatch, EffectiveStandardCurve.lay_percent).outerjoin(EffectiveStandardCurve, standard_curve_onclause(DailyBatch))
+    """
+    return and_(
+        EffectiveStandardCurve.tenant_id == daily_batch_cls.tenant_id,
+        EffectiveStandardCurve.lookup_age == standard_lookup_age_expression(daily_batch_cls.age)
+    )
+
+
+def mark_standard_curve_stale(session, tenant_id: str):
+    """Schedules the tenant's curve for a rebuild when the session commits."""
+    session.info.setdefault(STALE_TENANTS_KEY, set()).add(tenant_id)
+
+
+def _collect_standard_changes(session, objects):
+    for obj in objects:
+        table = getattr(obj, "__tablename__", None)
+        if table in _STANDARD_TABLES or (table == "app_config" and obj.name == STANDARD_SOURCE_CONFIG_NAME):
+            # A row without tenant_id rebuilds every tenant, since it cannot be attributed
+            mark_standard_curve_stale(session, obj.tenant_id)
+
+
+def _refresh_stale_standard_curves(session):
+    tenant_ids = session.info.pop(STALE_TENANTS_KEY, None)
+    if tenant_ids:
+        # Imported here because crud.effective_standard_curve imports this module
+        from crud.effective_standard_curve import rebuild_effective_standard_curve, refresh_effective_standard_curve
+        if None in tenant_ids:
+            rebuild_effective_standard_curve(session)
+        else:
+            refresh_effective_standard_curve(session, tenant_ids)
+
+
+register_derived_table("effective_standard_curve", (STALE_TENANTS_KEY,), _collect_standard_changes, _refresh_stale_standard_curves)
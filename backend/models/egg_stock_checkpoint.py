@@ -0,0 +1,76 @@
+from datetime import date
+
+from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy.orm import Session, attributes
+from database import Base
+from models.derived_tables import register_derived_table
+
+# session.info key holding tenant_id -> earliest day whose egg stock changed, for the checkpoint refresh before commit
+STALE_FROM_KEY = "egg_stock_checkpoints_stale_from"
+# app_config entries holding the egg stock the ledger starts from
+OPENING_CONFIG_NAMES = ("table_opening", "jumbo_opening", "grade_c_opening")
+# Attributes whose changes move the ledger: the day, and the egg counts received or moved on it
+_WATCHED_ATTRIBUTES = {
+    "daily_batch": ("batch_date", ("batch_date", "table_eggs", "jumbo", "cr")),
+    "egg_room_reports": ("report_date", (
+        "report_date", "table_transfer", "table_damage", "table_out", "table_untrayed",
+        "jumbo_transfer", "jumbo_waste", "jumbo_out", "jumbo_untrayed",
+        "grade_c_transfer", "grade_c_labour", "grade_c_waste", "grade_c_untrayed",
+    )),
+}
+
+
+class EggStockCheckpoint(Base):
+    """
+    Egg stock of a tenant at the end of a calendar month.
+
+    The egg stock ledger starts at the tenant's first egg room report with the opening balances
+    from app_config; every later day adds the eggs received from daily_batch and the day's report
+    movements (transfers, damage, outs, untrayed). A checkpoint stores the running balance through
+    checkpoint_date, the last day of its month, so crud.egg_stock_ledger only sums the days after
+    the latest checkpoint. The rows are derived data: a committed change of a day drops the
+    checkpoints from that day on and recomputes them.
+    """
+    __tablename__ = "egg_stock_checkpoints"
+
+    tenant_id = Column(String, primary_key=True)
+    checkpoint_date = Column(Date, primary_key=True)
+    table_closing = Column(Integer, nullable=False, default=0)
+    jumbo_closing = Column(Integer, nullable=False, default=0)
+    grade_c_closing = Column(Integer, nullable=False, default=0)
+
+
+def mark_egg_stock_stale(session: Session, tenant_id: str, from_date: date):
+    """Schedules the tenant's checkpoints from from_date on for a refresh when the session commits."""
+    if tenant_id is None or from_date is None:
+        return
+    stale = session.info.setdefault(STALE_FROM_KEY, {})
+    stale[tenant_id] = min(stale.get(tenant_id, from_date), from_date)
+
+
+def _collect_egg_stock_changes(session, objects):
+    for obj in objects:
+        table = getattr(obj, "__tablename__", None)
+        if table == "app_config":
+            if obj.name in OPENING_CONFIG_NAMES:
+                mark_egg_stock_stale(session, obj.tenant_id, date.min)
+            continue
+        if table not in _WATCHED_ATTRIBUTES:
+            continue
+        date_attr, watched = _WATCHED_ATTRIBUTES[table]
+        if obj in session.dirty and not any(attributes.get_history(obj, name).has_changes() for name in watched):
+            continue
+        # Old values too, so moving a row to another day refreshes from the earlier one
+        for value in attributes.get_history(obj, date_attr).sum():
+            mark_egg_stock_stale(session, obj.tenant_id, value)
+
+
+def _refresh_stale_egg_stock(session):
+    stale = session.info.pop(STALE_FROM_KEY, None)
+    if stale:
+        # Imported here because crud.egg_stock_ledger imports this module
+        from crud.egg_stock_ledger import refresh_egg_stock_checkpoints
+        refresh_egg_stock_checkpoints(session, stale)
+
+
+register_derived_table("egg_stock_checkpoints", (STALE_FROM_KEY,), _collect_egg_stock_changes, _refresh_stale_egg_stock)
@@ -0,0 +1,75 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Column, Integer, String, Date, Numeric
+from sqlalchemy.orm import Session, attributes
+from database import Base
+from models.derived_tables import register_derived_table
+
+# session.info key holding the (tenant_id, month) pairs whose rollup must be refreshed before commit
+STALE_MONTHS_KEY = "monthly_production_rollup_stale"
+# Date attributes that place a watched row in a month
+_WATCHED_DATES = {"daily_batch": "batch_date", "composition_usage_history": "used_at", "operational_expenses": "expense_date"}
+
+
+class MonthlyProductionRollup(Base):
+    """
+    Monthly production and cost totals of a tenant, one row per calendar month.
+
+    month is the first day of the month. The rows are derived data: crud.monthly_production_rollup
+    recomputes a month when its daily rows, composition usages or operational expenses change in a
+    committed transaction. Months ending on or before the tenant's financial last_closed_date are
+    closed and are no longer refreshed.
+    """
+    __tablename__ = "monthly_production_rollup"
+
+    tenant_id = Column(String, primary_key=True)
+    month = Column(Date, primary_key=True)
+    daily_rows = Column(Integer, nullable=False, default=0)  # DailyBatch rows in the month
+    total_eggs = Column(Integer, nullable=False, default=0)
+    feed_grams = Column(Numeric, nullable=False, default=0)  # Net feed of the month's daily rows
+    composition_cost = Column(Numeric, nullable=False, default=0)
+    operational_expense = Column(Numeric, nullable=False, default=0)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def month_end(day: date) -> date:
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def mark_monthly_rollup_stale(session: Session, tenant_id: str, from_date: date, to_date: date = None):
+    """Schedules the tenant's months from from_date to to_date (inclusive) for a refresh when the session commits."""
+    if tenant_id is None or from_date is None:
+        return
+    month, last_month = month_start(from_date), month_start(to_date or from_date)
+    stale = session.info.setdefault(STALE_MONTHS_KEY, set())
+    while month <= last_month:
+        stale.add((tenant_id, month))
+        month = month_end(month) + timedelta(days=1)
+
+
+def _collect_monthly_changes(session, objects):
+    for obj in objects:
+        date_attr = _WATCHED_DATES.get(getattr(obj, "__tablename__", None))
+        if not date_attr:
+            continue
+        # Old values too, so moving a row to another month refreshes both months
+        for value in attributes.get_history(obj, date_attr).sum():
+            if isinstance(value, datetime):
+                # The database buckets timestamps in its own time zone; cover both neighbouring days
+                mark_monthly_rollup_stale(session, obj.tenant_id, value.date() - timedelta(days=1), value.date() + timedelta(days=1))
+            elif isinstance(value, date):
+                mark_monthly_rollup_stale(session, obj.tenant_id, value)
+
+
+def _refresh_stale_months(session):
+    months = session.info.pop(STALE_MONTHS_KEY, None)
+    if months:
+        # Imported here because crud.monthly_production_rollup imports this module
+        from crud.monthly_production_rollup import refresh_monthly_production_rollup
+        refresh_monthly_production_rollup(session, months)
+
+
+register_derived_table("monthly_production_rollup", (STALE_MONTHS_KEY,), _collect_monthly_changes, _refresh_stale_months)
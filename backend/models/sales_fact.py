@@ -0,0 +1,69 @@
+from sqlalchemy import Column, Integer, String, Date, Numeric, Enum, Index
+from sqlalchemy.orm import Session, attributes
+from database import Base
+from models.derived_tables import register_derived_table
+from models.sales_orders import SalesOrderStatus
+
+# session.info keys holding the (tenant_id, order_date) days and the sales order ids whose facts
+# must be refreshed before commit
+STALE_DAYS_KEY = "sales_facts_stale_days"
+STALE_ORDERS_KEY = "sales_facts_stale_orders"
+
+
+class SalesFact(Base):
+    """
+    Sales of a tenant per day, customer, item or composition, variant and order status.
+
+    The rows are derived data: crud.sales_facts recomputes a day's facts from sales_orders and
+    sales_order_items when an order of that day, or one of its lines, changes in a committed
+    transaction (orders moved to another date refresh both days).
+    """
+    __tablename__ = "sales_facts"
+    __table_args__ = (Index('ix_sales_facts_tenant_id_sale_date', 'tenant_id', 'sale_date'),)
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String, nullable=False)
+    sale_date = Column(Date, nullable=False)  # order_date of the orders
+    customer_id = Column(Integer, nullable=False)
+    inventory_item_id = Column(Integer, nullable=True)
+    composition_id = Column(Integer, nullable=True)
+    variant_id = Column(Integer, nullable=True)
+    status = Column(Enum(SalesOrderStatus), nullable=False)
+    quantity = Column(Numeric, nullable=False, default=0)
+    line_total = Column(Numeric, nullable=False, default=0)
+    order_lines = Column(Integer, nullable=False, default=0)
+
+
+def mark_sales_facts_stale(session: Session, tenant_id: str, sale_date):
+    """Schedules the tenant's facts of sale_date for a refresh when the session commits."""
+    if tenant_id is not None and sale_date is not None:
+        session.info.setdefault(STALE_DAYS_KEY, set()).add((tenant_id, sale_date))
+
+
+def _collect_sales_changes(session, objects):
+    stale_orders = set()
+    for obj in objects:
+        table = getattr(obj, "__tablename__", None)
+        if table == "sales_orders":
+            # Old values too, so moving an order to another day refreshes both days
+            order_dates = attributes.get_history(obj, "order_date").sum()
+            for order_date in order_dates:
+                mark_sales_facts_stale(session, obj.tenant_id, order_date)
+            if not order_dates:
+                stale_orders.add(obj.id)
+        elif table == "sales_order_items":
+            stale_orders.update(order_id for order_id in attributes.get_history(obj, "sales_order_id").sum() if order_id is not None)
+    if stale_orders:
+        session.info.setdefault(STALE_ORDERS_KEY, set()).update(stale_orders)
+
+
+def _refresh_stale_sales_days(session):
+    days = session.info.pop(STALE_DAYS_KEY, set())
+    order_ids = session.info.pop(STALE_ORDERS_KEY, set())
+    if days or order_ids:
+        # Imported here because crud.sales_facts imports this module
+        from crud.sales_facts import refresh_sales_facts, sales_order_days
+        refresh_sales_facts(session, days | sales_order_days(session, order_ids))
+
+
+register_derived_table("sales_facts", (STALE_DAYS_KEY, STALE_ORDERS_KEY), _collect_sales_changes, _refresh_stale_sales_days)
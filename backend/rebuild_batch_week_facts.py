@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Rebuilds the batch_week_facts table from daily_batch and daily_feed_rollup.
+
+Usage examples:
+  python rebuild_batch_week_facts.py --dry-run
+  python rebuild_batch_week_facts.py --tenant-id tenant_1
+
+The facts are refreshed whenever daily rows or composition usages of a batch are committed
+through the app; this script is for backfills and for repairing them after daily_batch was
+changed directly in the database.
+"""
+
+import argparse
+import logging
+from typing import Optional
+
+from database import SessionLocal
+from crud.batch_week_facts import rebuild_batch_week_facts
+
+logger = logging.getLogger("rebuild_batch_week_facts")
+logging.basicConfig(level=logging.INFO)
+
+
+def rebuild(tenant_id: Optional[str] = None, dry_run: bool = False):
+    db = SessionLocal()
+    try:
+        rows = rebuild_batch_week_facts(db, tenant_id=tenant_id)
+        if dry_run:
+            db.rollback()
+            logger.info("Dry-run complete. Fact rows that would be written: %d", rows)
+        else:
+            db.commit()
+            logger.info("Completed rebuild. Fact rows written: %d", rows)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error while rebuilding the batch week facts: %s", e)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the weekly batch performance facts")
+    parser.add_argument("--tenant-id", type=str, default=None, help="Only rebuild this tenant (default: all tenants)")
+    parser.add_argument("--dry-run", action="store_true", help="Do not commit changes")
+
+    args = parser.parse_args()
+
+    logger.info("Rebuilding batch week facts for tenant=%s dry_run=%s", args.tenant_id, args.dry_run)
+    rebuild(tenant_id=args.tenant_id, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
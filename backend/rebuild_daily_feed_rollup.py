@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Rebuilds the daily_feed_rollup table from composition_usage_history.
+
+Usage examples:
+  python rebuild_daily_feed_rollup.py --dry-run
+  python rebuild_daily_feed_rollup.py --tenant-id tenant_1
+
+The rollup is kept up to date by use_composition / revert_composition_usage; this script
+is for backfills and for repairing it after usages were changed directly in the database.
+"""
+
+import argparse
+import logging
+from typing import Optional
+
+from database import SessionLocal
+from crud.daily_feed_rollup import rebuild_daily_feed_rollup
+
+logger = logging.getLogger("rebuild_daily_feed_rollup")
+logging.basicConfig(level=logging.INFO)
+
+
+def rebuild(tenant_id: Optional[str] = None, dry_run: bool = False):
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_feed_rollup(db, tenant_id=tenant_id)
+        if dry_run:
+            db.rollback()
+            logger.info("Dry-run complete. Rollup rows that would be written: %d", rows)
+        else:
+            db.commit()
+            logger.info("Completed rebuild. Rollup rows written: %d", rows)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error while rebuilding the daily feed rollup: %s", e)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily feed-consumption rollup")
+    parser.add_argument("--tenant-id", type=str, default=None, help="Only rebuild this tenant (default: all tenants)")
+    parser.add_argument("--dry-run", action="store_true", help="Do not commit changes")
+
+    args = parser.parse_args()
+
+    logger.info("Rebuilding daily feed rollup for tenant=%s dry_run=%s", args.tenant_id, args.dry_run)
+    rebuild(tenant_id=args.tenant_id, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
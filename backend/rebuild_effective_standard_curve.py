@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Rebuilds the effective_standard_curve table from the Bovans and BV300 standard tables and the
+performance_standard_source config in app_config.
+
+Usage examples:
+  python rebuild_effective_standard_curve.py --dry-run
+  python rebuild_effective_standard_curve.py --tenant-id tenant_1
+
+The curve is refreshed whenever the standards or performance_standard_source are committed
+through the app; this script is for backfills and for repairing it after the standards were
+loaded or changed directly in the database.
+"""
+
+import argparse
+import logging
+from typing import Optional
+
+from database import SessionLocal
+from crud.effective_standard_curve import rebuild_effective_standard_curve
+
+logger = logging.getLogger("rebuild_effective_standard_curve")
+logging.basicConfig(level=logging.INFO)
+
+
+def rebuild(tenant_id: Optional[str] = None, dry_run: bool = False):
+    db = SessionLocal()
+    try:
+        rows = rebuild_effective_standard_curve(db, tenant_id=tenant_id)
+        if dry_run:
+            db.rollback()
+            logger.info("Dry-run complete. Curve rows that would be written: %d", rows)
+        else:
+            db.commit()
+            logger.info("Completed rebuild. Curve rows written: %d", rows)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error while rebuilding the effective standard curve: %s", e)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the effective standard curve")
+    parser.add_argument("--tenant-id", type=str, default=None, help="Only rebuild this tenant (default: all tenants)")
+    parser.add_argument("--dry-run", action="store_true", help="Do not commit changes")
+
+    args = parser.parse_args()
+
+    logger.info("Rebuilding effective standard curve for tenant=%s dry_run=%s", args.tenant_id, args.dry_run)
+    rebuild(tenant_id=args.tenant_id, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Rebuilds the egg_stock_checkpoints table from egg_room_reports, daily_batch and the egg
+opening balances in app_config.
+
+Usage examples:
+  python rebuild_egg_stock_checkpoints.py --dry-run
+  python rebuild_egg_stock_checkpoints.py --tenant-id tenant_1
+
+The checkpoints are refreshed whenever egg room reports, daily rows or the opening balances
+are committed through the app; this script is for backfills and for repairing them after
+those tables were changed directly in the database.
+"""
+
+import argparse
+import logging
+from typing import Optional
+
+from database import SessionLocal
+from crud.egg_stock_ledger import rebuild_egg_stock_checkpoints
+
+logger = logging.getLogger("rebuild_egg_stock_checkpoints")
+logging.basicConfig(level=logging.INFO)
+
+
+def rebuild(tenant_id: Optional[str] = None, dry_run: bool = False):
+    db = SessionLocal()
+    try:
+        rows = rebuild_egg_stock_checkpoints(db, tenant_id=tenant_id)
+        if dry_run:
+            db.rollback()
+            logger.info("Dry-run complete. Checkpoints that would be written: %d", rows)
+        else:
+            db.commit()
+            logger.info("Completed rebuild. Checkpoints written: %d", rows)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error while rebuilding the egg stock checkpoints: %s", e)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the egg stock checkpoints")
+    parser.add_argument("--tenant-id", type=str, default=None, help="Only rebuild this tenant (default: all tenants)")
+    parser.add_argument("--dry-run", action="store_true", help="Do not commit changes")
+
+    args = parser.parse_args()
+
+    logger.info("Rebuilding egg stock checkpoints for tenant=%s dry_run=%s", args.tenant_id, args.dry_run)
+    rebuild(tenant_id=args.tenant_id, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Rebuilds the monthly_production_rollup table from daily_batch, daily_feed_rollup and
+operational_expenses.
+
+Usage examples:
+  python rebuild_monthly_production_rollup.py --dry-run
+  python rebuild_monthly_production_rollup.py --tenant-id tenant_1
+  python rebuild_monthly_production_rollup.py --tenant-id tenant_1 --include-closed
+
+The rollup is refreshed whenever daily rows, composition usages or expenses are committed
+through the app; this script is for backfills and for repairing it after those tables were
+changed directly in the database. Months closed by a financial year closing are left as they
+are unless --include-closed is given.
+"""
+
+import argparse
+import logging
+from typing import Optional
+
+from database import SessionLocal
+from crud.monthly_production_rollup import rebuild_monthly_production_rollup
+
+logger = logging.getLogger("rebuild_monthly_production_rollup")
+logging.basicConfig(level=logging.INFO)
+
+
+def rebuild(tenant_id: Optional[str] = None, include_closed: bool = False, dry_run: bool = False):
+    db = SessionLocal()
+    try:
+        rows = rebuild_monthly_production_rollup(db, tenant_id=tenant_id, include_closed=include_closed)
+        if dry_run:
+            db.rollback()
+            logger.info("Dry-run complete. Rollup rows that would be written: %d", rows)
+        else:
+            db.commit()
+            logger.info("Completed rebuild. Rollup rows written: %d", rows)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error while rebuilding the monthly production rollup: %s", e)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the monthly production and cost rollup")
+    parser.add_argument("--tenant-id", type=str, default=None, help="Only rebuild this tenant (default: all tenants)")
+    parser.add_argument("--include-closed", action="store_true", help="Also recompute months of closed financial years")
+    parser.add_argument("--dry-run", action="store_true", help="Do not commit changes")
+
+    args = parser.parse_args()
+
+    logger.info("Rebuilding monthly production rollup for tenant=%s include_closed=%s dry_run=%s",
+                args.tenant_id, args.include_closed, args.dry_run)
+    rebuild(tenant_id=args.tenant_id, include_closed=args.include_closed, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
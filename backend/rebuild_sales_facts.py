@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Rebuilds the sales_facts table from sales_orders and sales_order_items.
+
+Usage examples:
+  python rebuild_sales_facts.py --dry-run
+  python rebuild_sales_facts.py --tenant-id tenant_1
+
+The facts are refreshed whenever sales orders or their lines are committed through the app;
+this script is for backfills and for repairing them after sales orders were changed directly
+in the database.
+"""
+
+import argparse
+import logging
+from typing import Optional
+
+from database import SessionLocal
+from crud.sales_facts import rebuild_sales_facts
+
+logger = logging.getLogger("rebuild_sales_facts")
+logging.basicConfig(level=logging.INFO)
+
+
+def rebuild(tenant_id: Optional[str] = None, dry_run: bool = False):
+    db = SessionLocal()
+    try:
+        rows = rebuild_sales_facts(db, tenant_id=tenant_id)
+        if dry_run:
+            db.rollback()
+            logger.info("Dry-run complete. Fact rows that would be written: %d", rows)
+        else:
+            db.commit()
+            logger.info("Completed rebuild. Fact rows written: %d", rows)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error while rebuilding the sales facts: %s", e)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the sales facts")
+    parser.add_argument("--tenant-id", type=str, default=None, help="Only rebuild this tenant (default: all tenants)")
+    parser.add_argument("--dry-run", action="store_true", help="Do not commit changes")
+
+    args = parser.parse_args()
+
+    logger.info("Rebuilding sales facts for tenant=%s dry_run=%s", args.tenant_id, args.dry_run)
+    rebuild(tenant_id=args.tenant_id, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Recalculates the opening balances of a tenant's egg room reports from system_start_date on,
+carrying the egg stock ledger: the opening balances in app_config plus the eggs received from
+daily_batch and the reports' movements.
+
+Usage examples:
+  python recalculate_egg_room_inventory.py --tenant-id tenant_1
+  python recalculate_egg_room_inventory.py --tenant-id tenant_1 --resume-after 2024-06-30
+
+The app recalculates the balances whenever an egg opening balance is changed; this script is for
+tenants with long histories and for repairing the balances after egg_room_reports was changed
+directly in the database. Every chunk is committed on its own and logged with the last report
+date it covered; pass that date as --resume-after to continue an interrupted run.
+"""
+
+import argparse
+import logging
+from datetime import date, datetime
+from typing import Optional
+
+from database import SessionLocal
+from crud.egg_room_reports import RECALCULATE_CHUNK_SIZE, recalculate_inventory_from_start
+
+logger = logging.getLogger("recalculate_egg_room_inventory")
+logging.basicConfig(level=logging.INFO)
+
+
+def recalculate(tenant_id: str, user_id: str, resume_after: Optional[date] = None, chunk_size: int = RECALCULATE_CHUNK_SIZE):
+    db = SessionLocal()
+    try:
+        updated = recalculate_inventory_from_start(db, tenant_id, user_id, resume_after=resume_after, chunk_size=chunk_size)
+        if updated is None:
+            logger.warning("system_start_date is not configured for tenant %s; nothing to recalculate.", tenant_id)
+        else:
+            logger.info("Completed recalculation. Reports updated: %d", updated)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error while recalculating the egg room inventory: %s", e)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalculate the egg room report opening balances")
+    parser.add_argument("--tenant-id", type=str, required=True, help="Tenant to recalculate")
+    parser.add_argument("--user-id", type=str, default="system", help="Recorded as updated_by on changed reports")
+    parser.add_argument("--resume-after", type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(), default=None,
+                        help="Continue an interrupted run after this report date (YYYY-MM-DD)")
+    parser.add_argument("--chunk-size", type=int, default=RECALCULATE_CHUNK_SIZE, help="Reports per update and commit")
+
+    args = parser.parse_args()
+
+    logger.info("Recalculating egg room inventory for tenant=%s resume_after=%s", args.tenant_id, args.resume_after)
+    recalculate(args.tenant_id, args.user_id, resume_after=args.resume_after, chunk_size=args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
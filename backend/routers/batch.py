@@ -19,6 +19,8 @@ from database import get_db
 from models.batch import Batch as BatchModel
 from models.batch_shed_assignment import BatchShedAssignment
 from models.daily_batch import DailyBatch as DailyBatchModel
+from models.monthly_production_rollup import mark_monthly_rollup_stale
+from models.egg_stock_checkpoint import mark_egg_stock_stale
 from models.shed import Shed
 from schemas.audit_log import AuditLogCreate
 from schemas.batch import BatchCreate, Batch as BatchSchema, BatchResponse
@@ -320,6 +322,8 @@ def update_batch(
             DailyBatchModel.tenant_id == tenant_id
         ).delete(synchronize_session='fetch')
         logger.info("Deleted %d old daily_batch rows for batch_id=%s, tenant=%s", deleted_count, batch_id, tenant_id)
+        mark_monthly_rollup_stale(db, tenant_id, old_date, new_date - timedelta(days=1))
+        mark_egg_stock_stale(db, tenant_id, old_date)
 
     # --- 3. Propagation Logic ---
     if any(key in changes for key in ['date', 'age', 'opening_count', 'batch_no']):
@@ -679,6 +683,8 @@ def close_batch(
         DailyBatchModel.tenant_id == tenant_id,
         DailyBatchModel.batch_date > closing_date
     ).delete(synchronize_session=False)
+    mark_monthly_rollup_stale(db, tenant_id, closing_date, date.today())
+    mark_egg_stock_stale(db, tenant_id, closing_date)
 
     batch.closing_date = closing_date  # This will automatically set is_active to False
     batch.updated_at = datetime.now(pytz.timezone('Asia/Kolkata'))
@@ -20,6 +20,7 @@ from schemas.composition_usage_history import CompositionUsageHistory, Compositi
 from schemas.journal_entry import JournalEntryCreate
 from schemas.journal_item import JournalItemCreate
 from utils.auth_utils import get_current_user, get_user_identifier
+from utils.json_response import validated_response
 from utils.tenancy import get_tenant_id
 
 router = APIRouter(
@@ -175,7 +176,8 @@ def get_composition_usage_history_endpoint(
     db: Session = Depends(get_db),
     tenant_id: str = Depends(get_tenant_id)
 ):
-    return get_composition_usage_history(db, tenant_id, composition_id=composition_id, offset=offset, limit=limit, start_date=start_date, end_date=end_date)
+    history = get_composition_usage_history(db, tenant_id, composition_id=composition_id, offset=offset, limit=limit, start_date=start_date, end_date=end_date)
+    return validated_response(PaginatedCompositionUsageHistoryResponse, history)
 
 @router.get("/usage-history", response_model=PaginatedCompositionUsageHistoryResponse)
 def get_all_composition_usage_history(
@@ -186,7 +188,8 @@ def get_all_composition_usage_history(
     db: Session = Depends(get_db),
     tenant_id: str = Depends(get_tenant_id)
 ):
-    return get_composition_usage_history(db, tenant_id=tenant_id, offset=offset, limit=limit, start_date=start_date, end_date=end_date)
+    history = get_composition_usage_history(db, tenant_id=tenant_id, offset=offset, limit=limit, start_date=start_date, end_date=end_date)
+    return validated_response(PaginatedCompositionUsageHistoryResponse, history)
 
 @router.get("/usage-history/filtered", response_model=list[CompositionUsageHistory])
 def get_filtered_composition_usage_history(
@@ -213,7 +216,8 @@ def get_filtered_composition_usage_history(
     if batch_id:
         query = query.filter(CompositionUsageHistoryModel.batch_id == batch_id)
 
-    return query.order_by(CompositionUsageHistoryModel.used_at.desc()).all()
+    usages = query.order_by(CompositionUsageHistoryModel.used_at.desc()).all()
+    return validated_response(list[CompositionUsageHistory], usages)
 
 @router.post("/revert-usage/{usage_id}")
 def revert_composition_usage_endpoint(
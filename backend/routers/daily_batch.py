@@ -1,32 +1,33 @@
 # Standard library imports
-import io
 import logging
 import os
 from datetime import date, datetime
 from typing import List
 
 # Third-party imports
-import pandas as pd
 import dateutil.parser
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, BackgroundTasks
 from sqlalchemy import and_
-from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 # Local application imports
 import crud.daily_batch as crud_daily_batch
+from crud import daily_batch_upload_job as crud_upload_job
 from database import get_db
 from models.batch import Batch as BatchModel
 from models.batch_shed_assignment import BatchShedAssignment
 from models.daily_batch import DailyBatch as DailyBatchModel
 from schemas.audit_log import AuditLogCreate
-from schemas.daily_batch import DailyBatchCreate, DailyBatchUpdate
+from schemas.daily_batch import DailyBatchUpdate
+from schemas.daily_batch_upload_job import DailyBatchUploadJob as DailyBatchUploadJobSchema
 from utils import sqlalchemy_to_dict
 from utils.age_utils import calculate_age_progression
 from utils.auth_utils import get_current_user, get_user_identifier, check_feature_restriction
+from utils.json_response import validated_response
 from utils.tenancy import get_tenant_id
-from crud.audit_log import create_audit_log
+from crud.audit_log import create_audit_log, create_audit_logs
 from tasks.eod_tasks import propagate_egg_room_updates
+from tasks.daily_batch_upload_tasks import run_upload_job
 
 logger = logging.getLogger(__name__)
 
@@ -38,16 +39,18 @@ router = APIRouter(
     ]
 )
 
-@router.post("/daily-batch/upload-weekly-report/{batch_id}")
+@router.post("/daily-batch/upload-weekly-report/{batch_id}", status_code=202)
 def upload_weekly_report_excel(
     batch_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     user: dict = Depends(get_current_user),
     tenant_id: str = Depends(get_tenant_id)
 ):
     """
-    Upload and process an Excel file with weekly report data for a specific batch.
+    Queue an Excel file with weekly report data for a specific batch.
+    The file is processed in the background; poll /daily-batch/upload-jobs/{job_id} for progress.
     """
     # First, check if the batch exists
     batch_obj = db.query(BatchModel).filter(BatchModel.id == batch_id, BatchModel.tenant_id == tenant_id).first()
@@ -55,443 +58,45 @@ def upload_weekly_report_excel(
         raise HTTPException(status_code=404, detail=f"Batch with id {batch_id} not found.")
 
     try:
-        contents = file.file.read()
-        df = pd.read_excel(io.BytesIO(contents), header=None)
-
-        all_daily_batches_to_create = []
-
-        # Find all header rows for the data
-        header_row_indices = df.index[df[0] == 'DATE'].tolist()
-        if not header_row_indices:
-            raise HTTPException(status_code=400, detail="No 'DATE' rows found in the Excel file.")
-        
-        all_data_frames = []
-        expected_header = ['DATE', 'OPEN STOCK', 'MORT', 'CULLS', 'CLOSING STOCK', 'TABLE', 'JUMBO', 'CR', 'TOTAL', 'HD%', 'FEED KGS', 'REMARKS']
-
-        for i, header_row_idx in enumerate(header_row_indices):
-            header_row = [str(x).strip() for x in df.iloc[header_row_idx]]
-            if header_row[:len(expected_header)] != expected_header:
-                logger.warning(f"Skipping block at row {header_row_idx + 1} due to invalid header.")
-                continue
-
-            data_start_row = header_row_idx + 1
-            
-            # Determine the end of the current data block
-            if i + 1 < len(header_row_indices):
-                data_end_row = header_row_indices[i + 1]
-            else:
-                data_end_row = len(df)
-            
-            weekly_data_block = df.iloc[data_start_row:data_end_row]
-
-            # Find the last valid row in the block to trim trailing empty/junk rows
-            last_valid_index = weekly_data_block[0].last_valid_index()
-            if last_valid_index is not None:
-                weekly_data_block = weekly_data_block.loc[:last_valid_index]
-                all_data_frames.append(weekly_data_block)
-
-        if not all_data_frames:
-            raise HTTPException(status_code=400, detail="No valid data rows found after headers.")
-
-        weekly_data = pd.concat(all_data_frames)
-
-        if weekly_data.empty:
-            raise HTTPException(status_code=400, detail="No data rows found after processing all blocks.")
-
-        # Use errors='coerce' to handle non-date strings gracefully
-        weekly_data['parsed_date'] = pd.to_datetime(weekly_data[0], format='%d-%m-%Y', errors='coerce')
-
-        # Drop rows that could not be parsed as dates
-        weekly_data.dropna(subset=['parsed_date'], inplace=True)
-        
-        if weekly_data.empty:
-            raise HTTPException(status_code=400, detail="No rows with valid dates found in the file.")
-        
-        weekly_data = weekly_data.sort_values(by='parsed_date').drop(columns=['parsed_date'])
-
-        initial_batch_age = batch_obj.age
-        batch_start_date = batch_obj.date
-        previous_closing_count = None
-
-        for i, row in weekly_data.iterrows():
-            # This check is now redundant because of the filtering and trimming above, but kept for safety
-            if pd.isna(row[0]):
-                continue
-            try:
-                batch_date_str = str(row[0]).strip()
-                batch_date = pd.to_datetime(batch_date_str, format='%d-%m-%Y').date()
-                
-                mortality = int(row[2]) if pd.notna(row[2]) else 0
-                culls = int(row[3]) if pd.notna(row[3]) else 0
-                birds_added = 0  # Default value as birds_added is not supported in Excel upload
-                table_eggs = int(row[5]) if pd.notna(row[5]) else 0
-                jumbo_eggs = int(row[6]) if pd.notna(row[6]) else 0
-                cr_eggs = int(row[7]) if pd.notna(row[7]) else 0
-            except (ValueError, TypeError) as e:
-                raise HTTPException(status_code=400, detail=f"Invalid data in row {i + 1}: {e}. Ensure 'DATE' is in DD-MM-YYYY format.")
-
-            if isinstance(batch_start_date, datetime):
-                batch_start_date = batch_start_date.date()
-            days_diff = (batch_date - batch_start_date).days
-            if days_diff < 0:
-                raise HTTPException(status_code=400, detail=f"Batch date {batch_date} cannot be before batch start date {batch_start_date} in row {i + 1}.")
-            
-            age = calculate_age_progression(initial_batch_age, days_diff)
-            
-            if previous_closing_count is not None:
-                opening_count = previous_closing_count
-            else:
-                prev_daily = db.query(DailyBatchModel).filter(
-                    DailyBatchModel.batch_id == batch_id,
-                    DailyBatchModel.batch_date < batch_date
-                ).order_by(DailyBatchModel.batch_date.desc()).first()
-            
-                if prev_daily:
-                    opening_count = prev_daily.closing_count
-                else:
-                    opening_count = batch_obj.opening_count
-            
-            current_closing_count = opening_count + birds_added - (mortality + culls)
-            previous_closing_count = current_closing_count
-
-            assignment = db.query(BatchShedAssignment).filter(
-                BatchShedAssignment.batch_id == batch_id,
-                BatchShedAssignment.start_date <= batch_date,
-                (BatchShedAssignment.end_date == None) | (BatchShedAssignment.end_date >= batch_date)
-            ).first()
-
-            shed_id_to_use = assignment.shed_id if assignment else None
-            if shed_id_to_use is None:
-                logger.warning(f"Could not find shed assignment for batch {batch_id} on date {batch_date} during Excel upload. Shed ID will be null.")
-
-            daily_batch_data = DailyBatchCreate(
-                batch_id=batch_id,
-                tenant_id=tenant_id,
-                shed_id=shed_id_to_use,
-                batch_no=batch_obj.batch_no,
-                upload_date=date.today(),
-                batch_date=batch_date,
-                age=age,
-                opening_count=opening_count,
-                mortality=mortality,
-                culls=culls,
-                birds_added=birds_added,
-                table_eggs=table_eggs,
-                jumbo=jumbo_eggs,
-                cr=cr_eggs,
-            )
-            all_daily_batches_to_create.append(daily_batch_data)
-
-        # Now that all data is validated and collected, create or update the records
-        processed_records_count = 0
-        for daily_batch_data in all_daily_batches_to_create:
-            existing_daily_batch = crud_daily_batch.get_batch(db, daily_batch_data.batch_id, daily_batch_data.batch_date, tenant_id)
-            if existing_daily_batch:
-                # Update existing record
-                old_values = sqlalchemy_to_dict(existing_daily_batch)
-                for key, value in daily_batch_data.dict().items():
-                    if key in ['closing_count', 'total_eggs', 'hd', 'standard_hen_day_percentage']:
-                        continue
-                    setattr(existing_daily_batch, key, value)
-                
-                new_values = sqlalchemy_to_dict(existing_daily_batch)
-                log_entry = AuditLogCreate(
-                    table_name='daily_batch',
-                    record_id=f"{existing_daily_batch.batch_id}_{existing_daily_batch.batch_date}",
-                    changed_by=get_user_identifier(user),
-                    action='UPDATE',
-                    old_values=old_values,
-                    new_values=new_values
-                )
-                create_audit_log(db=db, log_entry=log_entry)
-
-            else:
-                # Create new record
-                created = crud_daily_batch.create_daily_batch(db=db, daily_batch_data=daily_batch_data, tenant_id=tenant_id)
-                new_values = sqlalchemy_to_dict(created)
-                log_entry = AuditLogCreate(
-                    table_name='daily_batch',
-                    record_id=f"{created.batch_id}_{created.batch_date}",
-                    changed_by=get_user_identifier(user),
-                    action='CREATE',
-                    old_values={},
-                    new_values=new_values
-                )
-                create_audit_log(db=db, log_entry=log_entry)
-
-            # Propagation logic
-            subsequent_rows = db.query(DailyBatchModel).filter(
-                DailyBatchModel.batch_id == daily_batch_data.batch_id,
-                DailyBatchModel.batch_date > daily_batch_data.batch_date,
-                DailyBatchModel.tenant_id == tenant_id
-            ).order_by(DailyBatchModel.batch_date.asc()).all()
-
-            current_record = crud_daily_batch.get_batch(db, daily_batch_data.batch_id, daily_batch_data.batch_date, tenant_id)
-
-            if current_record:
-                prev_closing = current_record.closing_count
-                prev_date = current_record.batch_date
-                try:
-                    prev_age = current_record.age
-                except (ValueError, TypeError):
-                    prev_age = 0.0
-
-                # Using the top-level import
-                for row_to_update in subsequent_rows:
-                    row_to_update.opening_count = prev_closing
-
-                    # Ensure both dates are date objects
-                    row_date = row_to_update.batch_date if isinstance(row_to_update.batch_date, date) else row_to_update.batch_date.date()
-                    prev_date_obj = prev_date if isinstance(prev_date, date) else prev_date.date()
-                    days_diff = (row_date - prev_date_obj).days
-                    new_age = calculate_age_progression(prev_age, days_diff)
-                    row_to_update.age = new_age
-
-                    # Update prev_age so progression accumulates across subsequent rows
-                    prev_age = new_age
-
-                    prev_closing = row_to_update.closing_count
-                    prev_date = row_to_update.batch_date
-
-            processed_records_count += 1
-        
-        db.commit()
-
-        return {"message": f"File '{file.filename}' processed. {processed_records_count} daily batch records created or updated for batch {batch_id}."}
-
-    except HTTPException as he:
-        db.rollback()
-        raise he
+        job = crud_upload_job.create_upload_job(
+            db, file.file, file.filename, "weekly_report", tenant_id, get_user_identifier(user), batch_id=batch_id
+        )
     except Exception as e:
-        db.rollback()
-        logger.exception(f"Unhandled error during weekly report upload: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to process file: {e}")
+        logger.exception(f"Could not queue weekly report upload: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue file: {e}")
 
-@router.post("/daily-batch/upload-excel")
-def upload_daily_batch_excel(file: UploadFile = File(...), db: Session = Depends(get_db), user: dict = Depends(get_current_user), tenant_id: str = Depends(get_tenant_id)):
+    background_tasks.add_task(run_upload_job, job_id=job.id)
+    return {"message": f"File '{file.filename}' queued for processing.", "job_id": job.id, "status": job.status}
+
+@router.post("/daily-batch/upload-excel", status_code=202)
+def upload_daily_batch_excel(background_tasks: BackgroundTasks, file: UploadFile = File(...), db: Session = Depends(get_db), user: dict = Depends(get_current_user), tenant_id: str = Depends(get_tenant_id)):
     """
-    Upload and process an Excel file for daily batch data.
-    This function processes multiple daily reports within a single Excel file,
-    updates existing records, and recalculates subsequent records.
+    Queue an Excel file for daily batch data.
+    The file may hold multiple daily reports; it is processed in the background,
+    updating existing records and recalculating subsequent records.
+    Poll /daily-batch/upload-jobs/{job_id} for progress.
     """
     try:
-        contents = file.file.read()
-        df = pd.read_excel(io.BytesIO(contents), header=None)
-
-        all_batches = db.query(BatchModel).filter(BatchModel.tenant_id == tenant_id).all()
-        batch_map = {b.batch_no: b for b in all_batches}
-
-        date_indices = df.index[df[0] == 'DATE'].tolist()
-        if not date_indices:
-            raise HTTPException(status_code=400, detail="No 'DATE' rows found in the Excel file.")
-
-        processed_records_count = 0
-        
-        excel_data = []
-        for i, date_idx in enumerate(date_indices):
-            report_date_str = df.iloc[date_idx, 1]
-            try:
-                report_date = pd.to_datetime(report_date_str, format='%m-%d-%Y').date()
-            except ValueError:
-                try:
-                    report_date = pd.to_datetime(report_date_str, format='%d/%m/%Y').date()
-                except ValueError:
-                    logger.error(f"Could not parse date '{report_date_str}' at row {date_idx}. Skipping this report section.")
-                    continue
-
-            data_start = date_idx + 2
-            if i + 1 < len(date_indices):
-                data_end = date_indices[i + 1]
-            else:
-                total_rows_after_start = df.index[(df[0] == 'TOTAL') & (df.index >= data_start)].tolist()
-                if total_rows_after_start:
-                    data_end = total_rows_after_start[-1]
-                else:
-                    data_end = len(df)
-
-            for row_idx in range(data_start, data_end):
-                row = df.iloc[row_idx]
-                if pd.isna(row[0]) or str(row[0]).strip().upper() in ['TOTAL', 'GROWER', 'CHICK']:
-                    continue
-                excel_data.append({'report_date': report_date, 'row': row, 'row_idx': row_idx})
-
-        excel_data.sort(key=lambda x: x['report_date'])
+        job = crud_upload_job.create_upload_job(
+            db, file.file, file.filename, "daily_report", tenant_id, get_user_identifier(user)
+        )
+    except Exception as e:
+        logger.exception(f"Could not queue daily report upload: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue file: {e}")
 
-        for data in excel_data:
-            report_date = data['report_date']
-            row = data['row']
-            row_idx = data['row_idx']
+    background_tasks.add_task(run_upload_job, job_id=job.id)
+    return {"message": f"File '{file.filename}' queued for processing.", "job_id": job.id, "status": job.status}
 
-            try:
-                int(row[0]) # Validate batch_id is integer
-            except (ValueError, TypeError):
-                logger.warning(f"Skipping row {row_idx} (Date: {report_date}) due to non-integer batch ID: '{row[0]}'.")
-                continue
-
-            if pd.isna(row[1]) or pd.isna(row[2]) or pd.isna(row[3]):
-                logger.warning(f"Skipping row {row_idx} (Date: {report_date}) due to missing essential data: {row.tolist()}")
-                continue
-
-            batch_no_excel = str(row[1]).strip()
-            if batch_no_excel not in batch_map:
-                logger.warning(f"Skipping row {row_idx} (Date: {report_date}) due to batch_no not found in batch table: '{batch_no_excel}'.")
-                continue
-
-            batch_obj = batch_map[batch_no_excel]
-            batch_id_for_daily_batch = batch_obj.id
-
-            if report_date < batch_obj.date:
-                logger.warning(f"Skipping row {row_idx} (Date: {report_date}) for batch '{batch_no_excel}' because it's before the batch start date ({batch_obj.date}).")
-                continue
-
-            # Calculate age and opening_count from parent batch (not from Excel)
-            # Age is calculated based on days elapsed from batch start date
-            # Opening count is either from previous day's closing count or batch's initial opening count
-            prev_daily = db.query(DailyBatchModel).filter(
-                DailyBatchModel.batch_id == batch_id_for_daily_batch,
-                DailyBatchModel.batch_date < report_date
-            ).order_by(DailyBatchModel.batch_date.desc()).first()
-
-            if prev_daily:
-                opening_count = prev_daily.closing_count
-                try:
-                    prev_age = prev_daily.age
-                except (ValueError, TypeError):
-                    prev_age = 0.0
-                prev_date_obj = prev_daily.batch_date if isinstance(prev_daily.batch_date, date) else prev_daily.batch_date.date()
-                days_diff = (report_date - prev_date_obj).days
-                age = calculate_age_progression(prev_age, days_diff)
-            else:
-                opening_count = batch_obj.opening_count
-                try:
-                    base_age = batch_obj.age
-                except (ValueError, TypeError):
-                    base_age = 0.0
-                days_diff = (report_date - batch_obj.date).days
-                age = calculate_age_progression(base_age, days_diff)
-
-            existing_daily_batch = crud_daily_batch.get_batch(db, batch_id_for_daily_batch, report_date, tenant_id)
-
-            mortality_excel = int(row[4]) if pd.notna(row[4]) else 0
-            culls_excel = int(row[5]) if pd.notna(row[5]) else 0
-            table_eggs_excel = int(row[7]) if pd.notna(row[7]) else 0
-            jumbo_excel = int(row[8]) if pd.notna(row[8]) else 0
-            cr_excel = int(row[9]) if pd.notna(row[9]) else 0
-
-            if existing_daily_batch:
-                # Audit: capture old values then update
-                try:
-                    old_values = sqlalchemy_to_dict(existing_daily_batch)
-                except Exception:
-                    old_values = None
-
-                existing_daily_batch.opening_count = opening_count
-                existing_daily_batch.age = age
-                existing_daily_batch.mortality = mortality_excel
-                existing_daily_batch.culls = culls_excel
-                existing_daily_batch.table_eggs = table_eggs_excel
-                existing_daily_batch.jumbo = jumbo_excel
-                existing_daily_batch.cr = cr_excel
-                db.commit()
-                db.refresh(existing_daily_batch)
+@router.get("/daily-batch/upload-jobs/{job_id}", response_model=DailyBatchUploadJobSchema)
+def get_upload_job(job_id: int, db: Session = Depends(get_db), tenant_id: str = Depends(get_tenant_id)):
+    """
+    Progress of a daily-batch Excel upload: status, rows parsed, written and skipped, and errors.
+    """
+    job = crud_upload_job.get_upload_job(db, job_id, tenant_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Upload job {job_id} not found.")
+    return job
 
-                # Create audit log for update
-                try:
-                    new_values = sqlalchemy_to_dict(existing_daily_batch)
-                    log_entry = AuditLogCreate(
-                        table_name='daily_batch',
-                        record_id=f"{existing_daily_batch.batch_id}_{existing_daily_batch.batch_date}",
-                        changed_by=get_user_identifier(user),
-                        action='UPDATE',
-                        old_values=old_values or {},
-                        new_values=new_values or {}
-                    )
-                    create_audit_log(db=db, log_entry=log_entry)
-                except Exception:
-                    pass
-            else:
-                # Find the correct shed_id for this specific date
-                # Import is now at the top of the file
-                assignment = db.query(BatchShedAssignment).filter(
-                    BatchShedAssignment.batch_id == batch_id_for_daily_batch,
-                    BatchShedAssignment.start_date <= report_date,
-                    (BatchShedAssignment.end_date == None) | (BatchShedAssignment.end_date >= report_date)
-                ).first()
-
-                shed_id_to_use = assignment.shed_id if assignment else None
-                if shed_id_to_use is None:
-                    logger.warning(f"Could not find shed assignment for batch {batch_id_for_daily_batch} on date {report_date} during Excel upload. Shed ID will be null.")
-
-                daily_batch_instance = DailyBatchCreate(
-                    batch_id=batch_id_for_daily_batch,
-                    tenant_id=tenant_id,
-                    shed_id=shed_id_to_use,
-                    batch_no=batch_no_excel,
-                    upload_date=date.today(),
-                    batch_date=report_date,
-                    age=age,
-                    opening_count=opening_count,
-                    mortality=mortality_excel,
-                    culls=culls_excel,
-                    table_eggs=table_eggs_excel,
-                    jumbo=jumbo_excel,
-                    cr=cr_excel,
-                )
-                created = crud_daily_batch.create_daily_batch(db=db, daily_batch_data=daily_batch_instance, tenant_id=tenant_id)
-                # Audit log for create
-                try:
-                    new_values = sqlalchemy_to_dict(created)
-                    log_entry = AuditLogCreate(
-                        table_name='daily_batch',
-                        record_id=f"{created.batch_id}_{created.batch_date}",
-                        changed_by=get_user_identifier(user),
-                        action='CREATE',
-                        old_values={},
-                        new_values=new_values or {}
-                    )
-                    create_audit_log(db=db, log_entry=log_entry)
-                except Exception:
-                    pass
-
-            processed_records_count += 1
-            
-            subsequent_rows = db.query(DailyBatchModel).filter(
-                DailyBatchModel.batch_id == batch_id_for_daily_batch,
-                DailyBatchModel.batch_date > report_date,
-                DailyBatchModel.tenant_id == tenant_id
-            ).order_by(DailyBatchModel.batch_date.asc()).all()
-
-            current_record = crud_daily_batch.get_batch(db, batch_id_for_daily_batch, report_date, tenant_id)
-
-            prev_closing = current_record.closing_count
-            prev_date = current_record.batch_date
-            try:
-                prev_age = current_record.age
-            except (ValueError, TypeError):
-                prev_age = 0.0
-
-            for row_to_update in subsequent_rows:
-                row_to_update.opening_count = prev_closing
-                
-                row_date = row_to_update.batch_date if isinstance(row_to_update.batch_date, date) else row_to_update.batch_date.date()
-                prev_date_obj = prev_date if isinstance(prev_date, date) else prev_date.date()
-                days_diff = (row_date - prev_date_obj).days
-                prev_age = calculate_age_progression(prev_age, days_diff)
-                row_to_update.age = prev_age
-                
-                prev_closing = row_to_update.closing_count
-                prev_date = row_to_update.batch_date
-
-            db.commit()
-
-        return {"message": f"File '{file.filename}' processed. {processed_records_count} daily batch records created or updated."}
-
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        logger.exception(f"Unhandled error during Excel upload: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to process file: {e}")
-    
 @router.patch("/daily-batch/{batch_id}/{batch_date}")
 def update_daily_batch(
     batch_id: int,
@@ -560,32 +165,9 @@ def update_daily_batch(
         if key not in excluded_fields and hasattr(daily_batch, key):
             setattr(daily_batch, key, value)
 
-    # Propagation logic for subsequent daily_batch rows
+    # Propagation logic for subsequent daily_batch rows (one set-based UPDATE)
     if any(key in payload for key in ["age", "mortality", "culls", "birds_added", "opening_count"]):
-        subsequent_rows = db.query(DailyBatchModel).filter(
-            DailyBatchModel.batch_id == batch_id,
-            DailyBatchModel.batch_date > daily_batch.batch_date,
-            DailyBatchModel.tenant_id == tenant_id
-        ).order_by(DailyBatchModel.batch_date.asc()).all()
-
-        prev_closing = daily_batch.closing_count
-        prev_date = daily_batch.batch_date
-        try:
-            prev_age = daily_batch.age
-        except (ValueError, TypeError):
-            prev_age = 0.0
-        
-        for row in subsequent_rows:
-            row.opening_count = prev_closing
-            days_diff = (row.batch_date - prev_date).days
-            new_age = calculate_age_progression(prev_age, days_diff)
-            row.age = new_age
-
-            # Update prev_age so subsequent rows use the latest computed age
-            prev_age = new_age
-
-            prev_closing = row.closing_count
-            prev_date = row.batch_date
+        crud_daily_batch.propagate_subsequent_rows(db, batch_id, tenant_id, daily_batch.batch_date)
 
     new_values = sqlalchemy_to_dict(daily_batch)
     log_entry = AuditLogCreate(
@@ -626,22 +208,45 @@ def update_daily_batch(
         "message": "Daily batch updated. Note: Dependent reports like the Egg Room Report will be updated in the background and may take a moment to reflect this change."
     }
 
+def _daily_batch_response(daily: DailyBatchModel, batch: BatchModel) -> dict:
+    """Serializes a daily_batch row with its hybrid values for GET /daily-batch."""
+    d = {c.name: getattr(daily, c.name) for c in daily.__table__.columns}
+    # Calculate hybrid properties using instance values
+    d['closing_count'] = (daily.opening_count or 0) + (daily.birds_added or 0) - ((daily.mortality or 0) + (daily.culls or 0))
+    d['total_eggs'] = (daily.table_eggs or 0) + (daily.jumbo or 0) + (daily.cr or 0)
+    d['hd'] = d['total_eggs'] / d['closing_count'] if d['closing_count'] > 0 else 0
+    # Calculate batch_type
+    try:
+        age_float = daily.age
+        if age_float < 8:
+            d['batch_type'] = 'Chick'
+        elif age_float <= 17:
+            d['batch_type'] = 'Grower'
+        else:
+            d['batch_type'] = 'Layer'
+    except (ValueError, TypeError):
+        d['batch_type'] = None
+    # For other hybrid properties that need database queries, we'll handle them separately
+    d['standard_hen_day_percentage'] = daily.standard_hen_day_percentage
+    d['feed_in_kg'] = daily.feed_in_kg
+    d['standard_feed_in_kg'] = daily.standard_feed_in_kg
+    d['is_active'] = batch.is_active
+    return d
+
 @router.get("/daily-batch", response_model=List[dict])
 def create_or_get_daily_batches(
     batch_date: date = Query(..., description="Date for which to fetch daily batches"),
+    read_only: bool = Query(False, description="Return missing rows as unsaved virtual rows instead of creating them"),
     db: Session = Depends(get_db),
     user: dict = Depends(get_current_user),
     tenant_id: str = Depends(get_tenant_id)
 ):
     """
     Fetch all daily_batch rows for a given batch_date.
-    If a daily_batch row for an active batch does not exist for the given date, it is generated.
+    If a daily_batch row for an active batch does not exist for the given date, it is generated;
+    all missing rows are created with one bulk insert, or only returned (flagged is_virtual) in read_only mode.
     If the batch_date is before a batch's start date, a message is returned for that batch.
     """
-    # Imports are now at the top of the file
-
-    # FastAPI now handles date parsing automatically from the query parameter.
-
     today = date.today()
 
     # Get all batches for the tenant, ordered by batch_no
@@ -654,11 +259,11 @@ def create_or_get_daily_batches(
         DailyBatchModel.batch_date == batch_date,
         BatchModel.tenant_id == tenant_id
     ).all()
+    crud_daily_batch.preload_feed_in_grams(db, existing_daily_batches)
     existing_daily_batches_map = {db.batch_id: db for db in existing_daily_batches}
 
     # Efficiently fetch all relevant shed assignments for the active batches on the given date
     all_batch_ids = [b.id for b in all_batches]
-    # Import is now at the top of the file
     assignments = db.query(BatchShedAssignment).filter(
         BatchShedAssignment.batch_id.in_(all_batch_ids),
         BatchShedAssignment.start_date <= batch_date,
@@ -667,149 +272,111 @@ def create_or_get_daily_batches(
     assignment_map = {a.batch_id: a.shed_id for a in assignments}
 
     result_list = []
+    missing_batches = []
 
     for batch in all_batches:
         if batch.id in existing_daily_batches_map:
             # Use existing daily batch
-            daily = existing_daily_batches_map[batch.id]
-            d = {c.name: getattr(daily, c.name) for c in daily.__table__.columns}
-            # Calculate hybrid properties using instance values
-            d['closing_count'] = (daily.opening_count or 0) + (daily.birds_added or 0) - ((daily.mortality or 0) + (daily.culls or 0))
-            d['total_eggs'] = (daily.table_eggs or 0) + (daily.jumbo or 0) + (daily.cr or 0)
-            d['hd'] = d['total_eggs'] / d['closing_count'] if d['closing_count'] > 0 else 0
-            # Calculate batch_type
-            try:
-                age_float = daily.age
-                if age_float < 8:
-                    d['batch_type'] = 'Chick'
-                elif age_float <= 17:
-                    d['batch_type'] = 'Grower'
-                else:
-                    d['batch_type'] = 'Layer'
-            except (ValueError, TypeError):
-                d['batch_type'] = None
-            # For other hybrid properties that need database queries, we'll handle them separately
-            d['standard_hen_day_percentage'] = daily.standard_hen_day_percentage
-            d['feed_in_kg'] = daily.feed_in_kg
-            d['standard_feed_in_kg'] = daily.standard_feed_in_kg
-            d['is_active'] = batch.is_active
-            result_list.append(d)
-        else:
-            # Generate missing daily batch only for active batches
-            if not batch.is_active:
-                # If batch is not active and has no entry for the day, skip it
-                continue
-
-            if batch_date < batch.date:
-                # Look up shed_id for display purposes even if batch hasn't started
-                shed_id_for_message = assignment_map.get(batch.id)
-                result_list.append({
-                    "batch_id": batch.id,
-                    "shed_id": shed_id_for_message,
-                    "batch_no": batch.batch_no,
-                    "message": "Please modify batch start date in configuration screen to create batch for this date.",
-                    "batch_start_date": batch.date.isoformat(),
-                    "requested_date": batch_date.isoformat(),
-                    "is_active": batch.is_active
-                })
-                continue
-
-            # Find the most recent previous daily_batch for this batch
-            prev_daily = db.query(DailyBatchModel).filter(
-                DailyBatchModel.batch_id == batch.id,
-                DailyBatchModel.batch_date < batch_date
-            ).order_by(DailyBatchModel.batch_date.desc()).first()
-
+            result_list.append(_daily_batch_response(existing_daily_batches_map[batch.id], batch))
+            continue
+
+        # Generate missing daily batch only for active batches
+        if not batch.is_active:
+            # If batch is not active and has no entry for the day, skip it
+            continue
+
+        if batch_date < batch.date:
+            # Look up shed_id for display purposes even if batch hasn't started
+            shed_id_for_message = assignment_map.get(batch.id)
+            result_list.append({
+                "batch_id": batch.id,
+                "shed_id": shed_id_for_message,
+                "batch_no": batch.batch_no,
+                "message": "Please modify batch start date in configuration screen to create batch for this date.",
+                "batch_start_date": batch.date.isoformat(),
+                "requested_date": batch_date.isoformat(),
+                "is_active": batch.is_active
+            })
+            continue
+
+        missing_batches.append(batch)
+
+    if missing_batches:
+        # The most recent previous daily_batch of every missing batch, in one query
+        prev_rows = crud_daily_batch.get_latest_rows_before(db, [b.id for b in missing_batches], batch_date, tenant_id)
+
+        generated_rows = []
+        for batch in missing_batches:
+            prev_daily = prev_rows.get(batch.id)
             if prev_daily:
                 opening_count = prev_daily.closing_count
-                try:
-                    prev_age = prev_daily.age
-                except (ValueError, TypeError):
-                    prev_age = 0.0
-                days_diff = (batch_date - prev_daily.batch_date).days
-                age = calculate_age_progression(prev_age, days_diff)
+                age = calculate_age_progression(prev_daily.age, (batch_date - prev_daily.batch_date).days)
             else:
                 opening_count = batch.opening_count
-                try:
-                    base_age = batch.age
-                except (ValueError, TypeError):
-                    base_age = 0.0
-                days_diff = (batch_date - batch.date).days
-                age = calculate_age_progression(base_age, days_diff)
+                age = calculate_age_progression(batch.age, (batch_date - batch.date).days)
 
             shed_id_to_use = assignment_map.get(batch.id)
             if shed_id_to_use is None:
                 logger.warning(f"Could not find shed assignment for batch {batch.id} on date {batch_date}. Shed ID will be null.")
 
+            generated_rows.append({
+                "batch_id": batch.id,
+                "tenant_id": tenant_id,
+                "shed_id": shed_id_to_use,
+                "batch_no": batch.batch_no,
+                "upload_date": today,
+                "batch_date": batch_date,
+                "age": age,
+                "opening_count": opening_count,
+                "mortality": 0,
+                "culls": 0,
+                "birds_added": 0,
+                "table_eggs": 0,
+                "jumbo": 0,
+                "cr": 0,
+            })
+
+        batches_by_id = {b.id: b for b in missing_batches}
+        if read_only:
+            # Transient rows that never enter the session; their hybrid values are preloaded instead
+            virtual_dailies = [DailyBatchModel(**row) for row in generated_rows]
+            crud_daily_batch.preload_feed_in_grams(db, virtual_dailies)
+            crud_daily_batch.preload_standards(db, virtual_dailies)
+            for virtual_daily in virtual_dailies:
+                d = _daily_batch_response(virtual_daily, batches_by_id[virtual_daily.batch_id])
+                d['is_virtual'] = True
+                result_list.append(d)
+        else:
             try:
-                db_daily = DailyBatchModel(
-                    batch_id=batch.id,
-                    tenant_id=tenant_id,
-                    shed_id=shed_id_to_use,
-                    batch_no=batch.batch_no,
-                    upload_date=today,
-                    batch_date=batch_date,
-                    age=age,
-                    opening_count=opening_count,
-                    mortality=0,
-                    culls=0,
-                    birds_added=0,
-                    table_eggs=0,
-                    jumbo=0,
-                    cr=0,
-                )
-                db.add(db_daily)
-                db.commit()
-                db.refresh(db_daily)
+                inserted_ids = set(crud_daily_batch.insert_missing_daily_batches(db, generated_rows))
+                # Rows created meanwhile by a concurrent request are picked up here as well
+                created_dailies = db.query(DailyBatchModel).filter(
+                    DailyBatchModel.batch_id.in_(list(batches_by_id)),
+                    DailyBatchModel.batch_date == batch_date,
+                    DailyBatchModel.tenant_id == tenant_id
+                ).all()
 
-                # Audit log for created daily_batch
-                try:
-                    new_values = sqlalchemy_to_dict(db_daily)
-                    log_entry = AuditLogCreate(
+                changed_by = get_user_identifier(user)
+                create_audit_logs(db, [
+                    AuditLogCreate(
                         table_name='daily_batch',
-                        record_id=f"{db_daily.batch_id}_{db_daily.batch_date}",
-                        changed_by=get_user_identifier(user),
+                        record_id=f"{daily.batch_id}_{daily.batch_date}",
+                        changed_by=changed_by,
                         action='CREATE',
                         old_values={},
-                        new_values=new_values or {}
+                        new_values=sqlalchemy_to_dict(daily) or {}
                     )
-                    create_audit_log(db=db, log_entry=log_entry)
-                except Exception:
-                    pass
-            
-            except IntegrityError:
+                    for daily in created_dailies if daily.batch_id in inserted_ids
+                ])
+                # Serialize before committing so the rows are not reloaded one by one afterwards
+                crud_daily_batch.preload_feed_in_grams(db, created_dailies)
+                for daily in created_dailies:
+                    result_list.append(_daily_batch_response(daily, batches_by_id[daily.batch_id]))
+                db.commit()
+            except Exception:
                 db.rollback()
-                # The record was likely created by a concurrent request. Fetch it.
-                db_daily = db.query(DailyBatchModel).filter(
-                    DailyBatchModel.batch_id == batch.id,
-                    DailyBatchModel.batch_date == batch_date,
-                    DailyBatchModel.tenant_id == tenant_id
-                ).one()
-
-
-            d = {c.name: getattr(db_daily, c.name) for c in db_daily.__table__.columns}
-            # Calculate hybrid properties using instance values
-            d['closing_count'] = (db_daily.opening_count or 0) + (db_daily.birds_added or 0) - ((db_daily.mortality or 0) + (db_daily.culls or 0))
-            d['total_eggs'] = (db_daily.table_eggs or 0) + (db_daily.jumbo or 0) + (db_daily.cr or 0)
-            d['hd'] = d['total_eggs'] / d['closing_count'] if d['closing_count'] > 0 else 0
-            # Calculate batch_type
-            try:
-                age_float = db_daily.age
-                if age_float < 8:
-                    d['batch_type'] = 'Chick'
-                elif age_float <= 17:
-                    d['batch_type'] = 'Grower'
-                else:
-                    d['batch_type'] = 'Layer'
-            except (ValueError, TypeError):
-                d['batch_type'] = None
-            # For other hybrid properties that need database queries, we'll handle them separately
-            d['standard_hen_day_percentage'] = db_daily.standard_hen_day_percentage
-            d['feed_in_kg'] = db_daily.feed_in_kg
-            d['standard_feed_in_kg'] = db_daily.standard_feed_in_kg
-            d['is_active'] = batch.is_active
-            result_list.append(d)
+                raise
 
     result_list.sort(key=lambda x: x.get('batch_no', float('inf')))
 
-    return result_list
+    return validated_response(List[dict], result_list)
@@ -1,17 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from database import get_db
-from schemas.egg_room_reports import EggRoomReportCreate, EggRoomReportUpdate, EggRoomReportResponse, EggRoomReportsListResponse, EggRoomReportSummary
+from schemas.egg_room_reports import EggRoomReportCreate, EggRoomReportUpdate, EggRoomReportResponse, EggRoomReportsListResponse, EggRoomReportSummary, EggRoomReportDaysResponse
 from crud import egg_room_reports as egg_crud
 import logging
 import traceback
 from models.egg_room_reports import EggRoomReport
-from models.daily_batch import DailyBatch
 from models.app_config import AppConfig  # Import AppConfig
 from datetime import datetime, date  # Import date for comparison
 from utils.auth_utils import get_current_user, get_user_identifier, check_feature_restriction
 from utils.tenancy import get_tenant_id
+from utils.response_cache import get_or_compute
+from tasks.eod_tasks import repair_egg_room_report
 
 router = APIRouter(
     prefix="/egg-room-report",
@@ -23,6 +23,9 @@ router = APIRouter(
 )
 logger = logging.getLogger("egg_room_reports")
 
+# Longest range GET /daily computes in one request
+MAX_DAILY_REPORT_DAYS = 366
+
 
 def get_system_start_date(db: Session, tenant_id: str) -> date:
     """Fetches the system start date from AppConfig."""
@@ -43,8 +46,66 @@ def get_system_start_date(db: Session, tenant_id: str) -> date:
         return date(2000, 1, 1)
 
 
+@router.get("/daily", response_model=EggRoomReportDaysResponse)
+def get_daily_reports(start_date: str, end_date: str, db: Session = Depends(get_db), tenant_id: str = Depends(get_tenant_id)):
+    """
+    One egg room report per day of the range, with received amounts and opening balances computed
+    in a single query. Days without a stored report are returned as virtual reports (stored is
+    false); nothing is written.
+    """
+    try:
+        requested_start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        requested_end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Please use YYYY-MM-DD for both start_date and end_date"
+        )
+
+    try:
+        system_start_date = get_system_start_date(db, tenant_id)
+
+        if requested_end_date < requested_start_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="End date cannot be before start date."
+            )
+
+        if (requested_end_date - requested_start_date).days + 1 > MAX_DAILY_REPORT_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Date range cannot be longer than {MAX_DAILY_REPORT_DAYS} days."
+            )
+
+        if requested_start_date < system_start_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Query start date {start_date} cannot be before the system start date of {system_start_date.isoformat()}."
+            )
+
+        reports = get_or_compute(
+            tenant_id,
+            ("egg_room_report_days", requested_start_date, requested_end_date),
+            lambda: egg_crud.get_daily_reports(db, requested_start_date, requested_end_date, tenant_id)
+        )
+        return {"details": reports, "summary": _calculate_egg_room_summary(reports)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Error fetching daily egg room reports for {start_date} to {end_date}: {e}\n{traceback.format_exc()}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
 @router.get("/{report_date}", response_model=EggRoomReportResponse)
-def get_report(report_date: str, db: Session = Depends(get_db), tenant_id: str = Depends(get_tenant_id), request: Request = None):
+def get_report(report_date: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db), tenant_id: str = Depends(get_tenant_id), request: Request = None):
+    """
+    The egg room report of a date, with its received amounts and opening balances computed from
+    the day's daily_batch rows and the egg stock ledger. Nothing is written here: a missing or stale
+    stored report is repaired in the background. The computed report is cached per tenant and date
+    until the tenant's data changes.
+    """
     user = get_current_user(request) if request else {}
     user_id = get_user_identifier(user)
     try:
@@ -56,98 +117,23 @@ def get_report(report_date: str, db: Session = Depends(get_db), tenant_id: str =
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Report date {report_date} cannot be before the system start date of {system_start_date.isoformat()}."
             )
+        if requested_date > date.today() and not egg_crud.get_report_by_date(db, requested_date, tenant_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot create reports for future dates ({report_date})."
+            )
 
-        report = egg_crud.get_report_by_date(db, report_date, tenant_id)
-
-        # Get previous day's closing for opening balance calculation
-        # Only consider reports on/after system start date
-        prev_report = db.query(EggRoomReport).filter(
-            EggRoomReport.report_date < requested_date,
-            EggRoomReport.report_date >= system_start_date,
-            EggRoomReport.tenant_id == tenant_id
-        ).order_by(EggRoomReport.report_date.desc()).first()
-
-        if not report:
-            if requested_date > date.today():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Cannot create reports for future dates ({report_date})."
-                )
-
-            dummy_data = EggRoomReportCreate(
-                report_date=requested_date,
-                table_transfer=0, table_damage=0, table_out=0, table_untrayed=0,
-                jumbo_transfer=0, jumbo_waste=0, jumbo_out=0, jumbo_untrayed=0,
-                grade_c_transfer=0, grade_c_labour=0, grade_c_waste=0, grade_c_untrayed=0,
-                tenant_id=tenant_id
+        report, stale = get_or_compute(
+            tenant_id,
+            ("egg_room_report", requested_date),
+            lambda: egg_crud.compute_report(db, requested_date, tenant_id)
+        )
+        if stale:
+            background_tasks.add_task(
+                repair_egg_room_report,
+                report_date=requested_date, tenant_id=tenant_id, user_id=user_id
             )
-            report = egg_crud.create_report(db, dummy_data, tenant_id, user_id)
-        
-        # Self-healing logic: Check for and correct stale data.
-        update_required = False
-        
-        # 1. Check and correct "received" amounts from daily_batch
-        daily_batch_sums = db.query(
-            func.sum(DailyBatch.table_eggs).label("table_received"),
-            func.sum(DailyBatch.jumbo).label("jumbo_received"),
-            func.sum(DailyBatch.cr).label("grade_c_shed_received")
-        ).filter(
-            DailyBatch.batch_date == requested_date,
-            DailyBatch.tenant_id == tenant_id
-        ).first()
-
-        if report.table_received != (daily_batch_sums.table_received or 0):
-            report.table_received = daily_batch_sums.table_received or 0
-            update_required = True
-
-        if report.jumbo_received != (daily_batch_sums.jumbo_received or 0):
-            report.jumbo_received = daily_batch_sums.jumbo_received or 0
-            update_required = True
-
-        if report.grade_c_shed_received != (daily_batch_sums.grade_c_shed_received or 0):
-            report.grade_c_shed_received = daily_batch_sums.grade_c_shed_received or 0
-            update_required = True
-
-        # 2. Check and correct "opening" amounts
-        if prev_report:
-            if (report.table_opening != prev_report.table_closing or
-                report.jumbo_opening != prev_report.jumbo_closing or
-                report.grade_c_opening != prev_report.grade_c_closing):
-                report.table_opening = prev_report.table_closing
-                report.jumbo_opening = prev_report.jumbo_closing
-                report.grade_c_opening = prev_report.grade_c_closing
-                update_required = True
-        else: # No valid previous report (on/after system start date), use app_config for system start date
-            if requested_date == system_start_date:
-                table_opening_config = db.query(AppConfig).filter(AppConfig.name == 'table_opening', AppConfig.tenant_id == tenant_id).first()
-                jumbo_opening_config = db.query(AppConfig).filter(AppConfig.name == 'jumbo_opening', AppConfig.tenant_id == tenant_id).first()
-                grade_c_opening_config = db.query(AppConfig).filter(AppConfig.name == 'grade_c_opening', AppConfig.tenant_id == tenant_id).first()
-
-                table_opening = int(table_opening_config.value) if table_opening_config else 0
-                jumbo_opening = int(jumbo_opening_config.value) if jumbo_opening_config else 0
-                grade_c_opening = int(grade_c_opening_config.value) if grade_c_opening_config else 0
-
-                if (report.table_opening != table_opening or
-                    report.jumbo_opening != jumbo_opening or
-                    report.grade_c_opening != grade_c_opening):
-                    report.table_opening = table_opening
-                    report.jumbo_opening = jumbo_opening
-                    report.grade_c_opening = grade_c_opening
-                    update_required = True
-
-        # 3. If any data was corrected, commit and then get a fresh object
-        if update_required:
-            db.commit()
-            # Re-fetch the report to ensure all calculated properties are re-evaluated
-            # based on the now-corrected data.
-            report = egg_crud.get_report_by_date(db, report_date, tenant_id)
-
-        # 4. Serialize the final, correct report for the response
-        if report:
-            return report
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Report not found after creation/update attempt")
+        return report
     except HTTPException:
         raise
     except Exception as e:
@@ -219,6 +205,8 @@ def update_report(report_date: str, report: EggRoomReportUpdate, db: Session = D
                 detail=f"Cannot update reports for future dates ({report_date})."
             )
 
+        # GET no longer stores the report it shows; create or repair it before applying the update
+        egg_crud.repair_report(db, requested_date, tenant_id, get_user_identifier(current_user))
         updated_report = egg_crud.update_report(
             db, report_date, report, tenant_id, get_user_identifier(current_user))
         if not updated_report:
@@ -258,6 +246,8 @@ def patch_report(report_date: str, report: EggRoomReportUpdate, db: Session = De
                 detail=f"Cannot patch reports for future dates ({report_date})."
             )
 
+        # GET no longer stores the report it shows; create or repair it before applying the update
+        egg_crud.repair_report(db, requested_date, tenant_id, get_user_identifier(current_user))
         # Pass through to the same CRUD updater which already uses exclude_unset on the Pydantic model
         updated_report = egg_crud.update_report(
             db, report_date, report, tenant_id, get_user_identifier(current_user))
@@ -10,6 +10,8 @@ from crud import financial_summary as crud_financial_summary
 from datetime import date
 from typing import Optional
 from utils.tenancy import get_tenant_id
+from utils.json_response import validated_response
+from utils.response_cache import CachedResponseRoute
 from utils.receipt_utils import (
     generate_profit_and_loss_pdf,
     generate_balance_sheet_pdf,
@@ -22,6 +24,7 @@ from utils.receipt_utils import (
 router = APIRouter(
     prefix="/financial-reports",
     tags=["Financial Reports"],
+    route_class=CachedResponseRoute,
 )
 
 @router.get("/financial-summary", response_model=FinancialSummary)
@@ -118,7 +121,8 @@ def get_general_ledger(
     tenant_id: str = Depends(get_tenant_id),
     transaction_type: Optional[str] = Query(None, description="Filter by transaction type", enum=["purchase", "sales", "expense"])
 ):
-    return crud_financial_reports.get_general_ledger(db=db, start_date=start_date, end_date=end_date, tenant_id=tenant_id, transaction_type=transaction_type)
+    ledger = crud_financial_reports.get_general_ledger(db=db, start_date=start_date, end_date=end_date, tenant_id=tenant_id, transaction_type=transaction_type)
+    return validated_response(GeneralLedger, ledger)
 
 @router.get("/general-ledger/export")
 def export_general_ledger(
@@ -148,7 +152,8 @@ def get_purchase_ledger(
     db: Session = Depends(get_db),
     tenant_id: str = Depends(get_tenant_id)
 ):
-    return crud_financial_reports.get_purchase_ledger(db=db, tenant_id=tenant_id, vendor_id=vendor_id, skip=skip, limit=limit, start_date=start_date, end_date=end_date)
+    ledger = crud_financial_reports.get_purchase_ledger(db=db, tenant_id=tenant_id, vendor_id=vendor_id, skip=skip, limit=limit, start_date=start_date, end_date=end_date)
+    return validated_response(PurchaseLedger, ledger)
 
 @router.get("/subsidiary-ledger/purchases/export")
 def export_purchase_ledger(
@@ -181,7 +186,8 @@ def get_sales_ledger(
     db: Session = Depends(get_db),
     tenant_id: str = Depends(get_tenant_id)
 ):
-    return crud_financial_reports.get_sales_ledger(db=db, customer_id=customer_id, start_date=start_date, end_date=end_date, tenant_id=tenant_id, skip=skip, limit=limit)
+    ledger = crud_financial_reports.get_sales_ledger(db=db, customer_id=customer_id, start_date=start_date, end_date=end_date, tenant_id=tenant_id, skip=skip, limit=limit)
+    return validated_response(SalesLedger, ledger)
 
 @router.get("/subsidiary-ledger/sales/export")
 def export_sales_ledger(
@@ -214,7 +220,8 @@ def get_inventory_ledger(
     db: Session = Depends(get_db),
     tenant_id: str = Depends(get_tenant_id)
 ):
-    return crud_financial_reports.get_inventory_ledger(db=db, item_id=item_id, start_date=start_date, end_date=end_date, tenant_id=tenant_id, skip=skip, limit=limit)
+    ledger = crud_financial_reports.get_inventory_ledger(db=db, item_id=item_id, start_date=start_date, end_date=end_date, tenant_id=tenant_id, skip=skip, limit=limit)
+    return validated_response(InventoryLedger, ledger)
 
 @router.get("/subsidiary-ledger/inventory/export")
 def export_inventory_ledger(
@@ -14,6 +14,7 @@ from models.chart_of_accounts import ChartOfAccounts
 from schemas.journal_entry import JournalEntryCreate
 from schemas.journal_item import JournalItemCreate
 from crud import journal_entry as journal_entry_crud
+from crud.monthly_production_rollup import rebuild_monthly_production_rollup
 
 router = APIRouter(
     prefix="/financial-settings",
@@ -160,6 +161,9 @@ def reopen_financial_year(
 
     settings.last_closed_date = previous_closing.date if previous_closing else None
     db.add(settings)
+    db.flush()
+    # The reopened months pick up any daily data changed while they were closed
+    rebuild_monthly_production_rollup(db, tenant_id=tenant_id)
     db.commit()
 
     return {"message": "Financial year reopened successfully. Period is unlocked."}
\ No newline at end of file
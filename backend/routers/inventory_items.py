@@ -13,6 +13,7 @@ from sqlalchemy.orm import Session
 from crud import inventory_item_audit as crud_inventory_item_audit
 from crud import inventory_items as crud_inventory_items
 from crud import inventory_item_stock as crud_inventory_item_stock
+from crud import egg_stock_ledger as crud_egg_stock_ledger
 from crud.inventory_item_usage_history import (
     use_inventory_item,
     get_inventory_item_usage_history,
@@ -51,14 +52,14 @@ EGG_INVENTORY_NAMES = ["Table Egg", "Jumbo Egg", "Grade C Egg"]
 
 def _get_latest_egg_report_stock(db: Session, tenant_id: str) -> dict:
     """
-    Helper to get the latest closing stock for all egg types.
+    Helper to get the latest closing stock for all egg types, from the egg stock ledger.
     """
-    latest_report = db.query(EggRoomReport).filter(EggRoomReport.tenant_id == tenant_id).order_by(EggRoomReport.report_date.desc()).first()
-    if latest_report:
+    latest_stock = crud_egg_stock_ledger.get_egg_stock(db, tenant_id)
+    if latest_stock:
         return {
-            "Table Egg": latest_report.table_closing,
-            "Jumbo Egg": latest_report.jumbo_closing,
-            "Grade C Egg": latest_report.grade_c_closing,
+            "Table Egg": latest_stock["table_closing"],
+            "Jumbo Egg": latest_stock["jumbo_closing"],
+            "Grade C Egg": latest_stock["grade_c_closing"],
         }
     return {}
 
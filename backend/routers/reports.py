@@ -1,61 +1,43 @@
 # Standard library imports
-import os
-import json
-from collections import defaultdict
+import io
 from datetime import datetime, date
-from itertools import groupby
 from typing import List, Optional
 
 # Third-party imports
+import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import JSONResponse
-from openpyxl import Workbook, load_workbook
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font, PatternFill
 from openpyxl.utils import get_column_letter
-from sqlalchemy import and_, cast, func
+from sqlalchemy import Float, and_, case, cast, func
 from sqlalchemy.orm import Session
 
 # Local application imports
 from database import get_db
 from models.batch import Batch
-from models.bovanswhitelayerperformance import BovansWhiteLayerPerformance
-from models.bv300_layer_performance import BV300LayerPerformance
-from models.bv300_rearing_performance import BV300RearingPerformance
-from models.app_config import AppConfig
+from models.batch_week_fact import BatchWeekFact
 from models.daily_batch import DailyBatch
-from models.inventory_items import InventoryItem
-from models.sales_order_items import SalesOrderItem
-from models.sales_orders import SalesOrder, SalesOrderStatus
-from schemas.reports import TopSellingItem, CompositionUsageReport
+from models.daily_feed_rollup import DailyFeedRollup
+from models.effective_standard_curve import EffectiveStandardCurve, standard_curve_onclause
+from schemas.reports import TopSellingItem, SalesBreakdownItem, CompositionUsageReport
 from utils.tenancy import get_tenant_id
+from utils.json_response import FastJSONResponse
+from utils.response_cache import CachedResponseRoute
+from utils.standards_cache import get_standard_source_value, get_standard_row
 from crud.daily_batch import get_monthly_egg_production as get_monthly_egg_production_crud
+from crud.daily_batch_frame import daily_frame_records, load_daily_batch_frame, summarize_daily_frame
 from crud.composition_usage_history import get_composition_usage_by_date_range
-from decimal import Decimal
-
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
-
-
-def _is_layer_age(age_str):
-    """Return True if age_str represents >= 18 (weeks). Age may be stored as string like '18.3'."""
-    try:
-        return age_str > 17
-    except (ValueError, TypeError):
-        return False
+from crud.sales_facts import get_sales_breakdown, get_top_selling_items
 
 
 def _get_standard_source(db: Session, tenant_id: str):
     if not tenant_id:
         return "bovans"
-    config = db.query(AppConfig).filter(
-        AppConfig.tenant_id == tenant_id,
-        AppConfig.name == "performance_standard_source"
-    ).first()
-    if config and config.value and config.value.lower() in ["bovans", "bv300"]:
-        return config.value.lower()
+    source_value = get_standard_source_value(db, tenant_id)
+    if source_value and source_value.lower() in ["bovans", "bv300"]:
+        return source_value.lower()
     return "bovans"
 
 
@@ -73,19 +55,16 @@ def _get_standard_performance(db: Session, tenant_id: str, age_weeks: int):
     source = _get_standard_source(db, tenant_id)
     if source == "bv300":
         if age_weeks <= 18:
-            model = BV300RearingPerformance
+            curve = "bv300_rearing"
             age_weeks = min(max(age_weeks, 1), 18)
         else:
-            model = BV300LayerPerformance
+            curve = "bv300_layer"
             age_weeks = min(max(age_weeks, 19), 80)
     else:
-        model = BovansWhiteLayerPerformance
+        curve = "bovans"
         age_weeks = min(max(age_weeks, 1), 100)
 
-    return db.query(model).filter(
-        model.age_weeks == age_weeks,
-        model.tenant_id == tenant_id
-    ).first()
+    return get_standard_row(db, tenant_id, curve, age_weeks)
 
 
 def get_daily_batches_by_date_range(db: Session, start_date: date, end_date: date, tenant_id: str):
@@ -98,6 +77,7 @@ def get_daily_batches_by_date_range(db: Session, start_date: date, end_date: dat
 router = APIRouter(
     prefix="/reports",
     tags=["reports"],
+    route_class=CachedResponseRoute,
 )
 
 @router.get("/monthly-egg-production", tags=["Egg Reports"])
@@ -137,52 +117,56 @@ def get_top_selling_items_report(
     """
     Generate a report of top-selling inventory items based on sales orders.
     """
-    query = (
-        db.query(
-            InventoryItem.id.label("item_id"),
-            InventoryItem.name,
-            func.sum(SalesOrderItem.quantity).label("total_quantity_sold")
-        )
-        .join(SalesOrderItem, InventoryItem.id == SalesOrderItem.inventory_item_id)
-        .join(SalesOrder, SalesOrderItem.sales_order_id == SalesOrder.id)
-        .filter(SalesOrder.tenant_id == tenant_id)
-        .filter(SalesOrder.status.in_([SalesOrderStatus.APPROVED, SalesOrderStatus.PAID]))
-    )
+    return get_top_selling_items(db, tenant_id, start_date=start_date, end_date=end_date, limit=limit)
 
-    if start_date:
-        query = query.filter(SalesOrder.order_date >= start_date)
-    if end_date:
-        query = query.filter(SalesOrder.order_date <= end_date)
 
-    top_items = (
-        query.group_by(InventoryItem.id, InventoryItem.name)
-        .order_by(func.sum(SalesOrderItem.quantity).desc())
-        .limit(limit)
-        .all()
-    )
-    
-    return top_items
+@router.get("/sales-breakdown", response_model=List[SalesBreakdownItem], tags=["Sales Reports"])
+def get_sales_breakdown_report(
+    group_by: List[str] = Query(["item"], description="Dimensions to group by: customer, item, variant and/or month"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_tenant_id)
+):
+    """
+    Sales of approved and paid orders grouped by customer, item, variant and/or month.
+    """
+    try:
+        return get_sales_breakdown(db, tenant_id, group_by, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
 def _calculate_cumulative_report(db: Session, batch_id: int, current_week: int, hen_housing: int, current_summary: dict, tenant_id: str):
     """Calculate cumulative report data"""
     
-    # Calculate cumulative feed from week 18 to current week
-    cum_feed_total = 0
-    cum_egg_total = 0
-    for week_num in range(17, current_week + 1):
-        week_batches = db.query(DailyBatch).filter(
+    # Calculate cumulative feed and eggs from week 17 to current week from the weekly facts
+    fact_weeks, cum_feed_total, cum_egg_total = db.query(
+        func.count(),
+        func.coalesce(func.sum(BatchWeekFact.feed_kg), 0),
+        func.coalesce(func.sum(BatchWeekFact.table_eggs + BatchWeekFact.jumbo + BatchWeekFact.cr), 0)
+    ).filter(
+        BatchWeekFact.batch_id == batch_id,
+        BatchWeekFact.tenant_id == tenant_id,
+        BatchWeekFact.age_week.between(17, current_week)
+    ).one()
+    if fact_weeks < current_week - 16:
+        # Some weeks have no facts (e.g. history from before the backfill or rows written outside
+        # the app); sum the W.1-W.7 daily rows of those weeks instead
+        cum_feed_total, cum_egg_total = db.query(
+            func.coalesce(func.sum(DailyFeedRollup.net_feed_kg), 0),
+            func.coalesce(func.sum(DailyBatch.total_eggs), 0)
+        ).outerjoin(
+            DailyFeedRollup,
+            and_(DailyFeedRollup.batch_id == DailyBatch.batch_id, DailyFeedRollup.feed_date == DailyBatch.batch_date)
+        ).filter(
             DailyBatch.batch_id == batch_id,
-            DailyBatch.age >= week_num + 0.1,
-            DailyBatch.age <= week_num + 0.7,
+            DailyBatch.age >= 17 + 0.1,
+            DailyBatch.age <= current_week + 0.7,
+            func.mod(DailyBatch.age * 10, 10).between(1, 7),
             DailyBatch.tenant_id == tenant_id
-        ).all()
-        
-        week_feed = sum(batch.feed_in_kg for batch in week_batches if batch.feed_in_kg is not None)
-        cum_feed_total += week_feed
-        
-        week_eggs = sum(batch.total_eggs for batch in week_batches if batch.total_eggs is not None)
-        cum_egg_total += week_eggs
-    
+        ).one()
+
     # Get standard data for current week based on tenant preference
     source = _get_standard_source(db, tenant_id)
     lookup_week = current_week
@@ -287,89 +271,42 @@ def _calculate_cumulative_report(db: Session, batch_id: int, current_week: int,
         "section2": section2
     }
 
-def _calculate_summary(batches: list[DailyBatch], query_start_date: date, query_end_date: date, is_single_batch: bool):
-    """Helper function to calculate summary statistics for a list of daily batches."""
-    if not batches:
-        return None
-
-    summary_opening_count = 0
-    summary_closing_count = 0
-    summary_birds_added = 0
+def _week_fact_summary(week_fact: BatchWeekFact, sample_day):
+    """
+    Summary of one age week from its BatchWeekFact, in the shape summarize_daily_frame returns.
+    Every day of the week shares one standard, so it is read from sample_day (a daily frame row).
+    """
+    total_eggs = week_fact.table_eggs + week_fact.jumbo + week_fact.cr
 
-    # Import is now at the top of the file
+    # HD averages only cover layer days (age above 17, i.e. weeks 17 and later)
+    avg_hd = 0
+    avg_standard_hd = 0
+    if week_fact.age_week >= 17:
+        avg_hd = week_fact.hd_sum / week_fact.days
+        if pd.notna(sample_day.standard_hen_day_percentage):
+            avg_standard_hd = sample_day.standard_hen_day_percentage
 
-    # The caller must sort batches by batch_id, then date.
-    grouped_batches = groupby(batches, key=lambda b: b.batch_id)
+    highest_age = week_fact.highest_age if week_fact.highest_age is not None and week_fact.highest_age > 0 else 0.0
 
-    if is_single_batch:
-        # For a single batch, take the opening count of the first day and closing count of the last day.
-        # The 'batches' list is already sorted by date.
-        summary_opening_count = batches[0].opening_count
-        summary_closing_count = batches[-1].closing_count
-        summary_birds_added = sum(b.birds_added for b in batches if b.birds_added is not None)
-    else:
-        # For multiple batches (consolidation), sum the opening count of the first day and closing count of the last day for each batch.
-        for _, group in grouped_batches:
-            batch_records = list(group)
-            if batch_records:
-                summary_opening_count += batch_records[0].opening_count
-                summary_closing_count += batch_records[-1].closing_count
-                summary_birds_added += sum(b.birds_added for b in batch_records if b.birds_added is not None)
-
-    # Calculate highest age across all batches and all dates in the provided list
-    highest_age = 0.0
-    for b in batches:
-        try:
-            age_val = b.age
-            if age_val > highest_age:
-                highest_age = age_val
-        except (ValueError, TypeError):
-            continue # Ignore invalid age values
-
-    # Sum totals
-    total_mortality = sum(b.mortality for b in batches)
-    total_culls = sum(b.culls for b in batches)
-    total_table_eggs = sum(b.table_eggs for b in batches)
-    total_jumbo = sum(b.jumbo for b in batches if b.jumbo is not None)
-    total_cr = sum(b.cr for b in batches)
-    total_eggs = total_table_eggs + total_jumbo + total_cr
-
-    # Filter for layer batches (age >= 18 weeks) for HD calculations
-    layer_batches = []
-    for b in batches:
-        try:
-            # Only include batches that are 18 weeks or older
-            if b.age > 17:
-                layer_batches.append(b)
-        except (ValueError, TypeError):
-            # Ignore if age is not a valid number
-            continue
-
-    # Calculate averages only on layer batches
-    if layer_batches:
-        # Ensure hd and standard_hen_day_percentage are not None before summing
-        hd_values = [b.hd for b in layer_batches if b.hd is not None]
-        avg_hd = sum(hd_values) / len(hd_values) if hd_values else 0
-
-        standard_hd_values = [b.standard_hen_day_percentage for b in layer_batches if b.standard_hen_day_percentage is not None]
-        avg_standard_hd = sum(standard_hd_values) / len(standard_hd_values) if standard_hd_values else 0
-    else:
-        avg_hd = 0
-        avg_standard_hd = 0
+    standard_feed_consumption = 0
+    if pd.notna(sample_day.standard_feed_in_kg) and week_fact.bird_days_count:
+        standard_feed_consumption = sample_day.standard_feed_in_kg * week_fact.bird_days
 
     return {
-        "opening_count": summary_opening_count,
-        "mortality": total_mortality,
-        "culls": total_culls,
-        "closing_count": summary_closing_count,
-        "table_eggs": total_table_eggs,
-        "jumbo": total_jumbo,
-        "cr": total_cr,
+        "opening_count": week_fact.opening_count,
+        "mortality": week_fact.mortality,
+        "culls": week_fact.culls,
+        "closing_count": week_fact.closing_count,
+        "table_eggs": week_fact.table_eggs,
+        "jumbo": week_fact.jumbo,
+        "cr": week_fact.cr,
         "total_eggs": total_eggs,
         "hd": round(avg_hd, 4),
         "standard_hen_day_percentage": round(avg_standard_hd, 4),
         "highest_age": round(highest_age, 1),
-        "birds_added": summary_birds_added
+        "birds_added": week_fact.birds_added,
+        "actual_feed_consumed": float(week_fact.feed_kg),
+        "standard_feed_consumption": standard_feed_consumption,
     }
 
 
@@ -391,36 +328,34 @@ def get_weekly_layer_report(
     end_age = start_age_week + 0.7
     
     # Get daily batches for the specified age range
-    daily_batches = db.query(DailyBatch).filter(
-        DailyBatch.batch_id == batch_id,
-        DailyBatch.age >= start_age,
-        DailyBatch.age <= end_age,
-        DailyBatch.tenant_id == tenant_id
-    ).order_by(DailyBatch.batch_date.asc()).all()
+    daily_frame = load_daily_batch_frame(
+        db, tenant_id, batch_id=batch_id, min_age=start_age, max_age=end_age, order_by=[DailyBatch.batch_date.asc()]
+    )
     
-    if not daily_batches:
+    if daily_frame.empty:
         raise HTTPException(status_code=404, detail=f"No data found for batch {batch_id} at week {week}")
     
     # Get hen housing (closing count at age 17.7)
-    hen_housing_record = db.query(DailyBatch).filter(
+    hen_housing = db.query(DailyBatch.closing_count).filter(
         DailyBatch.batch_id == batch_id,
         DailyBatch.age == 16.7,
         DailyBatch.tenant_id == tenant_id
-    ).first()
-    
-    hen_housing = hen_housing_record.closing_count if hen_housing_record else 0
+    ).limit(1).scalar() or 0
     
-    # Calculate summary using existing logic
-    start_date = daily_batches[0].batch_date
-    end_date = daily_batches[-1].batch_date
-    summary_data = _calculate_summary(daily_batches, start_date, end_date, is_single_batch=True)
+    # Summary comes from the pre-aggregated facts of this age week
+    week_fact = db.query(BatchWeekFact).filter(
+        BatchWeekFact.batch_id == batch_id,
+        BatchWeekFact.tenant_id == tenant_id,
+        BatchWeekFact.age_week == start_age_week
+    ).first()
+    if week_fact:
+        summary_data = _week_fact_summary(week_fact, daily_frame.iloc[0])
+    else:
+        # Facts not built for this week yet (e.g. rows written outside the app); use the daily rows
+        summary_data = summarize_daily_frame(daily_frame)
     
     if summary_data:
-        total_actual_feed_consumed = sum(record.feed_in_kg for record in daily_batches if record.feed_in_kg is not None)
-        total_standard_feed_consumption = sum(record.standard_feed_in_kg * record.opening_count for record in daily_batches if record.standard_feed_in_kg is not None and record.opening_count is not None)
-        
-        summary_data["actual_feed_consumed"] = total_actual_feed_consumed
-        summary_data["standard_feed_consumption"] = total_standard_feed_consumption
+        total_actual_feed_consumed = summary_data["actual_feed_consumed"]
         summary_data["hen_housing"] = hen_housing
         
         # Calculate hen housing percentages
@@ -438,40 +373,12 @@ def get_weekly_layer_report(
             summary_data["feed_per_bird_per_day_grams"] = 0
     
     # Prepare detailed results
-    detailed_result = []
-    for batch in daily_batches:
-        actual_feed_consumed = batch.feed_in_kg
-        standard_feed_consumption = None
-        if batch.standard_feed_in_kg is not None and batch.opening_count is not None:
-            standard_feed_consumption = batch.standard_feed_in_kg * batch.opening_count
-
-        detailed_result.append({
-            "batch_id": batch.batch_id,
-            "batch_no": batch.batch_no,
-            "batch_date": batch.batch_date.strftime("%d-%m-%Y"),
-            "shed_id": batch.shed_id,
-            "age": batch.age,
-            "opening_count": batch.opening_count,
-            "mortality": batch.mortality,
-            "culls": batch.culls,
-            "closing_count": batch.closing_count,
-            "table_eggs": batch.table_eggs,
-            "jumbo": batch.jumbo,
-            "cr": batch.cr,
-            "total_eggs": batch.total_eggs,
-            "batch_type": batch.batch_type,
-            "hd": batch.hd,
-            "standard_hen_day_percentage": batch.standard_hen_day_percentage if batch.standard_hen_day_percentage is not None else None,
-            "actual_feed_consumed": actual_feed_consumed,
-            "standard_feed_consumption": standard_feed_consumption,
-            "is_active": batch.batch.is_active,
-            "birds_added": batch.birds_added,
-        })
+    detailed_result = daily_frame_records(daily_frame)
     
     # Calculate cumulative report
     cumulative_report = _calculate_cumulative_report(db, batch_id, week, hen_housing, summary_data, tenant_id)
     
-    # Use custom JSON encoder to handle Decimal objects
+    # FastJSONResponse encodes the Decimal values as floats
     response_content = {
         "details": detailed_result,
         "summary": summary_data,
@@ -480,7 +387,7 @@ def get_weekly_layer_report(
         "hen_housing": hen_housing,
         "cumulative_report": cumulative_report
     }
-    return JSONResponse(content=json.loads(json.dumps(response_content, cls=DecimalEncoder)))
+    return FastJSONResponse(content=response_content)
 
 @router.get("/snapshot")
 def get_snapshot(start_date: str, end_date: str, batch_id: Optional[int] = None, db: Session = Depends(get_db), tenant_id: str = Depends(get_tenant_id)):
@@ -498,12 +405,6 @@ def get_snapshot(start_date: str, end_date: str, batch_id: Optional[int] = None,
     if start_date_obj > end_date_obj:
         raise HTTPException(status_code=400, detail="Start date cannot be after the end date")
 
-    query = db.query(DailyBatch).join(Batch).filter(
-        DailyBatch.batch_date >= start_date_obj,
-        DailyBatch.batch_date <= end_date_obj,
-        Batch.tenant_id == tenant_id
-    )
-
     summary_data = None
     detailed_result = []
 
@@ -512,178 +413,116 @@ def get_snapshot(start_date: str, end_date: str, batch_id: Optional[int] = None,
         if not batch_obj:
             raise HTTPException(status_code=404, detail="Batch not found")
 
-        query = query.filter(DailyBatch.batch_id == batch_id)
-        daily_batches = query.order_by(DailyBatch.batch_date.asc()).all()
-        summary_data = _calculate_summary(daily_batches, start_date_obj, end_date_obj, is_single_batch=True)
-
-        if summary_data:
-            total_actual_feed_consumed = sum(record.feed_in_kg for record in daily_batches if record.feed_in_kg is not None)
-            total_standard_feed_consumption = sum(record.standard_feed_in_kg * record.opening_count for record in daily_batches if record.standard_feed_in_kg is not None and record.opening_count is not None)
-            
-            summary_data["actual_feed_consumed"] = total_actual_feed_consumed
-            summary_data["standard_feed_consumption"] = total_standard_feed_consumption
-
         # For a single batch, the details are the daily records
-        for batch in daily_batches:
-            actual_feed_consumed = batch.feed_in_kg
-            standard_feed_consumption = None
-            if batch.standard_feed_in_kg is not None and batch.opening_count is not None:
-                standard_feed_consumption = batch.standard_feed_in_kg * batch.opening_count
-
-            detailed_result.append({
-                "batch_id": batch.batch_id,
-                "batch_no": batch.batch_no,
-                "batch_date": batch.batch_date.strftime("%d-%m-%Y"),
-                "shed_id": batch.shed_id,
-                "age": batch.age,
-                "opening_count": batch.opening_count,
-                "mortality": batch.mortality,
-                "culls": batch.culls,
-                "closing_count": batch.closing_count,
-                "table_eggs": batch.table_eggs,
-                "jumbo": batch.jumbo,
-                "cr": batch.cr,
-                "total_eggs": batch.total_eggs,
-                "batch_type": batch.batch_type,
-                "hd": batch.hd,
-                "standard_hen_day_percentage": batch.standard_hen_day_percentage if batch.standard_hen_day_percentage is not None else None,
-                "actual_feed_consumed": actual_feed_consumed,
-                "standard_feed_consumption": standard_feed_consumption,
-                "is_active": batch_obj.is_active,
-                "birds_added": batch.birds_added,
-            })
+        daily_frame = load_daily_batch_frame(db, tenant_id, start_date=start_date_obj, end_date=end_date_obj, batch_id=batch_id)
+        summary_data = summarize_daily_frame(daily_frame)
+        detailed_result = daily_frame_records(daily_frame)
 
     else:
-        # No batch_id provided, so we consolidate.
-        
-        # Subquery to get the first opening count for each batch in the date range
-        first_opening_sq = (
+        # No batch_id provided, so we consolidate into one row per batch with a single query:
+        # window functions pick each batch's first/last values in the range, then GROUP BY
+        # aggregates the daily rows (standards and feed are joined rather than looked up per row).
+        is_layer = DailyBatch.age > 17
+        first_in_range = dict(partition_by=DailyBatch.batch_id, order_by=DailyBatch.batch_date.asc())
+        last_in_range = dict(partition_by=DailyBatch.batch_id, order_by=DailyBatch.batch_date.desc())
+
+        daily_sq = (
             db.query(
                 DailyBatch.batch_id,
-                DailyBatch.opening_count.label("first_opening_count")
+                DailyBatch.age,
+                DailyBatch.opening_count,
+                func.coalesce(DailyBatch.mortality, 0).label("mortality"),
+                func.coalesce(DailyBatch.culls, 0).label("culls"),
+                func.coalesce(DailyBatch.table_eggs, 0).label("table_eggs"),
+                func.coalesce(DailyBatch.jumbo, 0).label("jumbo"),
+                func.coalesce(DailyBatch.cr, 0).label("cr"),
+                func.coalesce(DailyBatch.birds_added, 0).label("birds_added"),
+                is_layer.label("is_layer"),
+                case(
+                    (DailyBatch.closing_count > 0, cast(DailyBatch.total_eggs, Float) / DailyBatch.closing_count),
+                    else_=0.0
+                ).label("hd"),
+                EffectiveStandardCurve.lay_percent.label("standard_hd"),
+                (EffectiveStandardCurve.feed_intake_per_day_g * DailyBatch.opening_count).label("standard_feed_g"),
+                DailyFeedRollup.net_feed_kg.label("feed_kg"),
+                func.first_value(DailyBatch.batch_no).over(**first_in_range).label("batch_no"),
+                func.first_value(DailyBatch.shed_id).over(**first_in_range).label("shed_id"),
+                func.first_value(DailyBatch.opening_count).over(**first_in_range).label("first_opening_count"),
+                func.first_value(DailyBatch.closing_count).over(**last_in_range).label("last_closing_count"),
+                func.first_value(DailyBatch.batch_type).over(**last_in_range).label("last_batch_type"),
+                Batch.is_active.label("is_active"),
+            )
+            .select_from(DailyBatch)
+            .join(Batch, DailyBatch.batch_id == Batch.id)
+            .outerjoin(EffectiveStandardCurve, standard_curve_onclause(DailyBatch))
+            .outerjoin(
+                DailyFeedRollup,
+                and_(DailyFeedRollup.batch_id == DailyBatch.batch_id, DailyFeedRollup.feed_date == DailyBatch.batch_date)
             )
             .filter(
                 DailyBatch.batch_date >= start_date_obj,
                 DailyBatch.batch_date <= end_date_obj,
-                DailyBatch.tenant_id == tenant_id
+                Batch.tenant_id == tenant_id,
             )
-            .order_by(DailyBatch.batch_id, DailyBatch.batch_date.asc())
-            .distinct(DailyBatch.batch_id)
-            .subquery('first_opening_sq')
+            .subquery("daily_sq")
         )
 
-        # Subquery to get the last closing count for each batch in the date range
-        last_closing_sq = (
-            db.query(
-                DailyBatch.batch_id,
-                DailyBatch.closing_count.label("last_closing_count")
-            )
-            .filter(
-                DailyBatch.batch_date >= start_date_obj,
-                DailyBatch.batch_date <= end_date_obj,
-                DailyBatch.tenant_id == tenant_id
-            )
-            .order_by(DailyBatch.batch_id, DailyBatch.batch_date.desc())
-            .distinct(DailyBatch.batch_id)
-            .subquery('last_closing_sq')
+        per_batch_keys = (
+            daily_sq.c.batch_id, daily_sq.c.batch_no, daily_sq.c.shed_id, daily_sq.c.first_opening_count,
+            daily_sq.c.last_closing_count, daily_sq.c.last_batch_type, daily_sq.c.is_active,
         )
-        
-        # Subquery to get the last batch type for each batch in the date range
-        last_batch_type_sq = (
+        batch_rows = (
             db.query(
-                DailyBatch.batch_id,
-                DailyBatch.batch_type.label("last_batch_type")
-            )
-            .filter(
-                DailyBatch.batch_date >= start_date_obj,
-                DailyBatch.batch_date <= end_date_obj,
-                DailyBatch.tenant_id == tenant_id
-            )
-            .order_by(DailyBatch.batch_id, DailyBatch.batch_date.desc())
-            .distinct(DailyBatch.batch_id)
-            .subquery('last_batch_type_sq')
-        )
-
-        # Fetch all daily rows for the tenant & date range and aggregate in Python
-        # Import is now at the top of the file
-
-        daily_rows = (
-            db.query(DailyBatch)
-            .select_from(DailyBatch)
-            .join(Batch, DailyBatch.batch_id == Batch.id)
-            .filter(
-                DailyBatch.batch_date >= start_date_obj,
-                DailyBatch.batch_date <= end_date_obj,
-                Batch.tenant_id == tenant_id,
+                *per_batch_keys,
+                func.sum(daily_sq.c.mortality).label("mortality"),
+                func.sum(daily_sq.c.culls).label("culls"),
+                func.sum(daily_sq.c.table_eggs).label("table_eggs"),
+                func.sum(daily_sq.c.jumbo).label("jumbo"),
+                func.sum(daily_sq.c.cr).label("cr"),
+                func.sum(daily_sq.c.birds_added).label("birds_added"),
+                func.count().filter(daily_sq.c.is_layer).label("layer_days"),
+                func.sum(daily_sq.c.hd).filter(daily_sq.c.is_layer).label("layer_hd_sum"),
+                func.avg(daily_sq.c.standard_hd).filter(daily_sq.c.is_layer).label("avg_standard_hd"),
+                func.max(daily_sq.c.age).label("highest_age"),
+                func.coalesce(func.sum(daily_sq.c.feed_kg), 0).label("feed_kg"),
+                func.count(daily_sq.c.standard_feed_g).label("standard_feed_days"),
+                func.sum(daily_sq.c.standard_feed_g).label("standard_feed_g"),
             )
-            .order_by(DailyBatch.batch_id, DailyBatch.batch_date)
+            .group_by(*per_batch_keys)
+            .order_by(daily_sq.c.batch_id)
             .all()
         )
 
-        groups = defaultdict(list)
-        for row in daily_rows:
-            groups[row.batch_id].append(row)
-
         detailed_result = []
-        for batch_id, rows in groups.items():
-            # first and last records per batch in the date range (rows are ordered by date)
-            first = rows[0]
-            last = rows[-1]
-
-            total_mortality = sum(r.mortality or 0 for r in rows)
-            total_culls = sum(r.culls or 0 for r in rows)
-            total_table_eggs = sum(r.table_eggs or 0 for r in rows)
-            total_jumbo = sum(r.jumbo or 0 for r in rows)
-            total_cr = sum(r.cr or 0 for r in rows)
-            total_eggs = total_table_eggs + total_jumbo + total_cr
-
+        for row in batch_rows:
             # hd average and standard hd average across layer days
-            layer_rows = [r for r in rows if _is_layer_age(r.age)]
-            if layer_rows:
-                hd_values = [r.hd for r in layer_rows if r.hd is not None]
-                avg_hd = sum(hd_values) / len(hd_values) if hd_values else 0
-                std_hd_values = [r.standard_hen_day_percentage for r in layer_rows if r.standard_hen_day_percentage is not None]
-                avg_std_hd = sum(std_hd_values) / len(std_hd_values) if std_hd_values else 0
-            else:
-                avg_hd = 0
-                avg_std_hd = 0
-
-            highest_age = 0.0
-            for r in rows:
-                try:
-                    a = r.age
-                    if a > highest_age:
-                        highest_age = a
-                except (ValueError, TypeError):
-                    continue
-
-            total_birds_added = sum(r.birds_added or 0 for r in rows)
-
-            actual_feed_consumed = sum(r.feed_in_kg for r in rows if r.feed_in_kg is not None)
-            standard_feed_consumption = sum(r.standard_feed_in_kg * r.opening_count for r in rows if r.standard_feed_in_kg is not None and r.opening_count is not None)
-            
+            avg_hd = row.layer_hd_sum / row.layer_days if row.layer_days else 0
+            avg_std_hd = row.avg_standard_hd if row.layer_days and row.avg_standard_hd is not None else 0
+
+            highest_age = row.highest_age if row.highest_age is not None and row.highest_age > 0 else 0.0
+            standard_feed_consumption = row.standard_feed_g / 1000 if row.standard_feed_days else 0
+
             detailed_result.append({
-                "batch_id": batch_id,
-                "batch_no": first.batch_no,
-                "shed_id": first.shed_id,
-                "opening_count": first.opening_count,
-                "mortality": total_mortality,
-                "culls": total_culls,
-                "closing_count": last.closing_count,
-                "table_eggs": total_table_eggs,
-                "jumbo": total_jumbo,
-                "cr": total_cr,
-                "total_eggs": total_eggs,
+                "batch_id": row.batch_id,
+                "batch_no": row.batch_no,
+                "shed_id": row.shed_id,
+                "opening_count": row.first_opening_count,
+                "mortality": row.mortality,
+                "culls": row.culls,
+                "closing_count": row.last_closing_count,
+                "table_eggs": row.table_eggs,
+                "jumbo": row.jumbo,
+                "cr": row.cr,
+                "total_eggs": row.table_eggs + row.jumbo + row.cr,
                 "hd": round(avg_hd, 4),
                 "standard_hen_day_percentage": round(avg_std_hd, 4),
-                "actual_feed_consumed": actual_feed_consumed,
+                "actual_feed_consumed": float(row.feed_kg),
                 "standard_feed_consumption": standard_feed_consumption,
                 "highest_age": round(highest_age, 1),
-                "batch_type": last.batch_type,
-                "is_active": first.batch.is_active,
-                "birds_added": total_birds_added,
+                "batch_type": row.last_batch_type,
+                "is_active": row.is_active,
+                "birds_added": row.birds_added,
             })
-        # import pdb; pdb.set_trace()
 
         if detailed_result:
             layer_batches_in_detailed = [r for r in detailed_result if r.get("batch_type") == "Layer"]
@@ -712,134 +551,105 @@ def get_snapshot(start_date: str, end_date: str, batch_id: Optional[int] = None,
         "summary": summary_data
     }
 
-    # Use custom JSON encoder to handle Decimal objects
-    return JSONResponse(content=json.loads(json.dumps(response_content, cls=DecimalEncoder)))
-
-def write_daily_report_excel(batches, report_date=None, file_path=None, tenant_id: str = None):
-    if report_date is None:
-        report_date = date.today()
-    if file_path is None:
-        file_path = f"daily_report_combined_{tenant_id}.xlsx" if tenant_id else "daily_report_combined.xlsx"
+    # FastJSONResponse encodes the Decimal values as floats
+    return FastJSONResponse(content=response_content)
 
-    report_date_str = report_date.strftime("%d-%m-%Y")
-    header1 = ["DATE", report_date_str, "", "", "DAILY REPORT", "", "", "", "", "", "", "","", ""]
-    # Adjust header1 to match the number of columns in header2
-    header2 = ["BATCH", "SHED", "AGE", "OPEN", "MORT", "CULLS", "CLOSING", "TABLE", "JUMBO", "CR", "TOTAL", "HD%", "STD"]
+DAILY_REPORT_COLUMNS = ["BATCH", "SHED", "AGE", "OPEN", "MORT", "CULLS", "CLOSING", "TABLE", "JUMBO", "CR", "TOTAL", "HD%", "STD"]
 
-    if os.path.exists(file_path):
-        wb = load_workbook(file_path)
-        ws = wb.active
-    else:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Daily Report"
-
-    # Find if today's report already exists and remove it
-    found_row = None
-    for i in range(ws.max_row, 0, -1):  # Start from last row to first
-        row = [cell.value for cell in ws[i]]
-        if row and row[0] == "DATE" and row[1] == report_date_str:
-            found_row = i
-            break
-
-
-    if found_row:
-        # Remove existing block (today's DATE to TOTAL row)
-        end_row = found_row
-        while end_row <= ws.max_row:
-            if ws.cell(row=end_row, column=1).value == "TOTAL":
-                break
-            end_row += 1
-        ws.delete_rows(found_row, end_row - found_row + 1)
-
-    # Append data to bottom
-    # Check if the last row is empty and add a blank row for spacing
-    last_row_values = [cell.value for cell in ws[ws.max_row]]
-    if any(last_row_values):  # if the last row is not completely empty
-        ws.append([])         # add a blank row for spacing
-        start_row = ws.max_row + 2
-    else:
-        start_row = ws.max_row + 1
-
-    # Now append header and data
-    ws.append(header1)
-    ws.append(header2)
-    
-    # Write batch rows
-    total_open = total_mort = total_culls = total_closing = total_table = total_jumbo = total_cr = total_total = total_hd_percent = 0
-    for batch in batches:
-        row = [
-            batch.batch_no,
-            batch.shed_id,
-            batch.age,
-            batch.opening_count,
-            batch.mortality,
-            batch.culls,
-            batch.closing_count,
-            getattr(batch, "table_eggs", 0),
-            getattr(batch, "jumbo", 0),
-            getattr(batch, "cr", 0),
-            getattr(batch, "total", 0),
-            round(batch.hd, 4) if batch.hd is not None else 0,
-            0
-        ]
-        ws.append(row)
-        total_open += batch.opening_count
-        total_mort += batch.mortality
-        total_culls += batch.culls
-        total_closing += batch.closing_count
-        total_table += getattr(batch, "table_eggs", 0)
-        total_jumbo += getattr(batch, "jumbo", 0)
-        total_cr += getattr(batch, "cr", 0)
-        total_total += getattr(batch, "total", 0)
-        # Accumulate hd values for totals
-        total_hd_percent += round(batch.hd, 4) if batch.hd is not None else 0
-        
 
-    # Write totals row
-    ws.append([
-        "TOTAL", "", 0, total_open, total_mort, total_culls, total_closing,
-        total_table, total_jumbo, total_cr, total_total,
-         round(total_hd_percent / len(batches) if batches else 0, 4),
-         0
-    ])
+def write_daily_report_excel(daily_frame, output):
+    """
+    Writes the combined daily report, one block per date, into output (a file or buffer).
 
-    # Apply formatting
+    daily_frame is a crud.daily_batch_frame frame ordered by batch_date. The workbook is built in
+    openpyxl's write-only mode, so rows are streamed out as they are written.
+    """
     yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
     red_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
     orange_red_fill = PatternFill(start_color="FF6600", end_color="FF6600", fill_type="solid") # Closer to the image's orange-red
     bold_font_black = Font(bold=True, color="000000") # Black font for yellow fill
     bold_font_white = Font(bold=True, color="FFFFFF") # White font for red/orange-red fill
 
-     # Formatting for header1 (DATE and DAILY REPORT)
-    date_cell = ws.cell(row=start_row, column=1)
-    date_cell.fill = yellow_fill
-    date_cell.font = bold_font_black
-
-    report_date_cell = ws.cell(row=start_row, column=2)
-    report_date_cell.fill = yellow_fill
-    report_date_cell.font = bold_font_black
-
-    daily_report_cell = ws.cell(row=start_row, column=5) # Column E (5th column) for "DAILY REPORT"
-    daily_report_cell.value = "DAILY REPORT"
-    daily_report_cell.fill = red_fill
-    daily_report_cell.font = bold_font_white
-    # Merge cells for "DAILY REPORT"
-    ws.merge_cells(start_row=start_row, start_column=5, end_row=start_row, end_column=len(header2))
-    daily_report_cell.alignment = Alignment(horizontal='center', vertical='center')
-
-
-    # Formatting for header2 (BATCH, SHED, etc.)
-    for col_idx, cell in enumerate(ws[start_row + 1]):
-        cell.fill = orange_red_fill
-        cell.font = bold_font_white
-        # Set column width
-        ws.column_dimensions[get_column_letter(col_idx + 1)].width = 10 # Adjust width as needed
-
-    # Formatting for Total row
-    for cell in ws[ws.max_row]:
-        cell.fill = yellow_fill
-        cell.font = bold_font_black
-
-    wb.save(file_path)
-    return file_path
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Daily Report")
+    # Column widths must be set before the first row is written
+    for col_idx in range(1, len(DAILY_REPORT_COLUMNS) + 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = 10 # Adjust width as needed
+
+    def styled(value, fill, font, alignment=None):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.fill = fill
+        cell.font = font
+        if alignment:
+            cell.alignment = alignment
+        return cell
+
+    # One cell value per report column; HD and the standard (lay percent as a ratio) rounded like the HD% column
+    cells = daily_frame[["batch_no", "shed_id", "age", "opening_count", "mortality", "culls", "closing_count", "table_eggs", "jumbo", "cr", "total_eggs"]].copy()
+    cells[["table_eggs", "jumbo", "cr"]] = cells[["table_eggs", "jumbo", "cr"]].fillna(0)
+    cells["hd"] = daily_frame["hd"].round(4)
+    cells["std"] = (daily_frame["standard_hen_day_percentage"] / 100).round(4).fillna(0)
+    cells = cells.astype(object).where(cells.notna(), None)
+    sum_columns = ["opening_count", "mortality", "culls", "closing_count", "table_eggs", "jumbo", "cr", "total_eggs", "hd", "std"]
+
+    row_idx = 0
+    for report_date, day_cells in cells.groupby(daily_frame["batch_date"], sort=False):
+        if row_idx:
+            ws.append([])  # blank row for spacing between days
+            row_idx += 1
+
+        # Header rows: DATE and DAILY REPORT, then the column titles
+        ws.append([
+            styled("DATE", yellow_fill, bold_font_black),
+            styled(report_date.strftime("%d-%m-%Y"), yellow_fill, bold_font_black),
+            "", "",
+            styled("DAILY REPORT", red_fill, bold_font_white, Alignment(horizontal='center', vertical='center')),
+        ])
+        ws.merged_cells.add(f"E{row_idx + 1}:{get_column_letter(len(DAILY_REPORT_COLUMNS))}{row_idx + 1}")
+        ws.append([styled(title, orange_red_fill, bold_font_white) for title in DAILY_REPORT_COLUMNS])
+        row_idx += 2
+
+        # Write batch rows
+        for values in day_cells.itertuples(index=False, name=None):
+            ws.append(list(values))
+        row_idx += len(day_cells)
+
+        # Write totals row
+        totals = day_cells[sum_columns].fillna(0).sum()
+        batch_count = len(day_cells)
+        ws.append([styled(value, yellow_fill, bold_font_black) for value in [
+            "TOTAL", "", 0,
+            *[int(totals[column]) for column in sum_columns[:-2]],
+            round(float(totals["hd"]) / batch_count, 4),
+            round(float(totals["std"]) / batch_count, 4)
+        ]])
+        row_idx += 1
+
+    wb.save(output)
+    return output
+
+
+@router.get("/daily-report-excel", tags=["Egg Reports"])
+def get_daily_report_excel(
+    start_date: date,
+    end_date: date,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_tenant_id)
+):
+    """
+    Download the combined daily report for a date range as an Excel file, one block per day.
+    """
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date must be before end date")
+
+    daily_frame = load_daily_batch_frame(
+        db, tenant_id, start_date=start_date, end_date=end_date, order_by=[DailyBatch.batch_date, DailyBatch.batch_no]
+    )
+
+    output = write_daily_report_excel(daily_frame, io.BytesIO())
+    output.seek(0)
+    return StreamingResponse(
+        output,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f"attachment; filename=daily_report_{start_date}_{end_date}.xlsx"}
+    )
@@ -33,6 +33,8 @@ from models.inventory_item_audit import InventoryItemAudit
 from models.egg_room_reports import EggRoomReport as EggRoomReportModel
 from crud import app_config as crud_app_config # Import app_config crud
 from crud import egg_room_reports as crud_egg_room_reports # Import egg_room_reports crud
+from crud import egg_stock_ledger as crud_egg_stock_ledger
+from models.egg_stock_checkpoint import mark_egg_stock_stale
 from schemas.sales_orders import (
     SalesOrder as SalesOrderSchema,
     SalesOrderCreate,
@@ -521,6 +523,7 @@ def create_sales_order(
                 db=db, report=report_create, tenant_id=tenant_id, user_id=get_user_identifier(user)
             )
 
+        mark_egg_stock_stale(db, tenant_id, so.order_date)
         # Use an atomic UPDATE to avoid lost updates when multiple SOs modify the same report concurrently
         db.query(EggRoomReportModel).filter(
             EggRoomReportModel.report_date == so.order_date,
@@ -619,30 +622,24 @@ def create_sales_order(
 def _get_available_egg_stock(db: Session, tenant_id: str, order_date: date, egg_type: str) -> float:
     logger.info(f"Checking available stock for {egg_type} on {order_date} for tenant {tenant_id}")
     
-    # First, try to get the report for the exact date
-    egg_room_report = crud_egg_room_reports.get_report_by_date(db, order_date.isoformat(), tenant_id)
-    
-    # If no report is found for the exact date, get the most recent one before it
-    if not egg_room_report:
-        logger.warning(f"No EggRoomReport found for {order_date}. Trying to find the most recent report before this date.")
-        egg_room_report = db.query(EggRoomReportModel).filter(
-            EggRoomReportModel.report_date < order_date,
-            EggRoomReportModel.tenant_id == tenant_id
-        ).order_by(EggRoomReportModel.report_date.desc()).first()
+    # Stock as of the report for the exact date, or the most recent one before it, from the egg stock ledger
+    egg_stock = crud_egg_stock_ledger.get_egg_stock(db, tenant_id, as_of=order_date)
 
-    if not egg_room_report:
+    if not egg_stock:
         logger.warning(f"No EggRoomReport found for or before {order_date} for tenant {tenant_id}. Returning 0.0 available stock.")
         return 0.0
+    if egg_stock["report_date"] != order_date:
+        logger.warning(f"No EggRoomReport found for {order_date}. Using the stock as of the most recent report on {egg_stock['report_date']}.")
 
     available_stock = Decimal("0.0")
     if egg_type == "Table Egg":
-        available_stock = Decimal(str(egg_room_report.table_closing))
+        available_stock = Decimal(str(egg_stock["table_closing"]))
         logger.info(f"Table Egg closing stock: {available_stock}")
     elif egg_type == "Jumbo Egg":
-        available_stock = Decimal(str(egg_room_report.jumbo_closing))
+        available_stock = Decimal(str(egg_stock["jumbo_closing"]))
         logger.info(f"Jumbo Egg closing stock: {available_stock}")
     elif egg_type == "Grade C Egg":
-        available_stock = Decimal(str(egg_room_report.grade_c_closing))
+        available_stock = Decimal(str(egg_stock["grade_c_closing"]))
         logger.info(f"Grade C Egg closing stock: {available_stock}")
     
     # Retrieve EGG_STOCK_TOLERANCE from app_config
@@ -994,6 +991,7 @@ def update_sales_order(
                 EggRoomReportModel.tenant_id == tenant_id
             ).first()
             if old_egg_room_report:
+                mark_egg_stock_stale(db, tenant_id, old_order_date)
                 # Atomically subtract from old date report to avoid race conditions
                 db.query(EggRoomReportModel).filter(
                     EggRoomReportModel.report_date == old_order_date,
@@ -1026,6 +1024,7 @@ def update_sales_order(
                     user_id=get_user_identifier(user)
                 )
             
+            mark_egg_stock_stale(db, tenant_id, new_order_date)
             # Atomically add to new date report
             db.query(EggRoomReportModel).filter(
                 EggRoomReportModel.report_date == new_order_date,
@@ -1159,6 +1158,7 @@ def add_item_to_sales_order(
                 db=db, report=report_create, tenant_id=tenant_id, user_id=get_user_identifier(user)
             )
 
+        mark_egg_stock_stale(db, tenant_id, db_so.order_date)
         # Atomic update to avoid lost updates when concurrent requests modify the same report
         if db_inventory_item.name == "Table Egg":
             db.query(EggRoomReportModel).filter(
@@ -1273,6 +1273,7 @@ def update_sales_order_item(
                 ).first()
                 logger.info(f"[ITEM CHANGE] Old item is an egg. Found egg room report for {db_so.order_date}: {'Yes' if egg_room_report else 'No'}")
                 if egg_room_report:
+                    mark_egg_stock_stale(db, tenant_id, db_so.order_date)
                     # Atomic subtraction
                     if old_inv_item.name == "Table Egg":
                         db.query(EggRoomReportModel).filter(
@@ -1352,6 +1353,7 @@ def update_sales_order_item(
                         db=db, report=report_create, tenant_id=tenant_id, user_id=get_user_identifier(user)
                     )
                 if egg_room_report:
+                    mark_egg_stock_stale(db, tenant_id, db_so.order_date)
                     # Atomic addition
                     if new_inv_item.name == "Table Egg":
                         db.query(EggRoomReportModel).filter(
@@ -1404,6 +1406,7 @@ def update_sales_order_item(
                             db=db, report=report_create, tenant_id=tenant_id, user_id=get_user_identifier(user)
                         )
                     
+                    mark_egg_stock_stale(db, tenant_id, db_so.order_date)
                     # Atomic adjustment for quantity delta
                     if inv.name == "Table Egg":
                         db.query(EggRoomReportModel).filter(
@@ -1504,6 +1507,7 @@ def delete_sales_order_item(
                 ).first()
 
                 if egg_room_report:
+                    mark_egg_stock_stale(db, tenant_id, db_so.order_date)
                     # Atomic subtraction when deleting an item
                     if inv.name == "Table Egg":
                         db.query(EggRoomReportModel).filter(
@@ -1610,6 +1614,7 @@ def delete_sales_order(
         ).first()
 
         if egg_room_report:
+            mark_egg_stock_stale(db, tenant_id, db_so.order_date)
             # Use atomic updates with COALESCE to handle NULL values
             db.query(EggRoomReportModel).filter(
                 EggRoomReportModel.report_date == db_so.order_date,
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class DailyBatchUploadJob(BaseModel):
+    id: int
+    kind: str
+    batch_id: Optional[int] = None
+    filename: Optional[str] = None
+    status: str
+    rows_parsed: int
+    rows_written: int
+    rows_skipped: int
+    errors: List[str] = []
+    message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
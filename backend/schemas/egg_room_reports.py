@@ -116,4 +116,15 @@ class EggRoomReportSummary(BaseModel):
 
 class EggRoomReportsListResponse(BaseModel):
     details: List[EggRoomReportResponse]
-    summary: EggRoomReportSummary
\ No newline at end of file
+    summary: EggRoomReportSummary
+
+
+class EggRoomReportDayResponse(EggRoomReportResponse):
+    # Days without a stored report are returned as virtual reports
+    created_at: Optional[datetime] = None
+    stored: bool = True
+
+
+class EggRoomReportDaysResponse(BaseModel):
+    details: List[EggRoomReportDayResponse]
+    summary: EggRoomReportSummary
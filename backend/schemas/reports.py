@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List
+from datetime import date
+from typing import List, Optional
 
 class InventoryValue(BaseModel):
     total_inventory_value: float
@@ -16,6 +17,20 @@ class TopSellingItem(BaseModel):
 class TopSellingItemsReport(BaseModel):
     report_data: List[TopSellingItem]
 
+class SalesBreakdownItem(BaseModel):
+    # Only the dimensions the breakdown is grouped by are set
+    customer_id: Optional[int] = None
+    customer_name: Optional[str] = None
+    item_id: Optional[int] = None
+    composition_id: Optional[int] = None
+    item_name: Optional[str] = None
+    variant_id: Optional[int] = None
+    variant_name: Optional[str] = None
+    month: Optional[date] = None
+    total_quantity_sold: float
+    total_amount: float
+    order_lines: int
+
 class CompositionUsage(BaseModel):
     composition_name: str
     total_usage: float
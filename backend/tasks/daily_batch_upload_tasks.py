@@ -0,0 +1,210 @@
+"""
+Background processing of daily-batch Excel uploads.
+
+The upload endpoints only persist the file and queue a DailyBatchUploadJob; run_upload_job
+then parses and ingests the sheet with its own sessions. The data session is committed once
+at the end, so a failed upload leaves daily_batch untouched, while progress counters are
+committed on a separate session as the sheet is read and its rows are written.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+import crud.daily_batch as crud_daily_batch
+from crud import daily_batch_upload_job as crud_upload_job
+from database import SessionLocal
+from models.batch import Batch
+from models.daily_batch_upload_job import DailyBatchUploadJob
+from utils.age_utils import calculate_age_progression
+from utils.daily_batch_excel import iter_daily_report_rows, read_weekly_report_rows, cell_int
+
+logger = logging.getLogger(__name__)
+
+# Progress counters are written back to the job row every this many parsed rows
+PROGRESS_FLUSH_ROWS = 500
+
+
+class UploadJobProgress:
+    """Collects row counters and messages for a job and flushes them to its row."""
+
+    def __init__(self, job_db: Session, job: DailyBatchUploadJob):
+        self.job_db = job_db
+        self.job = job
+        self.rows_parsed = 0
+        self.rows_written = 0
+        self.rows_skipped = 0
+        self.errors = []
+        self._unflushed = 0
+
+    def parsed(self):
+        self.rows_parsed += 1
+        self._tick()
+
+    def skipped(self, reason: str):
+        logger.warning(reason)
+        self.rows_skipped += 1
+        self.errors.append(reason)
+        self._tick()
+
+    def written(self, rows: int):
+        """Counts rows written to the (still uncommitted) data session and publishes them."""
+        self.rows_written += rows
+        self.flush()
+
+    def _tick(self):
+        self._unflushed += 1
+        if self._unflushed >= PROGRESS_FLUSH_ROWS:
+            self.flush()
+
+    def flush(self, **values):
+        self._unflushed = 0
+        crud_upload_job.update_upload_job(
+            self.job_db, self.job,
+            rows_parsed=self.rows_parsed,
+            rows_written=self.rows_written,
+            rows_skipped=self.rows_skipped,
+            errors=self.errors,
+            **values
+        )
+
+
+def process_weekly_report(db: Session, job: DailyBatchUploadJob, progress: UploadJobProgress) -> str:
+    """Ingests a single batch's weekly report. Returns the completion message."""
+    batch_obj = db.query(Batch).filter(Batch.id == job.batch_id, Batch.tenant_id == job.tenant_id).first()
+    if not batch_obj:
+        raise ValueError(f"Batch with id {job.batch_id} not found.")
+
+    initial_batch_age = batch_obj.age
+    batch_start_date = batch_obj.date
+    if isinstance(batch_start_date, datetime):
+        batch_start_date = batch_start_date.date()
+
+    # Collect the uploaded rows keyed by date (a repeated date keeps the last row)
+    uploaded_rows = {}
+    for row_number, batch_date, values in read_weekly_report_rows(job.file_path):
+        days_diff = (batch_date - batch_start_date).days
+        if days_diff < 0:
+            raise ValueError(f"Batch date {batch_date} cannot be before batch start date {batch_start_date} in row {row_number}.")
+
+        uploaded_rows[batch_date] = {
+            **values,
+            "birds_added": 0,  # Default value as birds_added is not supported in Excel upload
+            "age": calculate_age_progression(initial_batch_age, days_diff),
+        }
+        progress.parsed()
+
+    shed_assignments = crud_daily_batch.get_shed_assignments(db, [batch_obj.id])[batch_obj.id]
+    crud_daily_batch.ingest_uploaded_rows(
+        db, batch_obj, uploaded_rows, job.tenant_id, job.created_by,
+        shed_assignments=shed_assignments, refresh_metadata=True, on_rows_written=progress.written
+    )
+    return f"File '{job.filename}' processed. {progress.rows_written} daily batch records created or updated for batch {batch_obj.id}."
+
+
+def process_daily_report(db: Session, job: DailyBatchUploadJob, progress: UploadJobProgress) -> str:
+    """
+    Ingests the consolidated daily report covering every batch of the tenant.
+    The workbook is streamed row by row and grouped per batch, so every batch is
+    written in one bulk upsert and propagated once. Returns the completion message.
+    """
+    all_batches = db.query(Batch).filter(Batch.tenant_id == job.tenant_id).all()
+    batch_map = {b.batch_no: b for b in all_batches}
+
+    # batch_id -> {report_date: sheet values}; a repeated (batch, date) keeps the last row
+    uploaded_by_batch = defaultdict(dict)
+
+    with open(job.file_path, "rb") as file_obj:
+        for report_date, row_idx, row in iter_daily_report_rows(file_obj):
+            try:
+                int(row[0]) # Validate batch_id is integer
+            except (ValueError, TypeError):
+                progress.skipped(f"Skipping row {row_idx} (Date: {report_date}) due to non-integer batch ID: '{row[0]}'.")
+                continue
+
+            if row[1] is None or row[2] is None or row[3] is None:
+                progress.skipped(f"Skipping row {row_idx} (Date: {report_date}) due to missing essential data: {list(row)}")
+                continue
+
+            batch_no_excel = str(row[1]).strip()
+            if batch_no_excel not in batch_map:
+                progress.skipped(f"Skipping row {row_idx} (Date: {report_date}) due to batch_no not found in batch table: '{batch_no_excel}'.")
+                continue
+
+            batch_obj = batch_map[batch_no_excel]
+            if report_date < batch_obj.date:
+                progress.skipped(f"Skipping row {row_idx} (Date: {report_date}) for batch '{batch_no_excel}' because it's before the batch start date ({batch_obj.date}).")
+                continue
+
+            # Age and opening_count are derived from the previous day (not from Excel)
+            uploaded_by_batch[batch_obj.id][report_date] = {
+                "mortality": cell_int(row[4]),
+                "culls": cell_int(row[5]),
+                "table_eggs": cell_int(row[7]),
+                "jumbo": cell_int(row[8]),
+                "cr": cell_int(row[9]),
+            }
+            progress.parsed()
+
+    batches_by_id = {b.id: b for b in all_batches}
+    shed_assignments = crud_daily_batch.get_shed_assignments(db, list(uploaded_by_batch))
+    for batch_id, uploaded_rows in uploaded_by_batch.items():
+        crud_daily_batch.ingest_uploaded_rows(
+            db, batches_by_id[batch_id], uploaded_rows, job.tenant_id, job.created_by,
+            shed_assignments=shed_assignments[batch_id], on_rows_written=progress.written
+        )
+    return f"File '{job.filename}' processed. {progress.rows_written} daily batch records created or updated."
+
+
+UPLOAD_PROCESSORS = {
+    "weekly_report": process_weekly_report,
+    "daily_report": process_daily_report,
+}
+
+
+def run_upload_job(job_id: int):
+    """
+    Processes a queued daily-batch upload job.
+
+    Args:
+        job_id: The DailyBatchUploadJob to run.
+    """
+    job_db: Session = SessionLocal()
+    db: Session = SessionLocal()
+    try:
+        job = job_db.query(DailyBatchUploadJob).filter(DailyBatchUploadJob.id == job_id).first()
+        if not job:
+            logger.error(f"Upload job {job_id} not found.")
+            return
+        if job.status != "queued":
+            logger.warning(f"Upload job {job_id} is already {job.status}. Skipping.")
+            return
+
+        logger.info(f"Starting {job.kind} upload job {job_id} for tenant '{job.tenant_id}'.")
+        progress = UploadJobProgress(job_db, job)
+        progress.flush(status="running")
+        try:
+            message = UPLOAD_PROCESSORS[job.kind](db, job, progress)
+            db.commit()
+        except ValueError as e:
+            db.rollback()
+            logger.warning(f"Upload job {job_id} rejected: {e}")
+            progress.rows_written = 0
+            progress.errors.append(str(e))
+            progress.flush(status="failed", message=str(e))
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Unhandled error during upload job {job_id}: {e}")
+            progress.rows_written = 0
+            progress.errors.append(f"Failed to process file: {e}")
+            progress.flush(status="failed", message=f"Failed to process file: {e}")
+        else:
+            progress.flush(status="completed", message=message)
+            logger.info(f"Upload job {job_id} completed: {message}")
+    except Exception as e:
+        job_db.rollback()
+        logger.exception(f"Could not record status of upload job {job_id}: {e}")
+    finally:
+        db.close()
+        job_db.close()
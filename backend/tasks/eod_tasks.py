@@ -1,15 +1,27 @@
 import logging
+import threading
 from datetime import date, timedelta
+from typing import Dict, Set, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, update
 
 from database import SessionLocal
 from models.egg_room_reports import EggRoomReport
 from models.daily_batch import DailyBatch
 from crud import app_config as crud_app_config
+from crud import egg_room_reports as crud_egg_room_reports
 
 logger = logging.getLogger(__name__)
 
+_propagation_lock = threading.Lock()
+# Tenants with a propagation running in this process
+_running_propagations: Set[str] = set()
+# tenant_id -> earliest start date requested while the tenant's propagation was running
+_pending_propagations: Dict[str, date] = {}
+# (tenant_id, report_date) of the egg room report repairs running in this process
+_running_repairs: Set[Tuple[str, date]] = set()
+
+
 def propagate_egg_room_updates(start_date: date, tenant_id: str):
     """
     Recalculates and propagates changes for egg room reports from a given start date.
@@ -18,10 +30,40 @@ def propagate_egg_room_updates(start_date: date, tenant_id: str):
     or an earlier egg_room_report could affect subsequent reports. This version
     handles gaps in reports by carrying over balances.
 
+    Requests for a tenant whose propagation is already running are coalesced: the
+    running task makes one more pass from the earliest start date requested meanwhile,
+    instead of every request walking the history on its own.
+
     Args:
         start_date: The date from which to start the propagation.
         tenant_id: The tenant for whom the propagation should run.
     """
+    with _propagation_lock:
+        if tenant_id in _running_propagations:
+            pending = _pending_propagations.get(tenant_id)
+            _pending_propagations[tenant_id] = start_date if pending is None else min(pending, start_date)
+            logger.info(f"Egg room propagation for tenant '{tenant_id}' already running; queued a pass from {_pending_propagations[tenant_id]}.")
+            return
+        _running_propagations.add(tenant_id)
+
+    try:
+        while True:
+            _propagate_egg_room_updates(start_date, tenant_id)
+            with _propagation_lock:
+                start_date = _pending_propagations.pop(tenant_id, None)
+                if start_date is None:
+                    _running_propagations.discard(tenant_id)
+                    return
+    finally:
+        # start_date is only set here if a pass raised (e.g. SessionLocal() failed); release the tenant
+        # and its queued pass so later requests run again instead of queueing behind a dead task
+        if start_date is not None:
+            with _propagation_lock:
+                _running_propagations.discard(tenant_id)
+                _pending_propagations.pop(tenant_id, None)
+
+
+def _propagate_egg_room_updates(start_date: date, tenant_id: str):
     logger.info(f"Starting egg room report propagation for tenant '{tenant_id}' from {start_date}.")
     db: Session = SessionLocal()
     try:
@@ -30,14 +72,26 @@ def propagate_egg_room_updates(start_date: date, tenant_id: str):
             logger.warning(f"Propagation start date {start_date} is in the future. Aborting.")
             return
 
-        # Get all potentially affected reports in one query to work with them in memory.
-        reports_in_range = db.query(EggRoomReport).filter(
+        # Everything a report's closing balances need besides its opening and received amounts,
+        # so the balances can be recomputed without loading the reports as objects.
+        reports_in_range = db.query(
+            EggRoomReport.report_date,
+            EggRoomReport.table_opening,
+            EggRoomReport.jumbo_opening,
+            EggRoomReport.grade_c_opening,
+            EggRoomReport.table_received,
+            EggRoomReport.jumbo_received,
+            EggRoomReport.grade_c_shed_received,
+            (EggRoomReport.table_closing - func.coalesce(EggRoomReport.table_opening, 0) - func.coalesce(EggRoomReport.table_received, 0)).label("table_movement"),
+            (EggRoomReport.jumbo_closing - func.coalesce(EggRoomReport.jumbo_opening, 0) - func.coalesce(EggRoomReport.jumbo_received, 0)).label("jumbo_movement"),
+            (EggRoomReport.grade_c_closing - func.coalesce(EggRoomReport.grade_c_opening, 0) - func.coalesce(EggRoomReport.grade_c_shed_received, 0)).label("grade_c_movement"),
+        ).filter(
             EggRoomReport.report_date >= start_date,
+            EggRoomReport.report_date <= today,
             EggRoomReport.tenant_id == tenant_id
-        ).order_by(EggRoomReport.report_date).all()
-        
+        ).all()
         report_map = {report.report_date: report for report in reports_in_range}
-        
+
         # Determine the correct opening balance from the day *before* the cascade starts.
         prev_report = db.query(EggRoomReport).filter(
             EggRoomReport.report_date < start_date,
@@ -56,43 +110,56 @@ def propagate_egg_room_updates(start_date: date, tenant_id: str):
             last_jumbo_closing = int(jumbo_opening_config.value) if jumbo_opening_config else 0
             last_grade_c_closing = int(grade_c_opening_config.value) if grade_c_opening_config else 0
 
-        current_date = start_date
-        # Loop from the start date through today to process all necessary days.
-        while current_date <= today:
-            report_to_update = report_map.get(current_date)
-            
-            # Recalculate received amounts from daily_batch for the current day,
-            # as these might have changed and are needed for the balance calculation.
-            daily_batch_sums = db.query(
-                func.sum(DailyBatch.table_eggs).label("table_received"),
-                func.sum(DailyBatch.jumbo).label("jumbo_received"),
-                func.sum(DailyBatch.cr).label("grade_c_shed_received")
+        # Received amounts from daily_batch for every day of the cascade in one query, as these might
+        # have changed and are needed for the balance calculation. The cascade starts the day after the
+        # previous report, so eggs received on gap days before start_date are carried over as well;
+        # without a previous report it starts at the first report, where the opening balances apply.
+        if prev_report:
+            cascade_start = prev_report.report_date + timedelta(days=1)
+        else:
+            cascade_start = min(report_map.keys(), default=today + timedelta(days=1))
+        received_by_day = {
+            row.batch_date: row for row in db.query(
+                DailyBatch.batch_date,
+                func.coalesce(func.sum(DailyBatch.table_eggs), 0).label("table_received"),
+                func.coalesce(func.sum(DailyBatch.jumbo), 0).label("jumbo_received"),
+                func.coalesce(func.sum(DailyBatch.cr), 0).label("grade_c_shed_received")
             ).filter(
-                DailyBatch.batch_date == current_date,
+                DailyBatch.batch_date >= cascade_start,
+                DailyBatch.batch_date <= today,
                 DailyBatch.tenant_id == tenant_id
-            ).first()
-
-            table_received_today = daily_batch_sums.table_received or 0
-            jumbo_received_today = daily_batch_sums.jumbo_received or 0
-            grade_c_received_today = daily_batch_sums.grade_c_shed_received or 0
-
-            if report_to_update:
-                # An existing report is found, so we update its values.
-                report_to_update.table_opening = last_table_closing
-                report_to_update.jumbo_opening = last_jumbo_closing
-                report_to_update.grade_c_opening = last_grade_c_closing
-
-                # Also update received amounts in case daily_batch changed.
-                report_to_update.table_received = table_received_today
-                report_to_update.jumbo_received = jumbo_received_today
-                report_to_update.grade_c_shed_received = grade_c_received_today
-                
+            ).group_by(DailyBatch.batch_date).all()
+        }
+
+        # One pass over the days that have a report or received eggs; other days change nothing.
+        report_updates = []
+        for current_date in sorted(report_map.keys() | received_by_day.keys()):
+            received = received_by_day.get(current_date)
+            table_received_today = received.table_received if received else 0
+            jumbo_received_today = received.jumbo_received if received else 0
+            grade_c_received_today = received.grade_c_shed_received if received else 0
+
+            report = report_map.get(current_date)
+            if report:
+                # An existing report is found: its opening balances and received amounts
+                # (in case daily_batch changed) are updated if they differ.
+                values = {
+                    "table_opening": last_table_closing,
+                    "jumbo_opening": last_jumbo_closing,
+                    "grade_c_opening": last_grade_c_closing,
+                    "table_received": table_received_today,
+                    "jumbo_received": jumbo_received_today,
+                    "grade_c_shed_received": grade_c_received_today,
+                }
+                if any(getattr(report, name) != value for name, value in values.items()):
+                    report_updates.append({"report_date": current_date, "tenant_id": tenant_id, **values})
+
                 # The new closing balances for this day become the opening for the next day.
-                last_table_closing = report_to_update.table_closing
-                last_jumbo_closing = report_to_update.jumbo_closing
-                last_grade_c_closing = report_to_update.grade_c_closing
-                
-                logger.debug(f"Updating report for {current_date}. New opening: {report_to_update.table_opening}, New closing: {last_table_closing}")
+                last_table_closing += table_received_today + report.table_movement
+                last_jumbo_closing += jumbo_received_today + report.jumbo_movement
+                last_grade_c_closing += grade_c_received_today + report.grade_c_movement
+
+                logger.debug(f"Updating report for {current_date}. New closing: {last_table_closing}")
 
             else:
                 # No report exists for this day. We carry over the balance through the gap.
@@ -103,12 +170,39 @@ def propagate_egg_room_updates(start_date: date, tenant_id: str):
                 last_grade_c_closing += grade_c_received_today
                 logger.debug(f"No report for {current_date}. Carrying over balance. New closing for gap day: {last_table_closing}")
 
-            current_date += timedelta(days=1)
-
+        if report_updates:
+            # Bulk UPDATE by primary key, sent as a single executemany
+            db.execute(update(EggRoomReport), report_updates)
         db.commit()
-        logger.info(f"Successfully propagated egg room updates for tenant '{tenant_id}' from {start_date}.")
+        logger.info(f"Successfully propagated egg room updates for tenant '{tenant_id}' from {start_date}: {len(report_updates)} reports updated.")
     except Exception as e:
         logger.error(f"Error during egg room propagation task: {e}", exc_info=True)
         db.rollback()
     finally:
         db.close()
+
+
+def repair_egg_room_report(report_date: date, tenant_id: str, user_id: str):
+    """
+    Stores the received amounts and opening balances of an egg room report that a read found
+    missing or stale, creating the report if needed. Queued by GET /egg-room-report/{report_date},
+    which only computes the up-to-date values; repairs of a report already running are skipped.
+    """
+    key = (tenant_id, report_date)
+    with _propagation_lock:
+        if key in _running_repairs:
+            return
+        _running_repairs.add(key)
+
+    db: Session = SessionLocal()
+    try:
+        crud_egg_room_reports.repair_report(db, report_date, tenant_id, user_id)
+        logger.info(f"Repaired egg room report of {report_date} for tenant '{tenant_id}'.")
+    except Exception as e:
+        # A concurrent request may have created the report first; the next read queues another repair
+        logger.error(f"Error repairing egg room report of {report_date} for tenant '{tenant_id}': {e}", exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
+        with _propagation_lock:
+            _running_repairs.discard(key)
@@ -0,0 +1,88 @@
+"""
+propagate_subsequent_rows against the original per-row loop after a mid-history edit, as
+PATCH /daily-batch/{batch_id}/{batch_date} makes it. Needs PostgreSQL, see conftest.py.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from crud.daily_batch import propagate_subsequent_rows
+from models import Batch, DailyBatch
+from utils.age_utils import calculate_age_progression
+
+TENANT = "tenant_1"
+START = date(2024, 3, 1)
+# Day offsets with a daily_batch row; the missing days check the age progression over gaps
+DAY_OFFSETS = [offset for offset in range(40) if offset not in (6, 7, 15, 30)]
+EDITED_DAY = START + timedelta(days=12)
+
+
+def reference_propagation(rows, from_date):
+    """The original implementation: one forward pass from the row of from_date, row by row."""
+    rows = sorted(rows, key=lambda row: row["batch_date"])
+    anchor = next(row for row in rows if row["batch_date"] == from_date)
+    prev_closing = anchor["opening_count"] + anchor["birds_added"] - anchor["mortality"] - anchor["culls"]
+    prev_date = anchor["batch_date"]
+    prev_age = anchor["age"] if anchor["age"] is not None else Decimal('0')
+    result = {}
+    for row in rows:
+        if row["batch_date"] <= from_date:
+            result[row["batch_date"]] = (row["opening_count"], row["age"])
+            continue
+        age = calculate_age_progression(prev_age, (row["batch_date"] - prev_date).days)
+        result[row["batch_date"]] = (prev_closing, age)
+        prev_closing = prev_closing + row["birds_added"] - row["mortality"] - row["culls"]
+        prev_age = age
+        prev_date = row["batch_date"]
+    return result
+
+
+def seed(db):
+    batch = Batch(tenant_id=TENANT, batch_no="B-1", date=START, age=Decimal("17.6"), opening_count=5000)
+    db.add(batch)
+    db.flush()
+    for offset in DAY_OFFSETS:
+        db.add(DailyBatch(
+            batch_id=batch.id, tenant_id=TENANT, batch_no="B-1", batch_date=START + timedelta(days=offset),
+            # Stale values, as left before the edit
+            age=Decimal("17.6"), opening_count=5000,
+            mortality=offset % 4, culls=offset % 3, birds_added=50 if offset == 20 else 0
+        ))
+    db.commit()
+    return batch.id
+
+
+def stored(db, batch_id):
+    return {
+        row.batch_date: (row.opening_count, row.age)
+        for row in db.query(DailyBatch).filter(DailyBatch.batch_id == batch_id)
+    }
+
+
+@pytest.mark.parametrize("edit", [
+    {"mortality": 25},
+    {"culls": 7, "birds_added": 100},
+    {"opening_count": 4800},
+    {"age": Decimal("18.7")},
+    {"age": Decimal("19.3"), "mortality": 2},
+], ids=lambda edit: ",".join(edit))
+def test_matches_per_row_loop_after_mid_history_edit(db, edit):
+    batch_id = seed(db)
+    edited = db.query(DailyBatch).filter(DailyBatch.batch_id == batch_id, DailyBatch.batch_date == EDITED_DAY).one()
+    for key, value in edit.items():
+        setattr(edited, key, value)
+
+    rows = [
+        {name: getattr(row, name) for name in ("batch_date", "opening_count", "age", "mortality", "culls", "birds_added")}
+        for row in db.query(DailyBatch).filter(DailyBatch.batch_id == batch_id)
+    ]
+    expected = reference_propagation(rows, EDITED_DAY)
+
+    propagate_subsequent_rows(db, batch_id, TENANT, EDITED_DAY)
+    db.commit()
+    db.expire_all()
+
+    assert stored(db, batch_id) == expected
+    # A second pass has nothing left to change
+    assert propagate_subsequent_rows(db, batch_id, TENANT, EDITED_DAY) == 0
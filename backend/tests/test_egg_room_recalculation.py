@@ -0,0 +1,92 @@
+"""
+recalculate_inventory_from_start against the egg stock ledger. Needs PostgreSQL, see conftest.py.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from crud.egg_room_reports import recalculate_inventory_from_start
+from crud.egg_stock_ledger import get_ledger_balance, rebuild_egg_stock_checkpoints
+from models import AppConfig, Batch, DailyBatch, EggRoomReport
+from models.egg_stock_checkpoint import EggStockCheckpoint
+
+TENANT = "tenant_1"
+START = date(2024, 1, 1)
+# Day offsets with an egg room report; days 2 and 5 have eggs received but no report
+REPORT_DAYS = (0, 1, 3, 4, 6)
+
+
+def seed(db):
+    for name, value in (("system_start_date", START.isoformat()), ("table_opening", "500"), ("jumbo_opening", "40"), ("grade_c_opening", "7")):
+        db.add(AppConfig(tenant_id=TENANT, name=name, value=value))
+    batch = Batch(tenant_id=TENANT, batch_no="B-1", date=START, age=Decimal("20.1"), opening_count=1000)
+    db.add(batch)
+    db.flush()
+    for offset in range(7):
+        day = START + timedelta(days=offset)
+        db.add(DailyBatch(
+            batch_id=batch.id, tenant_id=TENANT, batch_no="B-1", batch_date=day, age=Decimal("20.1"),
+            opening_count=1000, table_eggs=800 + offset, jumbo=10 + offset, cr=5
+        ))
+    for offset in REPORT_DAYS:
+        day = START + timedelta(days=offset)
+        # Stale openings, as left by reports created before earlier days were corrected
+        db.add(EggRoomReport(
+            tenant_id=TENANT, report_date=day, table_opening=1, jumbo_opening=1, grade_c_opening=1,
+            table_received=800 + offset, jumbo_received=10 + offset, grade_c_shed_received=5,
+            table_transfer=700, table_damage=3, jumbo_out=8, grade_c_labour=2
+        ))
+    db.commit()
+
+
+def openings(db):
+    return {
+        report.report_date: (report.table_opening, report.jumbo_opening, report.grade_c_opening)
+        for report in db.query(EggRoomReport).filter(EggRoomReport.tenant_id == TENANT)
+    }
+
+
+def test_openings_carry_eggs_received_on_days_without_a_report(db):
+    seed(db)
+
+    assert recalculate_inventory_from_start(db, TENANT, "user_1", chunk_size=3) == len(REPORT_DAYS)
+
+    db.expire_all()
+    result = openings(db)
+    assert result[START] == (500, 40, 7)
+    for report_date, values in result.items():
+        assert values == get_ledger_balance(db, TENANT, report_date - timedelta(days=1))
+    # Day 2's receipts reach the day 3 report: day 1's closing plus the eggs received on day 2
+    day_1 = db.query(EggRoomReport).filter(EggRoomReport.report_date == START + timedelta(days=1)).one()
+    assert result[START + timedelta(days=3)] == (day_1.table_closing + 802, day_1.jumbo_closing + 12, day_1.grade_c_closing + 5)
+
+
+def test_resumed_run_matches_a_full_run(db):
+    seed(db)
+    recalculate_inventory_from_start(db, TENANT, "user_1")
+    expected = openings(db)
+    db.query(EggRoomReport).filter(EggRoomReport.report_date > START + timedelta(days=1)).update({"table_opening": 1})
+    db.commit()
+
+    assert recalculate_inventory_from_start(db, TENANT, "user_1", resume_after=START + timedelta(days=1)) == 3
+
+    db.expire_all()
+    assert openings(db) == expected
+
+
+def test_created_start_report_rebuilds_checkpoints(db):
+    seed(db)
+    # Reports only from February on, so the ledger and its checkpoints start there
+    db.query(EggRoomReport).delete()
+    for offset in range(31, 70, 3):
+        db.add(EggRoomReport(tenant_id=TENANT, report_date=START + timedelta(days=offset), table_transfer=100))
+    db.commit()
+    assert db.query(EggStockCheckpoint).count() > 0
+
+    recalculate_inventory_from_start(db, TENANT, "user_1")
+
+    checkpoints = {row.checkpoint_date: (row.table_closing, row.jumbo_closing, row.grade_c_closing) for row in db.query(EggStockCheckpoint)}
+    rebuild_egg_stock_checkpoints(db, TENANT)
+    db.commit()
+    assert checkpoints == {row.checkpoint_date: (row.table_closing, row.jumbo_closing, row.grade_c_closing) for row in db.query(EggStockCheckpoint)}
+    # The January checkpoint exists now and counts the eggs received from system_start_date
+    assert checkpoints[date(2024, 1, 31)] == (500 + sum(800 + offset for offset in range(7)), 40 + sum(10 + offset for offset in range(7)), 7 + 5 * 7)
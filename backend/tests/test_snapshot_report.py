@@ -0,0 +1,126 @@
+"""
+The consolidated /reports/snapshot, aggregated in SQL, against the original Python aggregation
+over the ORM rows. Needs PostgreSQL, see conftest.py.
+"""
+import json
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from crud.daily_batch import preload_feed_in_grams
+from models import Batch, BovansWhiteLayerPerformance, DailyBatch, DailyFeedRollup, Shed
+from routers.reports import get_snapshot
+from utils.age_utils import calculate_age_progression
+
+TENANT = "tenant_snapshot"
+START = date(2024, 5, 1)
+# The snapshot covers the second week; rows before and after it must not leak into first/last values
+WEEK_START = START + timedelta(days=7)
+WEEK_END = START + timedelta(days=13)
+
+
+def reference_snapshot(db, start_date, end_date):
+    """The original implementation: load the rows and aggregate per batch in Python."""
+    rows = (
+        db.query(DailyBatch).join(Batch, DailyBatch.batch_id == Batch.id)
+        .filter(DailyBatch.batch_date >= start_date, DailyBatch.batch_date <= end_date, Batch.tenant_id == TENANT)
+        .order_by(DailyBatch.batch_id, DailyBatch.batch_date).all()
+    )
+    preload_feed_in_grams(db, rows)
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row.batch_id].append(row)
+
+    details = []
+    for batch_id, batch_rows in groups.items():
+        first, last = batch_rows[0], batch_rows[-1]
+        layer_rows = [r for r in batch_rows if r.age > 17]
+        hd_values = [r.hd for r in layer_rows if r.hd is not None]
+        std_values = [r.standard_hen_day_percentage for r in layer_rows if r.standard_hen_day_percentage is not None]
+        table_eggs = sum(r.table_eggs or 0 for r in batch_rows)
+        jumbo = sum(r.jumbo or 0 for r in batch_rows)
+        cr = sum(r.cr or 0 for r in batch_rows)
+        details.append({
+            "batch_id": batch_id,
+            "batch_no": first.batch_no,
+            "shed_id": first.shed_id,
+            "opening_count": first.opening_count,
+            "mortality": sum(r.mortality or 0 for r in batch_rows),
+            "culls": sum(r.culls or 0 for r in batch_rows),
+            "closing_count": last.closing_count,
+            "table_eggs": table_eggs,
+            "jumbo": jumbo,
+            "cr": cr,
+            "total_eggs": table_eggs + jumbo + cr,
+            "hd": round(sum(hd_values) / len(hd_values), 4) if hd_values else 0,
+            "standard_hen_day_percentage": round(sum(std_values) / len(std_values), 4) if std_values else 0,
+            "actual_feed_consumed": sum(r.feed_in_kg for r in batch_rows if r.feed_in_kg is not None),
+            "standard_feed_consumption": sum(r.standard_feed_in_kg * r.opening_count for r in batch_rows if r.standard_feed_in_kg is not None and r.opening_count is not None),
+            "highest_age": round(max(r.age for r in batch_rows), 1),
+            "batch_type": last.batch_type,
+            "is_active": first.batch.is_active,
+            "birds_added": sum(r.birds_added or 0 for r in batch_rows),
+        })
+
+    layer_details = [r for r in details if r["batch_type"] == "Layer"]
+    summary = {
+        name: sum(r[name] for r in details)
+        for name in ("opening_count", "mortality", "culls", "closing_count", "table_eggs", "jumbo", "cr", "total_eggs",
+                     "actual_feed_consumed", "standard_feed_consumption", "birds_added")
+    }
+    summary["hd"] = round(sum(r["hd"] for r in layer_details) / len(layer_details), 4) if layer_details else 0
+    summary["standard_hen_day_percentage"] = round(sum(r["standard_hen_day_percentage"] for r in layer_details) / len(layer_details), 4) if layer_details else 0
+    summary["highest_age"] = max(r["highest_age"] for r in details)
+    # Decimals as floats, as the endpoint's JSON encoding has them
+    return json.loads(json.dumps({"details": details, "summary": summary}, default=float))
+
+
+def seed(db):
+    for week in range(1, 101):
+        db.add(BovansWhiteLayerPerformance(
+            tenant_id=TENANT, age_weeks=week, livability_percent=99, lay_percent=Decimal(min(week * 1.3, 95.5)).quantize(Decimal("0.01")),
+            eggs_per_bird_cum=0, feed_intake_per_day_g=40 + week, feed_intake_cum_kg=0, body_weight_g=1500
+        ))
+    sheds = [Shed(tenant_id=TENANT, shed_no=f"S{number}") for number in (1, 2)]
+    db.add_all(sheds)
+    db.flush()
+    # A layer batch, a grower turning layer during the week (17.x -> 18.1) and a closed chick batch
+    for number, start_age, closing_date in ((1, Decimal("30.1"), None), (2, Decimal("17.2"), None), (3, Decimal("5.3"), START + timedelta(days=15))):
+        batch = Batch(tenant_id=TENANT, batch_no=f"B-{number}", date=START, age=start_age, opening_count=1000 * number, closing_date=closing_date)
+        db.add(batch)
+        db.flush()
+        opening = batch.opening_count
+        for offset in range(21):
+            day = START + timedelta(days=offset)
+            mortality, culls = (offset + number) % 4, offset % 2
+            birds_added = 25 if offset == 10 else 0
+            db.add(DailyBatch(
+                batch_id=batch.id, tenant_id=TENANT, batch_date=day, age=calculate_age_progression(start_age, offset),
+                # The first row of the week has its own batch_no and shed, which the snapshot must pick
+                batch_no=f"B-{number}-moved" if day == WEEK_START else batch.batch_no,
+                shed_id=sheds[1].id if day == WEEK_START else sheds[0].id,
+                opening_count=opening, mortality=mortality, culls=culls, birds_added=birds_added,
+                table_eggs=0 if number == 3 else 600 + offset * number, jumbo=offset % 5, cr=number
+            ))
+            if offset % 3:
+                db.add(DailyFeedRollup(tenant_id=TENANT, batch_id=batch.id, feed_date=day, gross_feed_kg=0, net_feed_kg=Decimal("101.125") + offset))
+            opening += birds_added - mortality - culls
+    db.commit()
+
+
+def test_consolidated_snapshot_matches_python_aggregation(db):
+    seed(db)
+    expected = reference_snapshot(db, WEEK_START, WEEK_END)
+
+    response = get_snapshot(WEEK_START.isoformat(), WEEK_END.isoformat(), None, db, TENANT)
+    body = json.loads(response.body)
+
+    assert len(body["details"]) == len(expected["details"]) == 3
+    # The feed sums may differ from the per-row float sums in the last digits
+    for actual, expected_row in zip(body["details"], expected["details"]):
+        assert actual == pytest.approx(expected_row)
+        assert actual["batch_no"].endswith("-moved")
+    assert [row["batch_type"] for row in body["details"]] == ["Layer", "Layer", "Chick"]
+    assert body["summary"] == pytest.approx(expected["summary"])
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import class_mapper
-from .age_utils import calculate_age_progression
+from .age_utils import calculate_age_progression, calculate_age_progression_array
 
 def sqlalchemy_to_dict(obj):
     """Convert a SQLAlchemy object to a dictionary."""
@@ -21,4 +21,4 @@ def sqlalchemy_to_dict(obj):
         result[c.key] = value
     return result
 
-__all__ = ['calculate_age_progression', 'sqlalchemy_to_dict']
\ No newline at end of file
+__all__ = ['calculate_age_progression', 'calculate_age_progression_array', 'sqlalchemy_to_dict']
\ No newline at end of file
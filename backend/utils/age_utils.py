@@ -1,14 +1,82 @@
 from decimal import Decimal
+from typing import Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Numeric, case, cast
+
+# Ages are weeks.days: the tenths digit counts days 1..7 within a week, so W.7 rolls into (W+1).1.
+# Starting ages outside that cycle (W.0, W.8, W.9 or negative) move by 0.1 per day until they reach
+# the next W.1, after which every 7 days advance one week. The helpers below use this closed form
+# instead of stepping day by day.
+
+
+def _quantize_age(start_age) -> Decimal:
+    if not isinstance(start_age, Decimal):
+        start_age = Decimal(str(start_age))
+    return start_age.quantize(Decimal('0.1'))
+
+
+def _to_tenths(start_age) -> int:
+    return int(_quantize_age(start_age) * 10)
+
+
+def _cycle_entry(start_tenths: int) -> Tuple[int, int]:
+    """Returns (entry_tenths, days_to_entry): the first W.1..W.7 age reached and how many days that takes."""
+    if start_tenths > 0 and 1 <= start_tenths % 10 <= 7:
+        return start_tenths, 0
+    entry = 1 if start_tenths <= 1 else start_tenths + (1 - start_tenths) % 10
+    return entry, entry - start_tenths
+
 
 def calculate_age_progression(start_age: Decimal, days: int) -> Decimal:
     """
     Increment age by 0.1 per day. If decimal part is .7, add 0.4 instead of 0.1 to roll into new week.
     """
-    current_age = start_age.quantize(Decimal('0.1'))
-    for _ in range(days):
-        decimal = current_age % 1
-        if decimal == Decimal('0.7'):
-            current_age += Decimal('0.4')
-        else:
-            current_age += Decimal('0.1')
-    return current_age.quantize(Decimal('0.1'))
+    if days <= 0:
+        return _quantize_age(start_age)
+    start_tenths = _to_tenths(start_age)
+
+    entry, days_to_entry = _cycle_entry(start_tenths)
+    if days < days_to_entry:
+        return Decimal(start_tenths + days).scaleb(-1)
+
+    day_in_cycle = entry % 10 - 1 + days - days_to_entry
+    tenths = (entry // 10 + day_in_cycle // 7) * 10 + day_in_cycle % 7 + 1
+    return Decimal(tenths).scaleb(-1)
+
+
+def calculate_age_progression_array(start_age: Decimal, days: Sequence[int]) -> np.ndarray:
+    """
+    Vectorized calculate_age_progression: maps an array of day offsets from start_age to ages.
+    Returns an object array of Decimals with the same shape as days.
+    """
+    start_tenths = _to_tenths(start_age)
+    entry, days_to_entry = _cycle_entry(start_tenths)
+
+    days = np.maximum(np.asarray(days, dtype=np.int64), 0)
+    day_in_cycle = entry % 10 - 1 + days - days_to_entry
+    tenths = np.where(
+        days < days_to_entry,
+        start_tenths + days,
+        (entry // 10 + day_in_cycle // 7) * 10 + day_in_cycle % 7 + 1
+    )
+
+    ages = np.empty(tenths.shape, dtype=object)
+    ages.flat[:] = [Decimal(int(t)).scaleb(-1) for t in tenths.flat]
+    return ages
+
+
+def age_progression_expression(start_age: Decimal, days_expr):
+    """
+    SQL form of calculate_age_progression for a fixed start age, so set-based UPDATEs can
+    derive age from an integer day-offset column expression (e.g. batch_date - :anchor_date).
+    """
+    start_tenths = _to_tenths(start_age)
+    entry, days_to_entry = _cycle_entry(start_tenths)
+    day_in_cycle = entry % 10 - 1 - days_to_entry + days_expr
+    tenths = case(
+        (days_expr <= 0, start_tenths),
+        (days_expr < days_to_entry, start_tenths + days_expr),
+        else_=(entry // 10 + day_in_cycle // 7) * 10 + day_in_cycle % 7 + 1
+    )
+    return cast(cast(tenths, Numeric) / 10, Numeric(4, 1))
@@ -0,0 +1,186 @@
+"""
+Readers for the daily-batch Excel uploads.
+
+The consolidated daily report workbook (/daily-batch/upload-excel) is streamed:
+
+The workbook is a sequence of blocks, one per report date:
+
+    DATE   | 01-15-2025 | ...
+    <header row>
+    <one row per batch: batch id, batch no, shed, opening, mort, culls, closing, table, jumbo, cr, ...>
+    TOTAL  | ...
+
+Rows are read with openpyxl in read-only mode, so memory stays flat no matter how many
+years of daily blocks the file holds.
+
+The per-batch weekly report (/daily-batch/upload-weekly-report/{batch_id}) is small and
+is read with pandas.
+"""
+import logging
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+logger = logging.getLogger(__name__)
+
+SKIPPED_ROW_LABELS = ('TOTAL', 'GROWER', 'CHICK')
+WEEKLY_REPORT_HEADER = ['DATE', 'OPEN STOCK', 'MORT', 'CULLS', 'CLOSING STOCK', 'TABLE', 'JUMBO', 'CR', 'TOTAL', 'HD%', 'FEED KGS', 'REMARKS']
+# Batch rows are padded to this many cells so trailing empty cells can be indexed safely
+ROW_WIDTH = 10
+
+
+def parse_report_date(value) -> Optional[date]:
+    """Parses the date cell next to a DATE marker. Accepts MM-DD-YYYY, DD/MM/YYYY or a real Excel date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in ('%m-%d-%Y', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def cell_int(value) -> int:
+    """Integer value of a numeric cell, treating empty cells as 0."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return 0
+    return int(value)
+
+
+def _is_blank(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def iter_daily_report_rows(file_obj) -> Iterator[Tuple[date, int, tuple]]:
+    """
+    Yields (report_date, row_idx, row) for every batch row of every daily block.
+
+    row_idx is the 0-based sheet row, matching what pandas reported before.
+    A block runs until the next DATE marker; the last block stops at its last TOTAL
+    row (or the end of the sheet when it has none). Blank and TOTAL/GROWER/CHICK rows are skipped.
+    Raises ValueError when the sheet has no DATE marker at all.
+    """
+    wb = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        saw_date_marker = False
+        report_date = None
+        data_start = None
+        saw_total = False
+        # Rows after the latest TOTAL of the current block; they only count if another block follows.
+        pending = []
+
+        for row_idx, row in enumerate(ws.iter_rows(values_only=True)):
+            first = row[0] if row else None
+            if first == 'DATE':
+                saw_date_marker = True
+                yield from pending
+                pending = []
+                saw_total = False
+                report_date = parse_report_date(row[1] if len(row) > 1 else None)
+                if report_date is None:
+                    logger.error(f"Could not parse date '{row[1] if len(row) > 1 else None}' at row {row_idx}. Skipping this report section.")
+                data_start = row_idx + 2
+                continue
+
+            if report_date is None or row_idx < data_start:
+                continue
+
+            if first == 'TOTAL':
+                yield from pending
+                pending = []
+                saw_total = True
+                continue
+
+            if _is_blank(first) or str(first).strip().upper() in SKIPPED_ROW_LABELS:
+                continue
+
+            item = (report_date, row_idx, tuple(row) + (None,) * (ROW_WIDTH - len(row)))
+            if saw_total:
+                pending.append(item)
+            else:
+                yield item
+        # Anything left in pending trails the last TOTAL of the final block and is dropped
+        if not saw_date_marker:
+            raise ValueError("No 'DATE' rows found in the Excel file.")
+    finally:
+        wb.close()
+
+
+def read_weekly_report_rows(source) -> List[Tuple[int, date, dict]]:
+    """
+    Returns (row_number, batch_date, values) for every data row of a weekly report, sorted by date.
+
+    row_number is the 1-based sheet row used in error messages. Blocks whose header does not
+    match WEEKLY_REPORT_HEADER are skipped; rows without a DD-MM-YYYY date are ignored.
+    Raises ValueError when the sheet holds no usable rows or a row has invalid data.
+    """
+    df = pd.read_excel(source, header=None)
+
+    # Find all header rows for the data
+    header_row_indices = df.index[df[0] == 'DATE'].tolist()
+    if not header_row_indices:
+        raise ValueError("No 'DATE' rows found in the Excel file.")
+
+    all_data_frames = []
+    for i, header_row_idx in enumerate(header_row_indices):
+        header_row = [str(x).strip() for x in df.iloc[header_row_idx]]
+        if header_row[:len(WEEKLY_REPORT_HEADER)] != WEEKLY_REPORT_HEADER:
+            logger.warning(f"Skipping block at row {header_row_idx + 1} due to invalid header.")
+            continue
+
+        data_start_row = header_row_idx + 1
+
+        # Determine the end of the current data block
+        if i + 1 < len(header_row_indices):
+            data_end_row = header_row_indices[i + 1]
+        else:
+            data_end_row = len(df)
+
+        weekly_data_block = df.iloc[data_start_row:data_end_row]
+
+        # Find the last valid row in the block to trim trailing empty/junk rows
+        last_valid_index = weekly_data_block[0].last_valid_index()
+        if last_valid_index is not None:
+            weekly_data_block = weekly_data_block.loc[:last_valid_index]
+            all_data_frames.append(weekly_data_block)
+
+    if not all_data_frames:
+        raise ValueError("No valid data rows found after headers.")
+
+    weekly_data = pd.concat(all_data_frames)
+
+    if weekly_data.empty:
+        raise ValueError("No data rows found after processing all blocks.")
+
+    # Use errors='coerce' to handle non-date strings gracefully
+    weekly_data['parsed_date'] = pd.to_datetime(weekly_data[0], format='%d-%m-%Y', errors='coerce')
+
+    # Drop rows that could not be parsed as dates
+    weekly_data.dropna(subset=['parsed_date'], inplace=True)
+
+    if weekly_data.empty:
+        raise ValueError("No rows with valid dates found in the file.")
+
+    weekly_data = weekly_data.sort_values(by='parsed_date').drop(columns=['parsed_date'])
+
+    rows = []
+    for i, row in weekly_data.iterrows():
+        try:
+            batch_date = pd.to_datetime(str(row[0]).strip(), format='%d-%m-%Y').date()
+            values = {
+                "mortality": int(row[2]) if pd.notna(row[2]) else 0,
+                "culls": int(row[3]) if pd.notna(row[3]) else 0,
+                "table_eggs": int(row[5]) if pd.notna(row[5]) else 0,
+                "jumbo": int(row[6]) if pd.notna(row[6]) else 0,
+                "cr": int(row[7]) if pd.notna(row[7]) else 0,
+            }
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid data in row {i + 1}: {e}. Ensure 'DATE' is in DD-MM-YYYY format.")
+        rows.append((i + 1, batch_date, values))
+    return rows
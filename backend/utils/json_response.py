@@ -0,0 +1,45 @@
+"""
+Fast JSON rendering for API responses.
+
+FastJSONResponse is the application's default response class. It renders with orjson in a
+single pass and encodes Decimal (as float, like the reports' former DecimalEncoder), date,
+datetime, Enum and numpy values natively, so endpoints can return report payloads as they
+are built instead of converting them to JSON-safe types first.
+
+validated_response is the fast path for large response_model payloads: the content is
+validated against the response schema once, with a cached pydantic TypeAdapter, and dumped
+straight to JSON bytes by pydantic-core. Returning it from an endpoint skips FastAPI's own
+validation and serialization of the same content; keep response_model on the route for the
+OpenAPI schema.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+@lru_cache(maxsize=None)
+def _type_adapter(schema_type) -> TypeAdapter:
+    return TypeAdapter(schema_type)
+
+
+def validated_response(schema_type, content: Any, status_code: int = 200) -> Response:
+    """Validates content (ORM objects, dicts or models) as schema_type and renders it the way response_model would."""
+    adapter = _type_adapter(schema_type)
+    value = adapter.validate_python(content, from_attributes=True)
+    return Response(content=adapter.dump_json(value, by_alias=True), status_code=status_code, media_type="application/json")
@@ -0,0 +1,207 @@
+"""
+In-process cache of report responses, versioned per tenant.
+
+Every commit that writes tenant data bumps the tenant's data version: ORM objects are
+attributed through their tenant_id, bulk UPDATE/DELETE/INSERT statements through the
+tenant_id values bound in them or passed in their parameter rows. A write that cannot be
+attributed to a tenant bumps every tenant; tables without a tenant_id column (audit log,
+child rows written with their parent) are ignored.
+
+Routers created with route_class=CachedResponseRoute keep their GET responses keyed by
+tenant, path and normalized query parameters. An entry is served while the tenant's
+version is unchanged, with an ETag so clients can revalidate with If-None-Match and get
+a 304. Entries also expire after RESPONSE_CACHE_TTL_SECONDS to pick up changes made
+outside this process.
+
+Cache hits are answered before the route's dependencies run, so only use the route
+class for read-only routes whose dependencies are the database session and tenant.
+Routes with other dependencies (authentication) can cache the values they compute with
+get_or_compute, under the same per-tenant versioning.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_TTL_SECONDS = 300
+RESPONSE_CACHE_MAX_ENTRIES = 1000
+
+# Derived tables are only written alongside (and because of) source data changes
+_DERIVED_TABLES = {"daily_feed_rollup", "batch_week_facts", "monthly_production_rollup", "sales_facts", "egg_stock_checkpoints", "effective_standard_curve"}
+# Bind parameter names SQLAlchemy generates for tenant_id values and criteria
+_TENANT_PARAM = re.compile(r"^tenant_id(_m?\d+)?$")
+
+_lock = threading.Lock()
+# Bumped for writes that cannot be attributed to a tenant
+_global_version = 0
+# tenant_id -> data version
+data_versions: Dict[str, int] = {}
+# (tenant_id, path, query) -> {"version", "etag", "body", "media_type", "expiration_time"}
+response_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+# (tenant_id, *key) -> {"version", "value", "expiration_time"}
+value_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+
+
+def get_data_version(tenant_id: str) -> tuple:
+    return _global_version, data_versions.get(tenant_id, 0)
+
+
+def bump_data_version(tenant_id: Optional[str] = None):
+    """Marks the tenant's data, or every tenant's data, as changed."""
+    global _global_version
+    with _lock:
+        if tenant_id is None:
+            _global_version += 1
+        else:
+            data_versions[tenant_id] = data_versions.get(tenant_id, 0) + 1
+
+
+def clear_response_cache():
+    with _lock:
+        response_cache.clear()
+        value_cache.clear()
+
+
+def _cache_key(request: Request, tenant_id: str) -> tuple:
+    return tenant_id, request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+def _get_entry(key: tuple, version: tuple, cache: "OrderedDict[tuple, dict]" = response_cache) -> Optional[dict]:
+    with _lock:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        if entry["version"] != version or entry["expiration_time"] <= time.time():
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return entry
+
+
+def _put_entry(key: tuple, entry: dict, cache: "OrderedDict[tuple, dict]" = response_cache):
+    with _lock:
+        cache[key] = entry
+        cache.move_to_end(key)
+        while len(cache) > RESPONSE_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
+
+def get_or_compute(tenant_id: str, key: tuple, compute: Callable[[], Any]) -> Any:
+    """
+    The result of compute(), cached per tenant and key until the tenant's data changes or
+    RESPONSE_CACHE_TTL_SECONDS pass. Cached values are shared between requests; do not modify them.
+    """
+    cache_key = (tenant_id,) + tuple(key)
+    # Read the version before computing, so a write committed meanwhile invalidates the entry
+    version = get_data_version(tenant_id)
+    entry = _get_entry(cache_key, version, value_cache)
+    if entry is None:
+        entry = {"version": version, "value": compute(), "expiration_time": time.time() + RESPONSE_CACHE_TTL_SECONDS}
+        _put_entry(cache_key, entry, value_cache)
+    return entry["value"]
+
+
+def _cached_response(request: Request, entry: dict) -> Response:
+    headers = {"ETag": entry["etag"], "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == entry["etag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type=entry["media_type"], headers=headers)
+
+
+class CachedResponseRoute(APIRoute):
+    """API route that serves GET responses from the per-tenant versioned response cache."""
+
+    def get_route_handler(self):
+        route_handler = super().get_route_handler()
+
+        async def cached_route_handler(request: Request) -> Response:
+            tenant_id = request.headers.get("x-tenant-id")
+            if request.method != "GET" or not tenant_id:
+                return await route_handler(request)
+
+            key = _cache_key(request, tenant_id)
+            # Read the version before computing, so a write committed meanwhile invalidates the entry
+            version = get_data_version(tenant_id)
+            entry = _get_entry(key, version)
+            if entry is None:
+                response = await route_handler(request)
+                body = getattr(response, "body", None)
+                # Errors and streamed responses (file exports) are passed through uncached
+                if response.status_code != 200 or not isinstance(body, bytes):
+                    return response
+                entry = {
+                    "version": version,
+                    "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+                    "body": body,
+                    "media_type": response.media_type,
+                    "expiration_time": time.time() + RESPONSE_CACHE_TTL_SECONDS,
+                }
+                _put_entry(key, entry)
+            return _cached_response(request, entry)
+
+        return cached_route_handler
+
+
+def _statement_tenants(statement) -> set:
+    """tenant_id values bound in a DML statement; {None} when there are none."""
+    try:
+        params = statement.compile().params
+    except Exception:
+        return {None}
+    tenants = {value for name, value in params.items() if _TENANT_PARAM.match(name) and isinstance(value, str)}
+    return tenants or {None}
+
+
+def _parameter_tenants(parameters) -> set:
+    """tenant_id values of the rows passed to a bulk statement (executemany); {None} when any row has none."""
+    rows = parameters if isinstance(parameters, (list, tuple)) else [parameters or {}]
+    tenants = {row.get("tenant_id") for row in rows}
+    return tenants if tenants and None not in tenants else {None}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_tenant_changes(session, flush_context):
+    changed = session.info.setdefault("data_changed_tenants", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if hasattr(obj, "tenant_id"):
+            # A row whose tenant_id is unset bumps every tenant, since it cannot be attributed
+            changed.add(obj.tenant_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tenant_changes(execute_state):
+    if not (execute_state.is_insert or execute_state.is_update or execute_state.is_delete):
+        return
+    table = getattr(execute_state.statement, "table", None)
+    if table is None or table.name in _DERIVED_TABLES or "tenant_id" not in table.c:
+        return
+    tenants = _statement_tenants(execute_state.statement)
+    if tenants == {None}:
+        # ORM bulk statements by primary key carry the tenant_id values in their parameter rows
+        tenants = _parameter_tenants(execute_state.parameters)
+    execute_state.session.info.setdefault("data_changed_tenants", set()).update(tenants)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_tenant_versions(session):
+    changed = session.info.pop("data_changed_tenants", ())
+    if None in changed:
+        bump_data_version()
+        return
+    for tenant_id in changed:
+        bump_data_version(tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_tenant_changes(session):
+    session.info.pop("data_changed_tenants", None)
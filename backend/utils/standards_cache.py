@@ -0,0 +1,115 @@
+"""
+In-process, per-tenant cache of the performance standards.
+
+Holds the tenant's performance_standard_source config value and the Bovans,
+BV300 rearing and BV300 layer curves keyed by age_weeks, so hybrid properties
+and report loops don't query them once per row. Entries are dropped after a
+commit that touched app_config or a standard table for that tenant, and expire
+after STANDARDS_CACHE_TTL_SECONDS to pick up changes made outside this process.
+"""
+import logging
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, class_mapper
+
+logger = logging.getLogger(__name__)
+
+STANDARDS_CACHE_TTL_SECONDS = 300
+
+# Curve keys used by get_standard_row, mapped to their table names
+STANDARD_TABLES = {
+    "bovans": "bovanswhitelayerperformance",
+    "bv300_rearing": "bv300_rearing_performance",
+    "bv300_layer": "bv300_layer_performance",
+}
+_WATCHED_TABLES = set(STANDARD_TABLES.values()) | {"app_config"}
+
+# tenant_id -> {"source_value": str | None, "curves": {key: {age_weeks: row}}, "expiration_time": float}
+standards_cache: Dict[str, dict] = {}
+
+
+def _snapshot(row) -> SimpleNamespace:
+    """Detached, read-only copy of a standard row that is safe to share between sessions."""
+    return SimpleNamespace(**{c.key: getattr(row, c.key) for c in class_mapper(row.__class__).columns})
+
+
+def load_tenant_standards(db: Session, tenant_id: str) -> dict:
+    """Reads a tenant's standards from the database, bypassing the cache."""
+    # Imported here because models.daily_batch imports this module
+    from models.app_config import AppConfig
+    from models.bovanswhitelayerperformance import BovansWhiteLayerPerformance
+    from models.bv300_layer_performance import BV300LayerPerformance
+    from models.bv300_rearing_performance import BV300RearingPerformance
+
+    config = db.query(AppConfig).filter(
+        AppConfig.tenant_id == tenant_id,
+        AppConfig.name == "performance_standard_source"
+    ).first()
+
+    curves = {}
+    for key, model in (
+        ("bovans", BovansWhiteLayerPerformance),
+        ("bv300_rearing", BV300RearingPerformance),
+        ("bv300_layer", BV300LayerPerformance),
+    ):
+        curve = {}
+        for row in db.query(model).filter(model.tenant_id == tenant_id).order_by(model.age_weeks):
+            curve[row.age_weeks] = _snapshot(row)
+        curves[key] = curve
+
+    return {
+        "source_value": config.value if config else None,
+        "curves": curves,
+        "expiration_time": time.time() + STANDARDS_CACHE_TTL_SECONDS,
+    }
+
+
+def get_tenant_standards(db: Session, tenant_id: str) -> dict:
+    """Returns the cached standards entry for a tenant, loading it on a miss."""
+    entry = standards_cache.get(tenant_id)
+    if entry and entry["expiration_time"] > time.time():
+        return entry
+    entry = load_tenant_standards(db, tenant_id)
+    standards_cache[tenant_id] = entry
+    return entry
+
+
+def get_standard_source_value(db: Session, tenant_id: str) -> Optional[str]:
+    """Raw performance_standard_source config value for the tenant (None when unset)."""
+    return get_tenant_standards(db, tenant_id)["source_value"]
+
+
+def get_standard_row(db: Session, tenant_id: str, curve: str, age_weeks: int):
+    """Standard row for age_weeks from one of the STANDARD_TABLES curves, or None."""
+    return get_tenant_standards(db, tenant_id)["curves"][curve].get(age_weeks)
+
+
+def invalidate_standards_cache(tenant_id: Optional[str] = None):
+    """Drops the cached standards of one tenant, or of every tenant."""
+    if tenant_id is None:
+        standards_cache.clear()
+    else:
+        standards_cache.pop(tenant_id, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_standard_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if getattr(obj, "__tablename__", None) in _WATCHED_TABLES:
+            session.info.setdefault("standards_changed_tenants", set()).add(getattr(obj, "tenant_id", None))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_standard_changes(session):
+    for tenant_id in session.info.pop("standards_changed_tenants", ()):
+        logger.info(f"Performance standards changed for tenant '{tenant_id}'. Clearing cache.")
+        # A row without tenant_id clears every tenant, since it cannot be attributed
+        invalidate_standards_cache(tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_standard_changes(session):
+    session.info.pop("standards_changed_tenants", None)